@@ -0,0 +1,148 @@
+// Reader for the binary columnar export (save_all(filename="triggers.scsb")).
+// Layout is documented in touhou_scs/columnar.py. Columns are typed array
+// views over the file, so nothing is parsed until a trigger is materialized.
+
+const fs = require('fs');
+
+const MAGIC = 'SCSB';
+const VERSION = 1;
+const SHAPE = { SCALAR: 0, LIST: 1, REMAP: 2 };
+const ELEMENT = { BOOL: 0, U8: 1, U16: 2, I32: 3, F64: 4, STRING: 5 };
+const ARRAYS = {
+  [ELEMENT.U8]: Uint8Array,
+  [ELEMENT.U16]: Uint16Array,
+  [ELEMENT.I32]: Int32Array,
+  [ELEMENT.F64]: Float64Array,
+  [ELEMENT.STRING]: Uint32Array,
+};
+const DIRECTORY_ENTRY = 24;
+
+const align = (offset) => offset + (-offset & 7);
+const bit = (bytes, i) => (bytes[i >> 3] >> (i & 7)) & 1;
+
+function read(filename) {
+  const file = fs.readFileSync(filename);
+  // Copy to an aligned buffer of its own, typed arrays need aligned offsets
+  const buffer = file.buffer.slice(file.byteOffset, file.byteOffset + file.length);
+  return parse(buffer);
+}
+
+function parse(buffer) {
+  const view = new DataView(buffer);
+  const bytes = new Uint8Array(buffer);
+  if (String.fromCharCode(...bytes.subarray(0, 4)) !== MAGIC) {
+    throw new Error('Not a columnar trigger export (bad magic)');
+  }
+  const version = view.getUint16(4, true);
+  if (version !== VERSION) {
+    throw new Error(`Unsupported columnar export version ${version} (expected ${VERSION})`);
+  }
+  const columnCount = view.getUint16(6, true);
+  const count = view.getUint32(8, true);
+  const componentCount = view.getUint32(12, true);
+  const stringCount = view.getUint32(16, true);
+  let offset = 24;
+
+  const stringOffsets = new Uint32Array(buffer, offset, stringCount + 1);
+  offset += stringOffsets.byteLength;
+  const decoder = new TextDecoder();
+  const strings = [];
+  for (let i = 0; i < stringCount; i++) {
+    strings.push(decoder.decode(bytes.subarray(offset + stringOffsets[i], offset + stringOffsets[i + 1])));
+  }
+  offset = align(offset + stringOffsets[stringCount]);
+
+  const names = new Uint32Array(buffer, offset, componentCount);
+  const callers = new Uint32Array(buffer, offset += 4 * componentCount, componentCount);
+  const counts = new Uint32Array(buffer, offset += 4 * componentCount, componentCount);
+  const orders = bytes.subarray(offset += 4 * componentCount, offset + componentCount);
+  offset = align(offset + componentCount);
+  const components = Array.from(names, (name, i) => [strings[name], callers[i], counts[i], orders[i] === 1]);
+
+  const entries = [];
+  for (let i = 0; i < columnCount; i++, offset += DIRECTORY_ENTRY) {
+    entries.push({
+      key: String(view.getUint16(offset, true)),
+      shape: bytes[offset + 2],
+      element: bytes[offset + 3],
+      indexElement: bytes[offset + 4],
+      present: view.getUint32(offset + 8, true),
+      lists: view.getUint32(offset + 12, true),
+      listValues: view.getUint32(offset + 16, true),
+    });
+  }
+  offset = align(offset);
+
+  const columns = {};
+  for (const entry of entries) {
+    const column = { ...entry, bitmap: bytes.subarray(offset, offset + ((count + 7) >> 3)) };
+    offset = align(offset + column.bitmap.length);
+    if (entry.shape === SHAPE.SCALAR) {
+      if (entry.element === ELEMENT.BOOL) {
+        column.values = bytes.subarray(offset, offset + ((entry.present + 7) >> 3));
+        offset += column.values.length;
+      } else {
+        column.values = new ARRAYS[entry.element](buffer, offset, entry.present);
+        offset += column.values.byteLength;
+      }
+    } else {
+      column.indices = new ARRAYS[entry.indexElement](buffer, offset, entry.present);
+      offset = align(offset + column.indices.byteLength);
+      column.offsets = new Uint32Array(buffer, offset, entry.lists + 1);
+      offset = align(offset + column.offsets.byteLength);
+      column.values = new ARRAYS[entry.element](buffer, offset, entry.listValues);
+      offset += column.values.byteLength;
+    }
+    offset = align(offset);
+    columns[entry.key] = column;
+  }
+  return { count, strings, components, columns };
+}
+
+// Every distinct integer >= min stored in a list/remap column or an integer column
+function collectGroups(table, min, keys = Object.keys(table.columns)) {
+  const groups = new Set();
+  keys.forEach(key => {
+    const column = table.columns[key];
+    if (!column || column.element === ELEMENT.BOOL || column.element === ELEMENT.STRING) return;
+    if (column.element === ELEMENT.F64 && column.shape === SHAPE.SCALAR) return;
+    column.values.forEach(value => { if (value >= min) groups.add(value); });
+  });
+  return groups;
+}
+
+// Plain trigger objects, same as JSON.parse of triggers.json gives.
+// convert: property ID -> function applied to each value as it is read
+// (once per distinct remap string, so mapping groups in them is cheap)
+function materialize(table, convert = {}) {
+  const readers = Object.values(table.columns).map(column => {
+    const { key, bitmap, values, indices } = column;
+    const fn = convert[key] || (value => value);
+    let value;
+    if (column.shape === SHAPE.SCALAR) {
+      if (column.element === ELEMENT.BOOL) value = n => fn(bit(values, n) === 1);
+      else if (column.element === ELEMENT.STRING) value = n => fn(table.strings[values[n]]);
+      else value = n => fn(values[n]);
+    } else {
+      const { offsets } = column;
+      const list = i => values.subarray(offsets[i], offsets[i + 1]);
+      if (column.shape === SHAPE.LIST) value = n => fn(Array.from(list(indices[n])));
+      else {
+        const remaps = new Array(column.lists);
+        value = n => remaps[indices[n]] ??= fn(list(indices[n]).join('.'));
+      }
+    }
+    return { key, bitmap, value, n: 0 };
+  });
+  const triggers = new Array(table.count);
+  for (let row = 0; row < table.count; row++) {
+    const trigger = {};
+    for (const reader of readers) {
+      if (bit(reader.bitmap, row)) trigger[reader.key] = reader.value(reader.n++);
+    }
+    triggers[row] = trigger;
+  }
+  return triggers;
+}
+
+module.exports = { MAGIC, VERSION, SHAPE, ELEMENT, read, parse, collectGroups, materialize };
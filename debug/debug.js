@@ -3,6 +3,9 @@ const path = require('path');
 
 // File paths (relative to project root, since we run from there)
 const TRIGGERS_PATH = './triggers.json';
+const COLUMNAR_PATH = './triggers.scsb'; // binary export, see touhou_scs/columnar.py
+const PROVENANCE_PATH = './triggers.provenance.json'; // optional, see touhou_scs.provenance
+const INDEX_PATH = './triggers.index.json'; // optional, save_all(debug_index=True)
 const OUTPUT_HTML = './debug/report.html';
 const TEMPLATE_HTML = './debug/template.html';
 const REPORT_JS = './debug/report.js';
@@ -33,15 +36,16 @@ try {
 }
 
 class TriggerDebugger {
-  constructor(triggers) {
+  constructor(triggers, lookup = null) {
     this.triggers = triggers;
+    this.lookup = lookup; // triggers.index.json, replaces the indexes below
     this.indexes = {
       byGroup: new Map(),           // group -> [trigger indices]
       byProperty: new Map(),         // "propName:value" -> [trigger indices]
       byTargetGroup: new Map(),      // targetGroupID -> [trigger indices]
       byRemap: new Map(),            // group mentioned in remap -> [trigger indices]
     };
-    this.buildIndexes();
+    if (!lookup) this.buildIndexes();
   }
 
   buildIndexes() {
@@ -222,10 +226,21 @@ class TriggerDebugger {
     return { spawners, movers, remappers };
   }
 
+  get groupCount() {
+    if (!this.lookup) return this.indexes.byGroup.size;
+    return new Set(['groups', 'targets', 'remaps'].flatMap(table => Object.keys(this.lookup[table]))).size;
+  }
+
   generateReportData() {
     // Collect ALL unique groups from ALL indexes
     const allGroups = new Set();
 
+    if (this.lookup) {
+      ['groups', 'targets', 'remaps'].forEach(table => {
+        Object.keys(this.lookup[table]).forEach(group => allGroups.add(Number(group)));
+      });
+    }
+
     // From direct group references
     this.indexes.byGroup.forEach((_, group) => allGroups.add(group));
 
@@ -249,15 +264,67 @@ class TriggerDebugger {
         groups: validGroups,
         properties: Array.from(this.indexes.byProperty.keys()).sort(),
       },
+      lookup: this.lookup,
       propertyIds: PROPERTY_IDS,
       propertyNames: PROPERTY_NAMES,
       objectTypes: OBJECT_TYPES,
       groupFields: GROUP_FIELDS,
+      sources: this.sources || {},
     };
   }
 }
 
+// trigger index -> "file:line in function" (only if the build recorded provenance)
+function loadSources() {
+  if (!fs.existsSync(PROVENANCE_PATH)) return {};
+  try {
+    const { sites, triggers } = JSON.parse(fs.readFileSync(PROVENANCE_PATH, 'utf8'));
+    const sources = {};
+    Object.entries(triggers).forEach(([index, site]) => { sources[index] = sites[site]; });
+    console.log(`✅ Loaded source locations for ${Object.keys(sources).length} triggers`);
+    return sources;
+  } catch (err) {
+    console.error('⚠️ Failed to read triggers.provenance.json:', err.message);
+    return {};
+  }
+}
+
+// The binary export is read instead of triggers.json if it is newer
+function useColumnar() {
+  if (!fs.existsSync(COLUMNAR_PATH)) return false;
+  if (!fs.existsSync(TRIGGERS_PATH)) return true;
+  return fs.statSync(COLUMNAR_PATH).mtimeMs >= fs.statSync(TRIGGERS_PATH).mtimeMs;
+}
+
+// Lookups precomputed by save_all(debug_index=True), if they were written with these triggers
+function loadIndex(triggers, triggersPath) {
+  if (!fs.existsSync(INDEX_PATH)) return null;
+  try {
+    if (fs.statSync(INDEX_PATH).mtimeMs < fs.statSync(triggersPath).mtimeMs) return null;
+    const index = JSON.parse(fs.readFileSync(INDEX_PATH, 'utf8'));
+    if (index.version !== 1 || index.triggers !== triggers.length) return null;
+    console.log(`✅ Loaded triggers.index.json (${index.components.length} components)`);
+    return index;
+  } catch (err) {
+    console.error('⚠️ Failed to read triggers.index.json:', err.message);
+    return null;
+  }
+}
+
 function main() {
+  if (useColumnar()) {
+    console.log('🔍 Loading triggers.scsb...');
+    let triggers;
+    try {
+      const columnar = require('../columnar');
+      triggers = columnar.materialize(columnar.read(COLUMNAR_PATH));
+      console.log(`✅ Loaded ${triggers.length} triggers`);
+    } catch (err) {
+      console.error('❌ Failed to read triggers.scsb:', err.message);
+      process.exit(1);
+    }
+    return report(triggers, COLUMNAR_PATH);
+  }
   console.log('🔍 Loading triggers.json...');
 
   // Read triggers
@@ -281,11 +348,16 @@ function main() {
     console.error('❌ Failed to read triggers.json:', err.message);
     process.exit(1);
   }
+  report(triggers, TRIGGERS_PATH);
+}
 
+function report(triggers, triggersPath) {
   // Build analyzer
-  console.log('🔨 Building indexes...');
-  const analyzer = new TriggerDebugger(triggers);
-  console.log(`✅ Indexed ${analyzer.indexes.byGroup.size} groups`);
+  const lookup = loadIndex(triggers, triggersPath);
+  if (!lookup) console.log('🔨 Building indexes...');
+  const analyzer = new TriggerDebugger(triggers, lookup);
+  analyzer.sources = loadSources();
+  console.log(`✅ Indexed ${analyzer.groupCount} groups`);
 
   // Generate report data
   console.log('📊 Generating report data...');
@@ -7,6 +7,26 @@ let propertyIds = {};
 let propertyNames = {};
 let objectTypes = {};
 let groupFields = [];
+let sources = {};
+let lookup = null; // triggers.index.json, when debug.js found one
+let totalTriggers = 0;
+let totalGroups = 0;
+
+// Served by `python -m touhou_scs.server`: nothing is embedded, every search is a query
+const serverMode = Boolean(window.TRIGGER_SERVER);
+
+function api(path) {
+  return fetch(path).then(response => response.json().then(body => {
+    if (!response.ok) throw new Error(body.error || response.statusText);
+    return body;
+  }));
+}
+
+// Page items of the query server as { index, trigger }, keeping their sources
+function serverResults(page) {
+  page.items.forEach(item => { if (item.source) sources[item.index] = item.source; });
+  return page.items;
+}
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', () => {
@@ -17,12 +37,28 @@ document.addEventListener('DOMContentLoaded', () => {
     propertyNames = window.TRIGGER_DATA.propertyNames || {};
     objectTypes = window.TRIGGER_DATA.objectTypes || {};
     groupFields = window.TRIGGER_DATA.groupFields || [];
+    sources = window.TRIGGER_DATA.sources || {};
+    lookup = window.TRIGGER_DATA.lookup || null;
+    totalTriggers = triggers.length;
+    totalGroups = indexes.groups.length;
 
     // Display stats
     displayStats();
 
     // Display all groups
     displayAllGroups();
+  } else if (serverMode) {
+    Promise.all([api('/api/summary'), api('/api/groups')]).then(([summary, groups]) => {
+      propertyIds = summary.enums.Properties;
+      Object.keys(propertyIds).forEach(name => { propertyNames[propertyIds[name]] = name; });
+      objectTypes = summary.enums.ObjectID;
+      groupFields = summary.enums.GroupFields || [];
+      totalTriggers = summary.triggers;
+      totalGroups = summary.groups;
+      indexes = { groups: groups.items }; // first page only
+      displayStats();
+      displayAllGroups();
+    }).catch(err => showError(`Query server: ${err.message}`));
   } else {
     console.error('No trigger data found!');
   }
@@ -33,11 +69,11 @@ function displayStats() {
   statsEl.innerHTML = `
     <div class="stat-item">
       <span class="stat-label">Total Triggers:</span>
-      <span class="stat-value">${triggers.length}</span>
+      <span class="stat-value">${totalTriggers}</span>
     </div>
     <div class="stat-item">
       <span class="stat-label">Unique Groups:</span>
-      <span class="stat-value">${indexes.groups.length}</span>
+      <span class="stat-value">${totalGroups}</span>
     </div>
   `;
 }
@@ -61,6 +97,12 @@ function searchByGroup(groupID) {
     return;
   }
 
+  if (serverMode) {
+    api(`/api/group/${groupID}`)
+      .then(page => displayResults(`Group ${groupID}`, serverResults(page), page.total))
+      .catch(err => showError(err.message));
+    return;
+  }
   const results = findByGroup(groupID);
   displayResults(`Group ${groupID}`, results);
 }
@@ -74,6 +116,13 @@ function searchByProperty() {
     return;
   }
 
+  if (serverMode) {
+    const key = propertyIds[SEARCH_PROPERTIES[prop] || prop.toUpperCase()];
+    api(`/api/property?key=${encodeURIComponent(key)}&value=${encodeURIComponent(value)}`)
+      .then(page => displayResults(`${prop} = ${value}`, serverResults(page), page.total))
+      .catch(err => showError(err.message));
+    return;
+  }
   const results = findByProperty(prop, value);
   displayResults(`${prop} = ${value}`, results);
 }
@@ -89,12 +138,65 @@ function showDependencies(groupID) {
     return;
   }
 
+  if (serverMode) {
+    Promise.all([api(`/api/dependencies/${groupID}`), api(`/api/reach/${groupID}`)])
+      .then(([deps, reach]) => displayDependencies(groupID, {
+        spawners: serverResults(deps.spawners),
+        movers: serverResults(deps.movers),
+        remappers: serverResults(deps.remappers),
+      }, reach)).catch(err => showError(err.message));
+    return;
+  }
   const deps = getDependencies(groupID);
   displayDependencies(groupID, deps);
 }
 
+function showSpawnChain() {
+  const groupID = parseInt(document.getElementById('chainGroup').value);
+  if (isNaN(groupID)) {
+    showError('Please enter a valid group ID');
+    return;
+  }
+  if (!serverMode) {
+    showError('Spawn chains need the query server: python -m touhou_scs.server');
+    return;
+  }
+  api(`/api/chain/${groupID}`).then(chain => {
+    const resultsEl = document.getElementById('resultsContent');
+    if (chain.edges.length === 0) {
+      resultsEl.innerHTML = `<p class="no-results">Group <strong>${groupID}</strong> spawns nothing</p>`;
+      return;
+    }
+    let html = `<h3>Spawn chain from Group ${groupID}${chain.truncated ? ' (truncated)' : ''}</h3><ul class="spawn-chain">`;
+    chain.edges.forEach(([from, to, index]) => {
+      html += `<li><button class="group-chip" onclick="searchByGroup(${from})">${from}</button> → `
+        + `<button class="group-chip" onclick="searchByGroup(${to})">${to}</button> (Trigger #${index})</li>`;
+    });
+    resultsEl.innerHTML = html + '</ul>';
+  }).catch(err => showError(err.message));
+}
+
+// Trigger indices in a lookup table entry, stored as [start, length, ...] runs
+function lookupIndices(table, key) {
+  const runs = lookup[table][key] || [];
+  const indices = [];
+  for (let i = 0; i < runs.length; i += 2) {
+    for (let index = runs[i]; index < runs[i] + runs[i + 1]; index++) indices.push(index);
+  }
+  return indices;
+}
+
+function lookupTriggers(indices) {
+  return indices.map(index => ({ index, trigger: triggers[index] }));
+}
+
 // Core search functions (replicate logic from debug.js)
 function findByGroup(groupID) {
+  if (lookup) {
+    const indices = new Set(['groups', 'targets', 'remaps'].flatMap(table => lookupIndices(table, groupID)));
+    return lookupTriggers(Array.from(indices).sort((a, b) => a - b));
+  }
+
   const results = [];
   const seen = new Set(); // Avoid duplicates
 
@@ -132,12 +234,15 @@ function findByGroup(groupID) {
   return results;
 }
 
+// Search box options -> enums.json property names
+const SEARCH_PROPERTIES = { ObjID: 'OBJ_ID', GroupID: 'GROUPS', TargetGroupID: 'TARGET' };
+
 function findByProperty(propName, value) {
   const results = [];
   const searchValue = isNaN(value) ? value : parseInt(value);
 
   // Map property name to property ID
-  const propId = propertyIds[propName.toUpperCase()];
+  const propId = propertyIds[SEARCH_PROPERTIES[propName] || propName.toUpperCase()];
   if (!propId) {
     console.error('Unknown property:', propName);
     return results;
@@ -153,6 +258,14 @@ function findByProperty(propName, value) {
 }
 
 function getDependencies(groupID) {
+  if (lookup) {
+    return {
+      spawners: lookupTriggers(lookupIndices('groups', groupID)),
+      movers: lookupTriggers(lookupIndices('targets', groupID)),
+      remappers: lookupTriggers(lookupIndices('remaps', groupID)),
+    };
+  }
+
   const spawners = [];
   const movers = [];
   const remappers = [];
@@ -209,7 +322,7 @@ function parseRemapString(remapStr) {
 }
 
 // Display functions
-function displayResults(title, results) {
+function displayResults(title, results, total = results.length) {
   const resultsEl = document.getElementById('resultsContent');
 
   if (results.length === 0) {
@@ -217,7 +330,7 @@ function displayResults(title, results) {
     return;
   }
 
-  let html = `<h3>Found ${results.length} trigger(s) for: ${title}</h3>`;
+  let html = `<h3>Found ${total} trigger(s) for: ${title}${total > results.length ? ` (showing ${results.length})` : ''}</h3>`;
   html += '<div class="results-list">';
 
   results.forEach(({ index, trigger }) => {
@@ -228,10 +341,17 @@ function displayResults(title, results) {
   resultsEl.innerHTML = html;
 }
 
-function displayDependencies(groupID, deps) {
+function groupChips(groups) {
+  if (groups.length === 0) return '<p class="empty">None</p>';
+  return groups.map(group => `<button class="group-chip" onclick="showDependencies(${group})">${group}</button>`).join(' ');
+}
+
+// reach (query server only): transitive closure from /api/reach
+function displayDependencies(groupID, deps, reach) {
   const resultsEl = document.getElementById('resultsContent');
 
-  const total = deps.spawners.length + deps.movers.length + deps.remappers.length;
+  let total = deps.spawners.length + deps.movers.length + deps.remappers.length;
+  if (reach) total += reach.affecting.length + reach.affected.length;
 
   if (total === 0) {
     resultsEl.innerHTML = `<p class="no-results">No dependencies found for group <strong>${groupID}</strong></p>`;
@@ -282,6 +402,16 @@ function displayDependencies(groupID, deps) {
   }
   html += '</div></details>';
 
+  if (reach) {
+    const cycle = reach.cycle.length ? ` (in a cycle with ${reach.cycle.length - 1} other groups)` : '';
+    html += `<details open class="dependency-section">
+      <summary><strong>Affected by (${reach.affecting.length})</strong> - Groups whose triggers can eventually reach this group${cycle}</summary>
+      <div class="groups-list">${groupChips(reach.affecting)}</div></details>`;
+    html += `<details class="dependency-section">
+      <summary><strong>Affects (${reach.affected.length})</strong> - Groups this group's triggers can eventually reach</summary>
+      <div class="groups-list">${groupChips(reach.affected)}</div></details>`;
+  }
+
   resultsEl.innerHTML = html;
 }
 
@@ -292,6 +422,7 @@ function renderTrigger(index, trigger) {
     <summary>
       <strong>Trigger #${index}</strong>
       ${important.summary}
+      ${sources[index] ? `<code class="trigger-source">${sources[index]}</code>` : ''}
     </summary>
     <div class="trigger-details">
       <table>`;
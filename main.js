@@ -16,17 +16,53 @@ const groupPropertyField = (key) => {
 	return groupFields.includes(key);
 };
 
-let triggerCount = 0;
-$.exportConfig({
-	type: 'live_editor',
-	// type can be 'savefile' to export to savefile, 'levelstring' to return levelstring
-	// or 'live_editor' to export to WSLiveEditor (must have Geode installed)
-	options: {
-		info: true,
-		level_name: "touhou scs mig",
-	}
-}).then(a => {
-	const jsonData = require('fs').readFileSync('triggers.json', 'utf8');
+const fs = require('fs');
+const columnar = require('./columnar');
+
+// triggers.scsb (save_all(filename="triggers.scsb")) if it is the newer export
+const useColumnar = () => {
+	if (!fs.existsSync('triggers.scsb')) return false;
+	if (!fs.existsSync('triggers.json')) return true;
+	return fs.statSync('triggers.scsb').mtimeMs >= fs.statSync('triggers.json').mtimeMs;
+};
+
+// Register unknown groups in order (lowest first)
+const registerUnknownGroups = (unknownG_set) => {
+	const unknownG_dict = {}; // Maps 10000+n -> actual unknown_g() result object
+	const sortedUnknownGroups = Array.from(unknownG_set).sort((a, b) => a - b);
+
+	sortedUnknownGroups.forEach(groupNum => {
+		unknownG_dict[groupNum] = unknown_g();
+		console.log(`Registered ${groupNum} -> Group ${unknownG_dict[groupNum].value}`);
+	});
+
+	console.log(`Unknown group registry complete: ${sortedUnknownGroups.length} groups registered\n`);
+	return unknownG_dict;
+};
+
+const loadColumnar = () => {
+	const table = columnar.read('triggers.scsb');
+	// Unknown groups are read straight from the integer columns
+	const unknownG_dict = registerUnknownGroups(columnar.collectGroups(table, 10000));
+	const unknownValue = (val) => (val >= 10000 && unknownG_dict[val] ? unknownG_dict[val].value : val);
+
+	const convert = {
+		[PROPERTY_GROUPS]: groupArray => groupArray.map(val => {
+			const registryVal = unknownG_dict[val];
+			return val >= 10000 && registryVal ? registryVal : group(val);
+		}),
+		[PROPERTY_REMAP_STRING]: str => str.split('.').map(Number).map(unknownValue).join('.'),
+	};
+	Object.keys(table.columns).filter(groupPropertyField).forEach(key => { convert[key] = unknownValue; });
+	return columnar.materialize(table, convert).map(trigger => {
+		trigger.GROUPS = trigger[PROPERTY_GROUPS];
+		delete trigger[PROPERTY_GROUPS];
+		return trigger;
+	});
+};
+
+const loadJson = () => {
+	const jsonData = fs.readFileSync('triggers.json', 'utf8');
 	const data = JSON.parse(jsonData);
 
 	// Step 1: Scan all triggers for unknown groups (integers >= 10000)
@@ -61,15 +97,7 @@ $.exportConfig({
 	});
 
 	// Step 3: Sort and register unknown groups in order (lowest first)
-	const unknownG_dict = {}; // Maps 10000+n -> actual unknown_g() result object
-	const sortedUnknownGroups = Array.from(unknownG_set).sort((a, b) => a - b);
-
-	sortedUnknownGroups.forEach(groupNum => {
-		unknownG_dict[groupNum] = unknown_g();
-		console.log(`Registered ${groupNum} -> Group ${unknownG_dict[groupNum].value}`);
-	});
-
-	console.log(`Unknown group registry complete: ${sortedUnknownGroups.length} groups registered\n`);
+	const unknownG_dict = registerUnknownGroups(unknownG_set);
 
 	// Step 3: Transform all triggers using the registry
 	const triggers = data.triggers.map(trigger => {
@@ -110,6 +138,20 @@ $.exportConfig({
 			return acc;
 		}, {});
 	});
+	return triggers;
+};
+
+let triggerCount = 0;
+$.exportConfig({
+	type: 'live_editor',
+	// type can be 'savefile' to export to savefile, 'levelstring' to return levelstring
+	// or 'live_editor' to export to WSLiveEditor (must have Geode installed)
+	options: {
+		info: true,
+		level_name: "touhou scs mig",
+	}
+}).then(a => {
+	const triggers = useColumnar() ? loadColumnar() : loadJson();
 	triggers.forEach(trigger => {
 		$.add(object(trigger));
 	});
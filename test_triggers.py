@@ -15,10 +15,16 @@ Philosophy: Tests should expose logic bugs and verify validation.
 import warnings
 import pytest
 from pytest import ExceptionInfo
-from touhou_scs.component import Component, Multitarget
-from touhou_scs import enums, lib, utils
+from touhou_scs.component import Component, InstantPatterns, Multitarget, PatternCost, TimedPatterns
+from touhou_scs import context, enums, lib, parallel, paths, preview, utils, watch
 from typing import Any
 
+@pytest.fixture(autouse=True)
+def build_context():
+    """Every test builds in its own fork of the import-time context."""
+    with context.default_context.fork("test") as ctx:
+        yield ctx
+
 def setup_pointer_circle(caller: Component) -> Component:
     """Helper to set up a PointerCircle context for pattern tests."""
     caller.assert_spawn_order(True)
@@ -364,6 +370,64 @@ class TestScaleFactorValidation:
         assert_error(exc, "non-negative", "-0.1")
 
 
+class TestScaleKeyframeReuse:
+    """Scale keyframes are stored at unit time/scale and reused through mods"""
+
+    def test_different_durations_share_keyframe_group(self):
+        comp = Component("Test", 100)
+        comp.set_context(target=50)
+        comp.Scale(0, factor=2.0, t=0.3, reverse=True)
+        comp.Scale(0, factor=2.0, t=0.6, reverse=True)
+
+        first, second = comp.triggers
+        assert first[P.KEYMAP_ANIM_GID] == second[P.KEYMAP_ANIM_GID]
+        assert first[P.KEYMAP_ANIM_TIME_MOD] == 0.3
+        assert second[P.KEYMAP_ANIM_TIME_MOD] == 0.6
+
+    def test_different_factors_share_keyframe_group(self):
+        """Factors scaling the same direction reuse the unit scale"""
+        comp = Component("Test", 100)
+        comp.set_context(target=50)
+        comp.Scale(0, factor=3.0, t=0.5, reverse=True)
+        comp.Scale(0, factor=1.5, t=0.5, reverse=True)
+
+        first, second = comp.triggers
+        assert first[P.KEYMAP_ANIM_GID] == second[P.KEYMAP_ANIM_GID]
+        assert first[P.KEYMAP_ANIM_SCALE_X_MOD] == pytest.approx(2.0)
+        assert second[P.KEYMAP_ANIM_SCALE_Y_MOD] == pytest.approx(0.5)
+
+    def test_shrink_uses_positive_mod(self):
+        comp = Component("Test", 100)
+        comp.set_context(target=50)
+        comp.Scale(0, factor=0.25, t=0.5, hold=0.5)
+
+        trigger = comp.triggers[0]
+        assert trigger[P.KEYMAP_ANIM_SCALE_X_MOD] == pytest.approx(1.5)
+        assert trigger[P.KEYMAP_ANIM_TIME_MOD] == 1.0
+
+    def test_hold_ratio_separates_shapes(self):
+        comp = Component("Test", 100)
+        comp.set_context(target=50)
+        comp.Scale(0, factor=2.0, t=1.0, hold=1.0)
+        comp.Scale(0, factor=2.0, t=1.0, hold=3.0)
+        comp.Scale(0, factor=2.0, t=2.0, hold=2.0)
+
+        gids = [t[P.KEYMAP_ANIM_GID] for t in comp.triggers]
+        assert gids[0] != gids[1]
+        assert gids[0] == gids[2]
+
+    def test_keyframes_are_normalized_to_unit_time(self):
+        comp = Component("Test", 100)
+        comp.set_context(target=50)
+        comp.Scale(0, factor=2.0, t=1.0, hold=3.0)
+
+        keyframe_comp = next(c for c in lib.all_components
+            if c.caller == comp.triggers[0][P.KEYMAP_ANIM_GID])
+        durations = [t[P.DURATION] for t in keyframe_comp.triggers]
+        assert sum(durations) == pytest.approx(1.0)
+        assert durations[0] == pytest.approx(0.25)
+
+
 # ============================================================================
 # COUNT TRIGGER - Item ID Validation
 # ============================================================================
@@ -1145,31 +1209,94 @@ class TestTimedRadialWaveValidation:
 class TestTimedLineValidation:
     """Test Timed Line pattern validation"""
 
-    def test_timed_line_too_few_bullets_rejected(self):
-        """numBullets must be at least 2"""
+    @staticmethod
+    def line_bullet() -> Component:
         comp = Component("Test", 100).assert_spawn_order(True)
         comp.set_context(target=enums.EMPTY_BULLET)
         comp.Toggle(0, activateGroup=True)
+        comp.MoveTowards(0, enums.EMPTY_TARGET_GROUP, t=1.0, dist=100)
+        return comp
+
+    def test_timed_line_too_few_bullets_rejected(self):
+        """numBullets must be at least 2"""
+        comp = self.line_bullet()
 
         caller = Component("Caller", 200)
         with pytest.raises(ValueError, match="numBullets must be at least 2"):
             caller.timed.Line(
                 time=0, comp=comp, targetDir=90, bullet=lib.bullet2,
-                numBullets=1, spacing=0.5, t=1.0, dist=100
+                numBullets=1, spacing=0.5
             )
 
     def test_timed_line_negative_spacing_rejected(self):
         """spacing must be non-negative"""
+        comp = self.line_bullet()
+
+        caller = Component("Caller", 200)
+        with pytest.raises(ValueError, match="spacing must be non-negative"):
+            caller.timed.Line(
+                time=0, comp=comp, targetDir=90, bullet=lib.bullet2,
+                numBullets=5, spacing=-0.5
+            )
+
+    def test_timed_line_requires_target_group_slot(self):
+        """The shared MoveTowards must aim at EMPTY_TARGET_GROUP"""
         comp = Component("Test", 100).assert_spawn_order(True)
         comp.set_context(target=enums.EMPTY_BULLET)
         comp.Toggle(0, activateGroup=True)
 
         caller = Component("Caller", 200)
-        with pytest.raises(ValueError, match="spacing must be non-negative"):
+        with pytest.raises(ValueError) as exc:
             caller.timed.Line(
                 time=0, comp=comp, targetDir=90, bullet=lib.bullet2,
-                numBullets=5, spacing=-0.5, t=1.0, dist=100
+                numBullets=5, spacing=0.5
             )
+        assert_error(exc, "must target", str(enums.EMPTY_TARGET_GROUP))
+
+
+class TestTimedLineMultitarget:
+    """Timed Line compiles to staggered Multitarget spawns"""
+
+    def test_caller_triggers_follow_binary_decomposition(self):
+        """100 bullets = 64 + 32 + 4, so only 3 caller triggers"""
+        comp = TestTimedLineValidation.line_bullet()
+        caller = Component("Caller", 200)
+        caller.timed.Line(0, comp, 90, lib.bullet2, numBullets=100, spacing=0.1)
+
+        assert len(caller.triggers) == 3
+        assert all(t[P.OBJ_ID] == enums.ObjectID.SPAWN for t in caller.triggers)
+
+    def test_remaps_use_dot_separator_and_target_slot(self):
+        comp = TestTimedLineValidation.line_bullet()
+        caller = Component("Caller", 200)
+        caller.timed.Line(0, comp, 90, lib.bullet2, numBullets=3, spacing=0.25)
+
+        for trigger in caller.triggers:
+            pairs, _ = utils.translate_remap_string(trigger[P.REMAP_STRING])
+            assert pairs[enums.EMPTY_MULTITARGET] == comp.caller
+            assert 90 in pairs.values()
+
+    def test_spawns_are_staggered_by_spacing(self):
+        """Chunk delays continue where the previous chunk stopped"""
+        comp = TestTimedLineValidation.line_bullet()
+        caller = Component("Caller", 200)
+        caller.timed.Line(0, comp, 90, lib.bullet2, numBullets=3, spacing=0.25)
+
+        first, second = caller.triggers  # 2 + 1
+        assert P.SPAWN_DELAY not in first
+        assert second[P.SPAWN_DELAY] == pytest.approx(0.5)
+
+        base = next(c for c in lib.all_components if c.caller == first[P.TARGET])
+        delays = [t.get(P.SPAWN_DELAY, 0) for t in base.triggers]
+        assert delays == pytest.approx([0, 0.25])
+
+    def test_staggered_bases_are_cached_per_spacing(self):
+        comp = TestTimedLineValidation.line_bullet()
+        caller = Component("Caller", 200)
+        caller.timed.Line(0, comp, 90, lib.bullet2, numBullets=4, spacing=0.25)
+        caller.timed.Line(1, comp, 90, lib.bullet2, numBullets=4, spacing=0.25)
+
+        assert caller.triggers[0][P.TARGET] == caller.triggers[1][P.TARGET]
 
 
 # ============================================================================
@@ -1278,7 +1405,6 @@ class TestGeneralComponentFeatures:
 
     def test_component_without_spawn_order_warning(self):
         """Component without requireSpawnOrder gives warning on export"""
-        lib.all_components.clear()
         comp = Component("Test", 100)
         comp.set_context(target=50)
         comp.Toggle(0, activateGroup=True)
@@ -1345,6 +1471,18 @@ class TestGetTriggersMethod:
         comp.Pickup(0, item_id=12, count=50, override=True)
         assert comp.get_triggers({P.ITEM_ID: 12})[0] is comp.triggers[0]
 
+    def test_get_triggers_follows_trigger_list(self):
+        comp = Component("Test", 100, 5)
+        comp.Pickup(0, item_id=12, count=50, override=True)
+        assert len(comp.get_triggers({P.ITEM_ID: 12})) == 1
+
+        comp.Pickup(1, item_id=12, count=20, override=True)
+        comp.triggers.append(dict(comp.triggers[0])) # type: ignore
+        assert len(comp.get_triggers({P.ITEM_ID: 12})) == 3
+
+        comp.triggers[:] = comp.triggers[1:2]
+        assert comp.get_triggers({P.ITEM_ID: 12}) == comp.triggers
+
 
 class TestHasTriggerPropertiesMethod:
 
@@ -1395,7 +1533,6 @@ class TestSpawnLimitEnforcement:
         multiple times in the same tick, and that component contains spawn triggers.
         GD will only execute the first spawn, silently dropping the rest.
         """
-        lib.all_components.clear()
 
         target_comp = Component("Target", 200)
         target_comp.assert_spawn_order(True)
@@ -1417,7 +1554,6 @@ class TestSpawnLimitEnforcement:
         Spawns at different X coordinates (different ticks) should be allowed.
         This tests that spawn_order grouping works correctly.
         """
-        lib.all_components.clear()
 
         target_comp = Component("Target", 200)
         target_comp.assert_spawn_order(True)
@@ -1436,7 +1572,6 @@ class TestSpawnLimitEnforcement:
         Without spawn_order, all triggers are considered same tick.
         This tests the requireSpawnOrder=False path.
         """
-        lib.all_components.clear()
 
         target_comp = Component("Target", 200)
         target_comp.assert_spawn_order(True)
@@ -1455,7 +1590,6 @@ class TestSpawnLimitEnforcement:
 
     def test_case1_different_targets_allowed(self):
         """Multiple spawns to different groups should be allowed."""
-        lib.all_components.clear()
 
         target1 = Component("Target1", 200)
         target1.assert_spawn_order(True)
@@ -1475,7 +1609,6 @@ class TestSpawnLimitEnforcement:
 
     def test_case1_spawn_delay_excludes_from_check(self):
         """Spawns with delay > 0 should not be checked (they execute at different times)."""
-        lib.all_components.clear()
 
         target_comp = Component("Target", 200)
         target_comp.assert_spawn_order(True)
@@ -1491,7 +1624,6 @@ class TestSpawnLimitEnforcement:
 
     def test_case1_target_without_spawn_allowed(self):
         """Multiple spawns targeting group without spawn triggers should be allowed."""
-        lib.all_components.clear()
 
         target_comp = Component("Target", 200)
         target_comp.assert_spawn_order(True)
@@ -1516,7 +1648,6 @@ class TestSpawnLimitEnforcement:
 
         B's triggers must have remaps themselves (otherwise Case 1 catches it).
         """
-        lib.all_components.clear()
 
         # Layer C: Final target that contains spawn triggers
         layer_c = Component("LayerC", 400)
@@ -1542,7 +1673,6 @@ class TestSpawnLimitEnforcement:
 
     def test_case2_single_spawn_in_b_allowed(self):
         """Case 2 should not trigger if B only has 1 spawn trigger."""
-        lib.all_components.clear()
 
         layer_c = Component("LayerC", 400)
         layer_c.assert_spawn_order(True)
@@ -1561,7 +1691,6 @@ class TestSpawnLimitEnforcement:
 
     def test_case2_no_remap_in_a_allowed(self):
         """Case 2 should not trigger if A has no remap."""
-        lib.all_components.clear()
 
         layer_c = Component("LayerC", 400)
         layer_c.assert_spawn_order(True)
@@ -1587,7 +1716,6 @@ class TestSpawnLimitEnforcement:
 
         Even if B's triggers have remaps, C's reset_remap makes them act unmapped.
         """
-        lib.all_components.clear()
 
         # C has a spawn trigger with reset_remap=True
         layer_c = Component("LayerC", 400)
@@ -1611,7 +1739,6 @@ class TestSpawnLimitEnforcement:
 
         We can tolerate 1 trigger without reset_remap (limiting 1 to 1 is fine).
         """
-        lib.all_components.clear()
 
         layer_c = Component("LayerC", 400)
         layer_c.assert_spawn_order(True)
@@ -1636,7 +1763,6 @@ class TestSpawnLimitEnforcement:
 
         Limiting 1 to 1 is the same as not limiting at all.
         """
-        lib.all_components.clear()
 
         layer_c = Component("LayerC", 400)
         layer_c.assert_spawn_order(True)
@@ -1659,7 +1785,6 @@ class TestSpawnLimitEnforcement:
         """
         Case 2: If 2+ triggers in B don't have reset_remap, violation occurs.
         """
-        lib.all_components.clear()
 
         layer_c = Component("LayerC", 400)
         layer_c.assert_spawn_order(True)
@@ -1683,7 +1808,6 @@ class TestSpawnLimitEnforcement:
 
     def test_integration_with_save_all_default_enabled(self):
         """Test that save_all() calls _enforce_spawn_limit by default"""
-        lib.all_components.clear()
 
         target = Component("Target", 200)
         target.assert_spawn_order(True)
@@ -1706,7 +1830,6 @@ class TestSpawnLimitEnforcement:
         Why: Multitarget creates binary spawn trees, which would multiply
         spawn triggers exponentially, causing spawn limit violations.
         """
-        lib.all_components.clear()
 
         comp = Component("WithSpawn", 100)
         comp.Spawn(0, 200, spawnOrdered=True)
@@ -1738,7 +1861,6 @@ class TestToleranceBoundaryEdgeCases:
             Third is separate (~0.008s converts to ~2.49 studs, beyond tolerance)
             Only 2 simultaneous spawns → violation
         """
-        lib.all_components.clear()
 
         target = Component("Target", 300)
         target.assert_spawn_order(True)
@@ -1763,7 +1885,6 @@ class TestToleranceBoundaryEdgeCases:
         Setup: B has 2 spawns at time 0.0s and ~0.004s (converts to ~1.25 studs, within ~1.3 tolerance)
         Expected: Both grouped together → 2 simultaneous → violation
         """
-        lib.all_components.clear()
 
         target = Component("Target", 300)
         target.assert_spawn_order(True)
@@ -1779,3 +1900,1216 @@ class TestToleranceBoundaryEdgeCases:
             lib._enforce_spawn_limit([caller, target])
 
         assert_error(exc_info, "case 1", "2 simultaneous")
+
+
+# ============================================================================
+# PATH COMPILER TESTS
+# ============================================================================
+
+class TestMovePathCompiler:
+    """Tests that static MoveBy chains become one Keyframe Anim trigger"""
+
+    @staticmethod
+    def moving_bullet(name: str = "Bullet", scale: float = 1.0) -> Component:
+        comp = Component(name, 500, 5).assert_spawn_order(True)
+        comp.set_context(target=600)
+        comp.MoveBy(0, dx=100 * scale, dy=0, t=1, type=2, rate=2)
+        comp.MoveBy(1, dx=0, dy=50 * scale, t=1)
+        comp.MoveBy(1.5, dx=-20 * scale, dy=0)
+        return comp
+
+    def test_ease_endpoints_and_known_values(self):
+        for ease_type in enums.Easing:
+            assert utils.ease(ease_type, 2.0, 0) == 0
+            assert utils.ease(ease_type, 2.0, 1) == 1
+        assert utils.ease(enums.Easing.EASE_IN, 2.0, 0.5) == pytest.approx(0.25)
+        assert utils.ease(enums.Easing.SINE_OUT, 1.0, 0.5) == pytest.approx(0.70710678)
+
+    def test_chain_is_replaced_by_one_keyframe_anim(self):
+        comp = self.moving_bullet()
+        report = paths.compile_move_paths([comp])
+
+        assert len(comp.triggers) == 1
+        anim = comp.triggers[0]
+        assert anim[P.OBJ_ID] == enums.ObjectID.KEYFRAME_ANIM
+        assert anim[P.TARGET] == 600
+        assert anim[P.KEYMAP_ANIM_TIME_MOD] == 2.0
+        assert anim[P.KEYMAP_ANIM_POS_X_MOD] == pytest.approx(100 / paths.UNIT_PATH_EXTENT, rel=1e-5)
+        assert report["Bullet"].paths == 1
+        assert report["Bullet"].triggers_per_spawn == 2
+
+    def test_path_keeps_single_move_easing_and_instant_jumps(self):
+        comp = self.moving_bullet()
+        paths.compile_move_paths([comp])
+        keyframe_group = context.active().path_keyframes[next(reversed(context.active().path_keyframes))]
+
+        positions = [(k[P.X], k[P.Y]) for k in keyframe_group.triggers]
+        assert positions == [(0, 0), (30, 0), (30, 7.5), (24, 7.5), (24, 15)]
+        assert keyframe_group.triggers[0][P.EASING] == enums.Easing.EASE_IN
+        assert [k[P.DURATION] for k in keyframe_group.triggers] == [0.5, 0.25, 0, 0.25, 0]
+
+    def test_scaled_chain_reuses_keyframe_group(self):
+        first = self.moving_bullet("First")
+        second = self.moving_bullet("Second", scale=3)
+        report = paths.compile_move_paths([first, second])
+
+        assert first.triggers[0][P.KEYMAP_ANIM_GID] == second.triggers[0][P.KEYMAP_ANIM_GID]
+        assert report["Second"].keyframe_objects == 0
+        assert second.triggers[0][P.KEYMAP_ANIM_POS_X_MOD] == pytest.approx(300 / paths.UNIT_PATH_EXTENT)
+
+    def test_overlapping_eased_moves_are_sampled(self):
+        segments = [
+            paths.MoveSegment(0, 1, 60, 0, enums.Easing.SINE_IN, 1.0),
+            paths.MoveSegment(0.5, 1, 0, 60, enums.Easing.SINE_OUT, 1.0),
+        ]
+        path = paths.build_path(segments)
+
+        assert sum(k.duration for k in path) == pytest.approx(1.5)
+        assert len(path) > 3
+        assert (path[-1].x, path[-1].y) == pytest.approx((60, 60))
+
+    def test_dynamic_targets_are_skipped(self):
+        comp = Component("Homing", 500, 5).assert_spawn_order(True)
+        comp.set_context(target=enums.EMPTY_BULLET)
+        comp.MoveBy(0, dx=10, dy=0, t=1)
+        comp.MoveTowards(1, enums.EMPTY_TARGET_GROUP, t=1, dist=100)
+        report = paths.compile_move_paths([comp])
+
+        assert len(comp.triggers) == 2
+        assert "dynamic target" in report["Homing"].skipped[enums.EMPTY_BULLET]
+
+    def test_unordered_component_with_timed_moves_is_skipped(self):
+        comp = Component("Unordered", 500, 5)
+        comp.set_context(target=600)
+        comp.MoveBy(0, dx=10, dy=0, t=1)
+        comp.MoveBy(1, dx=0, dy=10, t=1)
+        report = paths.compile_move_paths([comp])
+
+        assert len(comp.triggers) == 2
+        assert "spawn order" in report["Unordered"].skipped[600]
+
+    def test_spread_keeps_keyframe_offsets(self):
+        comp = self.moving_bullet()
+        paths.compile_move_paths([comp])
+        keyframe_group = context.active().path_keyframes[next(reversed(context.active().path_keyframes))]
+        before = [(k[P.X], k[P.Y]) for k in keyframe_group.triggers]
+
+        lib._spread_triggers(keyframe_group.triggers, keyframe_group,
+            lib.DEFAULT_TRIGGER_AREA, len(keyframe_group.triggers))
+        after = [(k[P.X], k[P.Y]) for k in keyframe_group.triggers]
+        dx, dy = after[0][0] - before[0][0], after[0][1] - before[0][1]
+        assert after == [(x + dx, y + dy) for x, y in before]
+
+
+# ============================================================================
+# PREVIEW RENDERER TESTS
+# ============================================================================
+
+class TestPreviewRenderer:
+    """Tests that the offline simulation places bullets where GD would"""
+
+    @staticmethod
+    def radial_caller() -> Component:
+        bullet = (Component("PreviewBullet", 9001, 5)
+            .assert_spawn_order(True)
+            .set_context(target=enums.EMPTY_BULLET)
+                .GotoGroup(0, enums.EMPTY_EMITTER)
+                .Toggle(enums.TICK, True)
+                .MoveTowards(enums.TICK, enums.EMPTY_TARGET_GROUP, t=1, dist=100)
+            .clear_context())
+        caller = setup_pointer_circle(Component("PreviewCaller", 9002, 5))
+        caller.instant.Radial(0, bullet, lib.bullet2, numBullets=12)
+        caller.pointer.CleanPointerCircle()
+        return caller
+
+    def test_radial_bullets_end_on_a_circle(self):
+        sim = preview.Simulation(positions={100: (180, 200)})
+        sim.run(self.radial_caller(), duration=1.5)
+
+        visible = sim.visible(sim.end_tick)
+        assert len(visible) == 12
+        for obj in visible:
+            x, y = sim.position(obj, sim.end_tick)
+            assert ((x - 180) ** 2 + (y - 200) ** 2) ** 0.5 == pytest.approx(100, abs=1e-6)
+
+    def test_downsample_renders_one_frame_per_four_ticks(self):
+        sim = preview.Simulation(positions={100: (180, 200)})
+        sim.run(self.radial_caller(), duration=1)
+
+        assert len(preview.render(sim)) == 241
+        assert len(preview.render(sim, downsample=True)) == 61
+
+    def test_stepping_matches_positions(self):
+        sim = preview.Simulation(positions={100: (180, 200)})
+        sim.run(self.radial_caller(), duration=1)
+        follower = (Component("PreviewFollow", 604, 5).assert_spawn_order(True)
+            .set_context(target=612).MoveBy(0, dx=60, dy=30, t=1, type=enums.Easing.SINE_OUT)
+            .set_context(target=613).Follow(0, 612, t=0.5).clear_context())
+        followed = preview.Simulation().run(follower, duration=1)
+
+        for s in (sim, followed):
+            for tick in (0, 1, 60, 61, 120, 240):
+                s.step(tick)
+                assert sorted(s.shown()) == sorted(s.visible(tick))
+                for obj in range(len(s.initial)):
+                    assert s.current(obj) == pytest.approx(s.position(obj, tick))
+        assert followed.current(followed.objects(613)[0]) != followed.initial[followed.objects(613)[0]]
+
+    def test_keyframe_path_matches_move_by_chain(self):
+        moves = (Component("PathSource", 602, 5).assert_spawn_order(True)
+            .set_context(target=610)
+                .MoveBy(0, dx=60, dy=0, t=0.5, type=enums.Easing.SINE_OUT)
+                .MoveBy(0.5, dx=0, dy=-30, t=0.5))
+        compiled = (Component("PathCompiled", 603, 5).assert_spawn_order(True)
+            .set_context(target=611)
+                .MoveBy(0, dx=60, dy=0, t=0.5, type=enums.Easing.SINE_OUT)
+                .MoveBy(0.5, dx=0, dy=-30, t=0.5))
+        paths.compile_move_paths([compiled])
+
+        for tick in (60, 120, 240):
+            a = preview.Simulation().run(moves, duration=1)
+            b = preview.Simulation().run(compiled, duration=1)
+            assert b.position(b.objects(611)[0], tick) == pytest.approx(a.position(a.objects(610)[0], tick))
+
+    def test_png_and_gif_encoders(self, tmp_path: Any):
+        import zlib
+        pixels = preview.rasterize([(10, 10)], viewport=(0, 0, 20, 20), radius=2)
+        assert pixels.count(1) == 13
+
+        png = tmp_path / "frame.png"
+        preview.write_png(str(png), pixels, 20, 20)
+        data = png.read_bytes()
+        assert data.startswith(b"\x89PNG")
+        idat = data.index(b"IDAT")
+        length = int.from_bytes(data[idat - 4:idat], "big")
+        assert len(zlib.decompress(data[idat + 4:idat + 4 + length])) == 20 * 21
+
+        gif = tmp_path / "anim.gif"
+        written = preview.write_gif(str(gif), [pixels] * 240, 20, 20, fps=240)
+        assert written == 50
+        assert gif.read_bytes().startswith(b"GIF89a")
+
+
+# ============================================================================
+# PATTERN COST TESTS
+# ============================================================================
+
+class TestPatternCost:
+    """Tests that dry-run costs match what the pattern call actually builds"""
+
+    @staticmethod
+    def radial_bullet() -> Component:
+        return (Component("CostBullet", 9101, 5)
+            .assert_spawn_order(True)
+            .set_context(target=enums.EMPTY_BULLET)
+                .GotoGroup(0, enums.EMPTY_EMITTER)
+                .MoveTowards(0, enums.EMPTY_TARGET_GROUP, t=1, dist=100)
+            .clear_context())
+
+    @staticmethod
+    def measure(build: Any, bullet: lib.BulletPool) -> tuple[int, int, int, int]:
+        """(triggers, spawn triggers, unknown groups, bullet slots) added by build()"""
+        def snapshot():
+            triggers = [t for c in lib.all_components for t in c.triggers]
+            spawns = sum(t[P.OBJ_ID] == enums.ObjectID.SPAWN for t in triggers)
+            return len(triggers), spawns, utils.unknown_g.counter, bullet.current
+
+        before = snapshot()
+        build()
+        after = snapshot()
+        slots = (after[3] - before[3]) % (bullet.max_group - bullet.min_group + 1)
+        return after[0] - before[0], after[1] - before[1], after[2] - before[2], slots
+
+    def test_instant_radial_matches_build(self):
+        comp = self.radial_bullet()
+        caller = setup_pointer_circle(Component("CostCaller", 9102, 5))
+        cost = InstantPatterns.cost.Radial(numBullets=24)
+
+        built = self.measure(lambda: caller.instant.Radial(0, comp, lib.bullet3, numBullets=24), lib.bullet3)
+        assert built == (cost.triggers, cost.spawn_triggers, cost.unknown_groups, cost.bullet_slots)
+        assert cost.pointers == len(caller.used_pointers) == 24
+        caller.pointer.CleanPointerCircle()
+
+    def test_radial_wave_counts_spawns_per_wave_and_pointers_once(self):
+        single = InstantPatterns.cost.Radial(spacing=15)
+        wave = TimedPatterns.cost.RadialWave(waves=12, spacing=15)
+
+        bases = 0 if context.active().binary_bases else 127
+        assert single.spawn_triggers == 2 + bases  # 24 = 16 + 8
+        assert wave.spawn_triggers == 12 * 2 + bases
+        assert wave.pointers == 24
+        assert wave.bullet_slots == 12 * 24
+
+    def test_timed_line_counts_missing_staggered_bases_once(self):
+        comp = TestTimedLineValidation.line_bullet()
+        caller = Component("CostLineCaller", 9103, 5)
+        cost = TimedPatterns.cost.Line(numBullets=200, spacing=0.37)
+
+        built = self.measure(lambda: caller.timed.Line(0, comp, 90, lib.bullet4,
+            numBullets=200, spacing=0.37), lib.bullet4)
+        assert built == (cost.triggers, cost.spawn_triggers, cost.unknown_groups, cost.bullet_slots)
+        assert TimedPatterns.cost.Line(numBullets=200, spacing=0.37).unknown_groups == 0
+
+    def test_costs_add_and_reject_impossible_counts(self):
+        total = PatternCost(triggers=1, pointers=2) + PatternCost(triggers=3, bullet_slots=4)
+        assert total == PatternCost(triggers=4, pointers=2, bullet_slots=4)
+
+        with pytest.raises(ValueError) as exc_info:
+            InstantPatterns.cost.Line(numBullets=128)
+        assert_error(exc_info, "between 1 and 127")
+
+
+# ============================================================================
+# BUILD CONTEXT TESTS
+# ============================================================================
+
+class TestBuildContext:
+    def test_fork_isolates_registries_and_counter(self, build_context: context.BuildContext):
+        counter = utils.unknown_g.counter
+        components = list(lib.all_components)
+
+        with build_context.fork() as inner:
+            Component("Inner", utils.unknown_g(), 5)
+            lib.Spell("InnerSpell", 9301)
+            assert lib.all_components is inner.components
+            assert utils.unknown_g.counter == counter + 1
+
+        assert utils.unknown_g.counter == counter
+        assert lib.all_components == components
+        assert lib.all_spells == []
+
+    def test_shared_component_state_is_swapped(self, build_context: context.BuildContext):
+        stage = lib.Stage.stage1
+        before = len(stage.triggers)
+
+        with build_context.fork() as inner:
+            stage.Spawn(0, 9302, True)
+            assert len(stage.triggers) == before + 1
+        assert len(stage.triggers) == before
+
+        inner.activate()
+        assert len(stage.triggers) == before + 1
+        build_context.activate()
+        assert len(stage.triggers) == before
+
+    def test_activation_hands_state_over(self, build_context: context.BuildContext):
+        stage = lib.Stage.stage1
+        triggers = stage.triggers
+        inner = build_context.fork()
+        with inner:
+            stage.Spawn(0, 9302, True)
+            comp = Component("InnerOnly", utils.unknown_g(), 5).Spawn(0, 9303, True)
+        assert stage.triggers is triggers # adopted back, not copied
+
+        # Components the outer context didn't know are copied for the inner one
+        comp.triggers[0][P.TARGET] = 9304
+        with inner:
+            assert comp.triggers[0][P.TARGET] == 9303 and len(stage.triggers) == len(triggers) + 1
+
+    def test_library_caches_and_flags_are_per_context(self, build_context: context.BuildContext):
+        from touhou_scs import misc
+        first, second = build_context.fork("first"), build_context.fork("second")
+
+        with first:
+            Multitarget._get_binary_components(3, Component("Target", 9303))
+            misc.add_disable_all_bullets()
+            next_bullet = lib.bullet1.next()
+            assert first.binary_bases and misc.add_disable_all_bullets.has_been_called
+
+        with second:
+            assert not second.binary_bases
+            assert not misc.add_disable_all_bullets.has_been_called
+            assert lib.bullet1.next() == next_bullet
+
+
+# ============================================================================
+# DEFERRED COMPONENT TESTS
+# ============================================================================
+
+class TestDeferredComponents:
+    def test_built_on_first_use_without_allocating_groups(self, build_context: context.BuildContext):
+        counter = utils.unknown_g.counter
+        assert not any(c.name == "Despawner" for c in lib.all_components)
+
+        despawner = lib.despawner
+        assert despawner is lib.despawner and despawner in lib.all_components
+        assert despawner.caller == lib._despawner.caller and despawner.triggers
+        assert utils.unknown_g.counter == counter
+
+        with build_context.fork():
+            assert lib.despawner is despawner
+        with context.default_context.fork():
+            assert lib.despawner is not despawner and lib.despawner.caller == despawner.caller
+
+    def test_export_builds_unused_components(self, tmp_path: Any):
+        import orjson
+        from touhou_scs import misc
+        output = tmp_path / "triggers.json"
+        lib.save_all(filename=str(output))
+
+        exported = {span[0]: span[1] for span in orjson.loads(output.read_bytes())["components"]}
+        assert exported["Despawn Setup"] == lib._despawnSetup.caller
+        assert exported["EnemyBullet Despawn List"] == misc.DESPAWN_FUNCTION
+
+    def test_build_cannot_exceed_reserved_groups(self):
+        deferred = lib.DeferredComponent("Greedy", 5, lambda c: c.Stop(0, target=utils.unknown_g()))
+        lib._deferred_components.remove(deferred)
+        with pytest.raises(RuntimeError) as exc_info:
+            deferred.get()
+        assert_error(exc_info, "only 0 are reserved")
+
+# ============================================================================
+# BUILD PROFILER TESTS
+# ============================================================================
+
+class TestBuildProfiler:
+    def test_report_has_every_phase_and_counters(self, tmp_path: Any):
+        import orjson
+        caller = Component("Caller", utils.unknown_g(), 5).assert_spawn_order(False)
+        bullet = Component("Bullet", utils.unknown_g(), 5).assert_spawn_order(True)
+        bullet.set_context(target=enums.EMPTY_BULLET).Toggle(0, True)
+        Multitarget.spawn_with_remap(caller, 0, 3, bullet, lambda pairs, remap: None)
+
+        report_file = tmp_path / "profile.json"
+        lib.save_all(filename=str(tmp_path / "triggers.json"), profile_report=str(report_file))
+        report = orjson.loads(report_file.read_bytes())
+
+        assert [p["name"] for p in report["phases"]] == [
+            "build", "dead_components", "spawn_limit", "spread", "validate", "statistics", "serialize"]
+        assert report["counters"] == {"multitarget_calls": 1, "multitarget_spawns": 2} # bases 2 and 1
+        assert report["components"]["largest"][0]["name"] == "BinaryBase_64"
+
+    def test_traced_memory_sees_freed_allocations(self):
+        import tracemalloc
+        from touhou_scs import profiler
+        was_tracing = tracemalloc.is_tracing()
+        profile = profiler.BuildProfile()
+        profiler.trace_memory()
+        try:
+            with profile.phase("churn"):
+                data: list[object] = []
+                for _ in range(3): data = [object() for _ in range(100_000)]
+                del data
+        finally:
+            if not was_tracing: tracemalloc.stop()
+        phase = profile.phases[0]
+        assert phase.peak_bytes is not None and phase.net_bytes is not None
+        assert phase.peak_bytes > 1_000_000 and phase.net_bytes < phase.peak_bytes // 10
+        assert abs(phase.net_blocks) < 10_000 # net blocks can't see it
+
+    def test_cache_stats_are_per_context(self, build_context: context.BuildContext):
+        with build_context.fork() as inner:
+            for _ in range(3): utils.translate_remap_string("10.20")
+            stats = inner.profile.cache_stats()["translate_remap_string"]
+        assert stats["hits"] >= 2 and stats["hits"] + stats["misses"] == 3
+        assert build_context.fork().profile.cache_stats()["translate_remap_string"]["hits"] == 0
+
+# ============================================================================
+# PROVENANCE TESTS
+# ============================================================================
+
+class TestProvenance:
+    @pytest.fixture
+    def recording(self):
+        from touhou_scs import provenance
+        plain = Component.create_trigger
+        yield provenance
+        provenance.disable()
+        assert Component.create_trigger is plain
+
+    def test_sidecar_points_at_creating_line(self, tmp_path: Any, recording: Any):
+        import inspect
+        import orjson
+        recording.enable()
+        comp = Component("Traced", utils.unknown_g(), 5).assert_spawn_order(False)
+        line = inspect.stack(0)[0].lineno + 1
+        comp.Stop(0, target=9401)
+        Multitarget.spawn_with_remap(comp, 0, 2, Component("Target", 9402).assert_spawn_order(True),
+            lambda pairs, remap: None)
+
+        output = tmp_path / "triggers.json"
+        lib.save_all(filename=str(output), check_spawn_limit=False)
+        triggers = orjson.loads(output.read_bytes())["triggers"]
+        sidecar = orjson.loads((tmp_path / "triggers.provenance.json").read_bytes())
+
+        assert not any(recording.SOURCE_KEY in t for t in triggers)
+        sources = {int(i): sidecar["sites"][site] for i, site in sidecar["triggers"].items()}
+        stop = next(i for i, t in enumerate(triggers) if t[str(P.OBJ_ID)] == enums.ObjectID.STOP)
+        assert sources[stop].endswith(f"test_triggers.py:{line} in test_sidecar_points_at_creating_line")
+        # Library internals resolve to the script line that needed them
+        assert all("test_triggers.py" in source for source in sources.values())
+        live_stop = next(t for t in comp.triggers if t[P.OBJ_ID] == enums.ObjectID.STOP)
+        assert recording.source(live_stop) == sources[stop]
+
+    def test_sampling_and_disabled_mode(self, tmp_path: Any, recording: Any):
+        recording.enable(every=3)
+        comp = Component("Sampled", utils.unknown_g(), 5)
+        for i in range(6): comp.Stop(i, target=9401)
+        assert [recording.SOURCE_KEY in t for t in comp.triggers] == [False, False, True] * 2
+
+        recording.disable()
+        comp.Stop(6, target=9401)
+        assert recording.SOURCE_KEY not in comp.triggers[-1]
+
+        # Sites recorded before disabling never reach the export
+        output = tmp_path / "triggers.json"
+        lib.save_all(filename=str(output), check_spawn_limit=False)
+        assert recording.SOURCE_KEY.encode() not in output.read_bytes()
+        assert recording.SOURCE_KEY in comp.triggers[2]
+
+# ============================================================================
+# GROUP BUDGET TESTS
+# ============================================================================
+
+class TestGroupBudget:
+    def test_caps_enforced_at_allocation(self, build_context: context.BuildContext):
+        budget = build_context.budget
+        budget.caps["lasers"] = 2
+        for _ in range(2): utils.unknown_g("lasers")
+        counter = utils.unknown_g.counter
+
+        with pytest.raises(RuntimeError) as exc_info:
+            utils.unknown_g("lasers")
+        assert_error(exc_info, "'lasers' needs 3 groups", "cap is 2")
+        assert utils.unknown_g.counter == counter and budget.counts["lasers"] == 2
+
+        budget.caps["bullets"] = budget.counts["bullets"] + 5
+        with pytest.raises(RuntimeError):
+            lib.BulletPool(9000, 9009, False)
+
+    def test_pools_and_forks_are_counted(self, build_context: context.BuildContext):
+        budget = build_context.budget
+        assert budget.counts["bullets"] == sum(p.max_group - p.min_group + 1
+            for p in (lib.bullet1, lib.bullet2, lib.bullet3, lib.bullet4))
+        assert budget.counts["enemies"] == 2 * 12 # pool range + off switches
+
+        total = budget.total
+        with build_context.fork() as inner:
+            Component("Spell", utils.unknown_g(), 5)
+            assert inner.budget.total == total + 1
+        assert budget.total == total
+
+        report = budget.report()
+        assert report["used"] == total and report["remaining"] == 9999 - total
+        assert report["projected"] >= sum(budget.caps.values())
+        assert report["categories"]["pickups"] == {"used": 0, "cap": 500}
+
+# ============================================================================
+# DEFERRED VALIDATION TESTS
+# ============================================================================
+
+class TestDeferredValidation:
+    def test_errors_are_raised_at_save_with_their_trigger(self, tmp_path: Any):
+        from touhou_scs.component import set_validation_mode
+        set_validation_mode(True)
+        comp = Component("DeferredBad", 9310, 5).assert_spawn_order(False)
+        with comp.temp_context(target=9311):
+            comp.MoveBy(0, dx=10, dy=0, t=0.5)
+            comp.MoveBy(0.1, dx=10, dy=0, t=-1) # eager mode would raise here
+            comp.Rotate(0.2, angle=90, center=9312, rate=50)
+        assert len(comp.triggers) == 3
+
+        with pytest.raises(ValueError) as exc_info:
+            lib.save_all(filename=str(tmp_path / "triggers.json"))
+        assert_error(exc_info, "DeferredBad trigger #1 (MoveBy)", "non-negative", "-1")
+
+    def test_targets_checked_against_final_counter(self, build_context: context.BuildContext):
+        from touhou_scs.component import set_validation_mode
+        set_validation_mode(True)
+        comp = Component("DeferredTargets", 9313, 5)
+        ahead = utils.unknown_g.counter + 1
+        with comp.temp_context(target=ahead):
+            comp.Alpha(0, opacity=50)
+        batch = build_context.validation_batch
+        assert batch is not None and len(batch) == 2 # set_context + Alpha
+
+        with build_context.fork() as inner:
+            assert inner.validation_batch is not batch
+            comp.Alpha(0, opacity=50, t=-1)
+        assert len(batch) == 2
+
+        with pytest.raises(ValueError) as exc_info:
+            batch.check(utils.unknown_g.counter)
+        assert_error(exc_info, "DeferredTargets trigger #0 (set_context)", "out of valid range")
+        utils.unknown_g() # allocated later in the build
+        batch.check(utils.unknown_g.counter)
+
+        set_validation_mode(False)
+        with pytest.raises(ValueError):
+            comp.Alpha(0, opacity=50, t=-1)
+
+
+# ============================================================================
+# GROUP REGISTRY TESTS
+# ============================================================================
+
+class TestGroupRegistry:
+    def test_classify_and_find(self, build_context: context.BuildContext):
+        from touhou_scs.groups import GroupClass
+        registry = build_context.groups
+        assert registry.classify(enums.PLR) == GroupClass.SPECIAL
+        assert registry.classify(enums.EMPTY_BULLET) == GroupClass.PLACEHOLDER
+        assert registry.classify(9999) == GroupClass.RESTRICTED
+        assert registry.classify(lib.bullet2.max_group) == GroupClass.BULLET
+        assert registry.classify(lib.pointer.min_group) == GroupClass.POINTER
+        assert registry.classify(utils.unknown_g()) == GroupClass.UNKNOWN
+        assert registry.classify(9000) == GroupClass(0)
+
+        column = [9000, lib.bullet1.min_group, 22, 10001, 9999]
+        assert registry.find(GroupClass.RESTRICTED, column) == 22
+        assert registry.find(GroupClass.BULLET | GroupClass.UNKNOWN, column) == lib.bullet1.min_group
+        assert registry.find(GroupClass.ENEMY, column) is None
+        assert registry.find(GroupClass.ENEMY, [9000, -1]) == -1
+
+    def test_overlapping_pools_rejected(self, build_context: context.BuildContext):
+        with pytest.raises(ValueError) as exc_info:
+            lib.BulletPool(950, 1100, False)
+        assert_error(exc_info, "overlaps group 950", "'bullets' (501-1000)")
+        with pytest.raises(ValueError) as exc_info:
+            lib.BulletPool(9990, 9999, False, "pointers")
+        assert_error(exc_info, "overlaps group 9999", "restricted groups")
+        with pytest.raises(ValueError) as exc_info:
+            build_context.groups.register_collision_ids("Lasers", 4, 8)
+        assert_error(exc_info, "overlap collision ID 4", "'hitboxes' (1-5)")
+
+        with build_context.fork() as inner:
+            lib.BulletPool(9001, 9100, False)
+            assert inner.groups.pools[-1].first == 9001
+        assert build_context.groups.classify(9001) == 0
+        lib.BulletPool(9001, 9100, False)
+
+
+# ============================================================================
+# OPTIMIZATION PASS TESTS
+# ============================================================================
+
+class TestDeadComponents:
+    @staticmethod
+    def build() -> tuple[Component, ...]:
+        root = Component("Root", 9320, 5).assert_spawn_order(False)
+        spawned = Component("Spawned", utils.unknown_g(), 5).assert_spawn_order(False)
+        remapped = Component("Remapped", utils.unknown_g(), 5).assert_spawn_order(False)
+        orphan = Component("Orphan", utils.unknown_g(), 5).assert_spawn_order(False)
+        orphan_child = Component("OrphanChild", utils.unknown_g(), 5).assert_spawn_order(False)
+
+        root.Spawn(0, spawned.caller, False)
+        spawned.Spawn(0, 9321, False, remap=f"{enums.EMPTY1}.{remapped.caller}")
+        remapped.set_context(target=9322).Toggle(0, True)
+        orphan.Spawn(0, orphan_child.caller, False)
+        orphan_child.set_context(target=9322).Toggle(0, False)
+        return root, spawned, remapped, orphan, orphan_child
+
+    def test_unreachable_chain_found(self, build_context: context.BuildContext):
+        from touhou_scs import passes
+        root, spawned, remapped, orphan, orphan_child = self.build()
+        fixed = Component("FixedOrphan", 9323, 5).assert_spawn_order(False)
+        fixed.set_context(target=9322).Toggle(0, True)
+        comps = [root, spawned, remapped, orphan, orphan_child, fixed]
+        assert passes.find_dead_components(comps, [root.caller]) == [orphan, orphan_child, fixed]
+        assert passes.find_dead_components(comps, [root.caller, orphan.caller, fixed.caller]) == []
+
+        # Counts and item IDs that happen to equal a group don't reference it
+        root.Pickup(0, item_id=5, count=orphan.caller, override=True)
+        assert passes.find_dead_components(comps, [root.caller]) == [orphan, orphan_child, fixed]
+
+        # A trigger also in a live group is live, the rest of its
+        # component still only runs when the caller is spawned
+        with orphan.temp_context(groups=root.caller):
+            orphan.Spawn(0.5, 9321, False)
+        assert passes.find_dead_components(comps, [root.caller]) == [orphan_child, fixed]
+
+    def test_save_all_removes_only_when_asked(self, tmp_path: Any):
+        import orjson
+        lib.Spell("DeadTest", self.build()[0].caller) # spell callers are roots
+        Component("LevelCalled", 34, 5).assert_spawn_order(False).set_context(target=9322).Toggle(0, True)
+        output = tmp_path / "triggers.json"
+        lib.save_all(filename=str(output))
+        names = [span[0] for span in orjson.loads(output.read_bytes())["components"]]
+        assert "Orphan" in names and "OrphanChild" in names
+
+        lib.save_all(filename=str(output), remove_dead=True)
+        names = [span[0] for span in orjson.loads(output.read_bytes())["components"]]
+        assert "Orphan" not in names and "OrphanChild" not in names
+        assert "Remapped" in names and "Orphan" not in [c.name for c in lib.all_components]
+        assert "LevelCalled" in names
+
+
+class TestDedupe:
+    @staticmethod
+    def attack(name: str) -> tuple[Component, int]:
+        """Per-enemy attack: same moves, its own enemy group"""
+        enemy = utils.unknown_g()
+        comp = (Component(name, utils.unknown_g(), 5).assert_spawn_order(False)
+            .set_context(target=enemy)
+                .MoveBy(0, dx=30, dy=0, t=1)
+            .set_context(target=9330)
+                .Toggle(0.5, True)
+            .clear_context())
+        return comp, enemy
+
+    def test_duplicates_spawn_shared_component(self, build_context: context.BuildContext):
+        from touhou_scs import passes
+        root = Component("Root", 9331, 5).assert_spawn_order(False)
+        (a, enemy_a), (b, enemy_b), (c, _) = self.attack("A"), self.attack("B"), self.attack("C")
+        root.Spawn(0, a, False).Spawn(0, b, False, remap=f"{enums.EMPTY1}.9332").Spawn(0, c, False)
+        root.Stop(1, target=c)
+        comps = [root, a, b, c]
+
+        report = passes.dedupe_components(comps)
+        assert comps == [root, a, c]
+        assert report.merged[0].duplicates == [b] and report.objects_saved == 2
+        assert report.skipped == {"C": "caller is used by more than Spawn triggers"}
+        spawn_b = root.triggers[1]
+        assert spawn_b[P.TARGET] == a.caller
+        assert spawn_b[P.REMAP_STRING] == f"{enums.EMPTY1}.9332.{enemy_a}.{enemy_b}"
+
+    def test_shared_groups_not_remapped(self, build_context: context.BuildContext):
+        from touhou_scs import passes
+        root = Component("Root", 9331, 5).assert_spawn_order(False)
+        (a, enemy_a), (b, _) = self.attack("A"), self.attack("B")
+        root.Spawn(0, a, False).Spawn(0, b, False)
+        root.set_context(target=enemy_a).Toggle(0, True) # remapping it would reach root's targets
+        comps = [root, a, b]
+
+        report = passes.dedupe_components(comps)
+        assert comps == [root, a, b] and report.objects_saved == 0
+        assert report.skipped == {"B": "groups to remap are used by other components"}
+        assert passes.dedupe_components([a, b], roots=[b.caller]).merged == []
+
+    def test_spawn_order_kept_apart(self, build_context: context.BuildContext):
+        from touhou_scs import passes
+        root = Component("Root", 9331, 5).assert_spawn_order(False)
+        a, b = (Component(name, utils.unknown_g(), 5).assert_spawn_order(ordered)
+            .set_context(target=9333).Toggle(0, True).Toggle(1, False).clear_context()
+            for name, ordered in (("Unordered", False), ("Ordered", True)))
+        root.Spawn(0, a, False).Spawn(0, b, False)
+        comps = [root, a, b]
+
+        assert passes.dedupe_components(comps).merged == []
+        assert comps == [root, a, b] and root.triggers[1][P.TARGET] == b.caller
+
+
+class TestPeephole:
+    @staticmethod
+    def build(ordered: bool = True) -> Component:
+        return (Component("Peephole", utils.unknown_g(), 5).assert_spawn_order(ordered)
+            .set_context(target=9340)
+                .MoveBy(0, dx=10, dy=5, t=1)
+                .MoveBy(0, dx=-4, dy=1, t=1)
+                .MoveBy(0.5, dx=10, dy=5, t=2) # different duration
+                .MoveBy(1, dx=0, dy=0)
+                .Alpha(1, opacity=0)
+                .Alpha(1, opacity=100)
+            .clear_context())
+
+    def test_rules_merge_and_drop(self):
+        from touhou_scs import peephole
+        comp = self.build()
+        report = peephole.optimize_components([comp])
+        assert report.counts == {"merge_moves": 1, "zero_move": 1, "dead_alpha": 1}
+        assert report.removed == 3 and len(comp.triggers) == 3
+        assert (comp.triggers[0][P.MOVE_X], comp.triggers[0][P.MOVE_Y]) == (6, 6)
+        assert comp.triggers[2][P.OPACITY] == 1.0
+
+        # Without spawn order the alphas have no defined order
+        unordered = self.build(ordered=False)
+        assert peephole.optimize_components([unordered]).counts["dead_alpha"] == 0
+
+    def test_rules_can_be_turned_off(self):
+        from touhou_scs import peephole
+        comp = self.build()
+        peephole.RULES["merge_moves"].enabled = False
+        try:
+            report = peephole.optimize_components([comp])
+        finally:
+            peephole.RULES["merge_moves"].enabled = True
+        assert "merge_moves" not in report.counts and len(comp.triggers) == 4
+        assert peephole.optimize_components([self.build()], rules=["zero_move"]).removed == 1
+        with pytest.raises(ValueError, match="Unknown peephole rules"):
+            peephole.optimize_components([comp], rules=["merge_everything"])
+
+    def test_set_position_moves_after_goto(self):
+        comp = Component("SetPos", utils.unknown_g(), 5).assert_spawn_order(True)
+        comp.set_context(target=lib.bullet1.min_group).SetPosition(1, x=10, y=20)
+        goto, move = comp.triggers
+        assert move[P.X] - goto[P.X] == pytest.approx(utils.time_to_dist(enums.TICK * 2))
+
+
+class TestDefaultElision:
+    @staticmethod
+    def export(tmp_path: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        import orjson
+        comp = Component("Defaults", 9350, 5).assert_spawn_order(True)
+        (comp.set_context(target=lib.bullet1.min_group)
+            .MoveBy(0, dx=10, dy=0, t=1)
+            .MoveBy(0.5, dx=10, dy=0, t=1, type=enums.Easing.EASE_IN, rate=1.5)
+            .Scale(1, factor=2, t=1, reverse=True)
+            .clear_context())
+        output = tmp_path / "triggers.json"
+        lib.save_all(filename=str(output), check_spawn_limit=False, **kwargs)
+        triggers = orjson.loads(output.read_bytes())["triggers"]
+        return [t for t in triggers if 9350 in t[P.GROUPS]]
+
+    def test_defaults_left_out(self, tmp_path: Any):
+        plain, eased, anim = self.export(tmp_path, elide_defaults=True)
+        assert P.MOVE_Y not in plain and P.EASING not in plain
+        assert plain[P.EASING_RATE] == 1.0 # only values listed in GD_DEFAULTS are left out
+        assert plain[P.MOVE_X] == 10 and plain[P.DURATION] == 1
+        assert eased[P.EASING] == enums.Easing.EASE_IN and eased[P.EASING_RATE] == 1.5
+
+        # Missing Keyframe Anim mods are read as 0, never leave them out
+        assert enums.REQUIRED_FIELDS[enums.ObjectID.KEYFRAME_ANIM] <= anim.keys()
+
+    def test_off_by_default(self, tmp_path: Any):
+        plain = self.export(tmp_path)[0]
+        assert plain[P.MOVE_Y] == 0 and plain[P.EASING] == 0 and plain[P.EASING_RATE] == 1.0
+
+
+# ============================================================================
+# COLUMNAR EXPORT TESTS
+# ============================================================================
+
+class TestColumnarExport:
+    def test_save_all_roundtrip(self, tmp_path: Any):
+        import orjson
+        from touhou_scs import columnar
+        comp = Component("Columnar", 9351, 5).assert_spawn_order(True)
+        comp.Spawn(0, 60, spawnOrdered=True, remap="10.6001.20.6002")
+        comp.set_context(target=lib.bullet1.min_group).Alpha(0.25, opacity=50).Toggle(0.5, True).clear_context()
+        output = tmp_path / "triggers.scsb"
+        lib.save_all(filename=str(output), check_spawn_limit=False)
+
+        table = columnar.decode(output.read_bytes())
+        spawn, alpha, toggle = [t for t in table["triggers"] if 9351 in t[P.GROUPS]]
+        assert spawn[P.REMAP_STRING] == "10.6001.20.6002" and spawn[P.SPAWN_ORDERED] is True
+        assert alpha[P.OPACITY] == 0.5 and toggle[P.ACTIVATE_GROUP] is True
+        assert ["Columnar", 9351, 3, True] in table["components"]
+
+        assert columnar.decode(columnar.encode(table)) == table
+        assert output.stat().st_size < len(orjson.dumps(table))
+
+    def test_invalid_data_rejected(self):
+        from touhou_scs import columnar
+        with pytest.raises(ValueError) as exc:
+            columnar.decode(b'{"triggers": []}')
+        assert_error(exc, "bad magic")
+        with pytest.raises(ValueError) as exc:
+            columnar.encode({"triggers": [{"name": 1}], "components": []})
+        assert_error(exc, "not a numeric property ID")
+
+    def test_mixed_columns(self):
+        from touhou_scs import columnar
+        table = {"triggers": [
+            {P.OBJ_ID: 1, P.SPAWN_ORDERED: True, P.REMAP_STRING: "10.6001", "43": "007.10001"},
+            {P.OBJ_ID: 2, P.SPAWN_ORDERED: 0, P.REMAP_STRING: "20.6002", "43": "1.2"},
+        ], "components": []}
+        decoded = columnar.decode(columnar.encode(table))
+        assert decoded == table # 1 == True
+        assert [t["43"] for t in decoded["triggers"]] == ["007.10001", "1.2"]
+
+
+# ============================================================================
+# TRIGGER INDEX TESTS
+# ============================================================================
+
+class TestTriggerIndex:
+    def test_group_queries(self):
+        from touhou_scs.index import TriggerIndex
+        spawner = Component("Spawner", 9360, 5)
+        spawner.Spawn(0, 9361, spawnOrdered=False, remap="10.9362")
+        mover = Component("Mover", 9361, 5)
+        mover.set_context(target=9362).MoveBy(0, dx=10, dy=0, t=1).clear_context()
+
+        index = TriggerIndex.build([spawner, mover])
+        assert index.in_group(9361) == mover.triggers
+        assert index.targeting(9361) == spawner.triggers
+        assert index.referencing(9362) == [spawner.triggers[0], mover.triggers[0]]
+        assert index.owner(mover.triggers[0]) is mover
+        assert index.find({P.OBJ_ID: enums.ObjectID.MOVE, P.TARGET: 9362}) == mover.triggers
+
+    def test_edits_in_place(self):
+        comp = Component("Edited", 9367, 5)
+        comp.set_context(target=9368).MoveBy(0, dx=10, dy=0, t=1).MoveBy(0.5, dx=10, dy=0, t=1).clear_context()
+        first, second = comp.triggers
+        assert comp.get_triggers({P.TARGET: 9368}) == [first, second]
+
+        first[P.TARGET] = 9369
+        assert comp.get_triggers({P.TARGET: 9368}) == [second]
+        comp.triggers_edited()
+        assert comp.get_triggers({P.TARGET: 9369}) == [first]
+
+        replaced = dict(second, **{P.TARGET: 9369})
+        comp.triggers[1] = replaced # type: ignore
+        assert comp.get_triggers({P.TARGET: 9369}) == [first, replaced]
+        assert not comp.has_trigger_properties({P.TARGET: 9368})
+
+    def test_save_all_drops_stale_index(self):
+        comp = Component("Indexed", 9363, 5)
+        comp.set_context(target=lib.bullet1.min_group).MoveBy(0, dx=10, dy=0, t=1).clear_context()
+        assert comp.get_triggers({P.X: 0})
+        lib.save_all(filename="testing", check_spawn_limit=False)
+        x = comp.triggers[0][P.X]
+        assert x != 0 and comp.get_triggers({P.X: x}) == comp.triggers
+
+    def test_debug_index_sidecar(self, tmp_path: Any):
+        import orjson
+        spawner = Component("Spawner", 9364, 5)
+        spawner.Spawn(0, 9365, spawnOrdered=False, remap="10.9366").Spawn(0.5, 9365, spawnOrdered=False)
+        output = tmp_path / "triggers.json"
+        lib.save_all(filename=str(output), check_spawn_limit=False, debug_index=True)
+
+        exported = orjson.loads(output.read_bytes())
+        index = orjson.loads((tmp_path / "triggers.index.json").read_bytes())
+        assert index["triggers"] == len(exported["triggers"])
+        first = next(c[2] for c in index["components"] if c[0] == "Spawner")
+        assert index["groups"]["9364"] == index["targets"]["9365"] == [first, 2]
+        assert index["remaps"]["9366"] == [first, 1]
+        assert exported["triggers"][first][P.REMAP_STRING] == "10.9366"
+
+
+# ============================================================================
+# QUERY SERVER TESTS
+# ============================================================================
+
+class TestQueryServer:
+    @staticmethod
+    def queries(tmp_path: Any) -> Any:
+        from touhou_scs.server import TriggerQueries
+        root = Component("ChainRoot", 9370, 5)
+        root.Spawn(0, 9371, spawnOrdered=False).Spawn(0.5, 9372, spawnOrdered=False)
+        Component("ChainMid", 9371, 5).Spawn(0, 9373, spawnOrdered=False, remap="10.9374")
+        Component("ChainLoop", 9373, 5).Spawn(0, 9370, spawnOrdered=False)
+        output = tmp_path / "triggers.json"
+        lib.save_all(filename=str(output), check_spawn_limit=False)
+        return TriggerQueries.load(str(output))
+
+    def test_queries(self, tmp_path: Any):
+        queries = self.queries(tmp_path)
+        page = queries.by_group(9370, offset=1, limit=1)
+        assert page["total"] == 3 and len(page["items"]) == 1
+        assert queries.by_property("TARGET", "9373")["items"][0]["component"] == "ChainMid"
+        assert queries.by_property("442", "10.9374")["total"] == 1
+        assert queries.by_property("GROUPS", "[9371]")["total"] == 1
+        deps = queries.dependencies(9374)
+        assert deps["remappers"]["total"] == 1 and deps["spawners"]["total"] == 0
+
+        chain = queries.chain(9370)
+        assert [edge[:2] for edge in chain["edges"]] == [[9370, 9371], [9370, 9372], [9371, 9373], [9373, 9370]]
+        assert not chain["truncated"] and queries.chain(9370, depth=1)["truncated"]
+
+        reach = queries.reach(9371)
+        assert reach["affecting"] == [9370, 9371, 9373] and 9374 in reach["affected"]
+        assert reach["cycle"] == [9370, 9371, 9373]
+
+    def test_http(self, tmp_path: Any):
+        import threading
+        import urllib.error
+        import urllib.request
+        import orjson
+        from touhou_scs.server import make_server
+        server = make_server(self.queries(tmp_path), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with urllib.request.urlopen(f"{url}/api/group/9371") as response:
+                assert orjson.loads(response.read())["total"] == 2
+            with pytest.raises(urllib.error.HTTPError) as exc:
+                urllib.request.urlopen(f"{url}/api/property?key=NOT_A_PROPERTY&value=1")
+            assert exc.value.code == 400
+            for value in ("%7B%7D", "%5B%5B1%5D%5D"): # {} and [[1]]
+                with pytest.raises(urllib.error.HTTPError) as exc:
+                    urllib.request.urlopen(f"{url}/api/property?key=TARGET&value={value}")
+                assert exc.value.code == 400
+            with urllib.request.urlopen(url) as response:
+                assert b"window.TRIGGER_SERVER = true;" in response.read()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+# ============================================================================
+# DEPENDENCY GRAPH TESTS
+# ============================================================================
+
+class TestDependencyGraph:
+    def test_cycles_and_remaps(self):
+        from touhou_scs.depgraph import DependencyGraph
+        Component("A", 9380, 5).Spawn(0, 9381, spawnOrdered=False)
+        Component("B", 9381, 5).Spawn(0, 9382, spawnOrdered=False, remap="10.9383")
+        Component("C", 9382, 5).Spawn(0, 9381, spawnOrdered=False)
+        mover = Component("D", 9383, 5)
+        mover.set_context(target=9384)
+        mover.Toggle(0, activateGroup=True)
+        graph = DependencyGraph.from_components(lib.all_components)
+
+        assert graph.affected(9380) == [9381, 9382, 9383, 9384]
+        assert graph.affecting(9384) == [9380, 9381, 9382, 9383]
+        assert graph.affects(9382, 9382) and not graph.affects(9380, 9380)
+        assert not graph.affects(9384, 9380) and graph.affecting(9380) == []
+        assert graph.cycle(9381) == [9381, 9382] and graph.cycle(9380) == []
+
+    def test_items(self):
+        from touhou_scs.depgraph import DependencyGraph
+        Component("Hit", 9385, 5).Pickup(0, item_id=45, count=1, override=False)
+        counter = Component("Counter", 9386, 5)
+        counter.set_context(target=9387)
+        counter.Count(0, item_id=45, count=10, activateGroup=True)
+        graph = DependencyGraph.from_components(lib.all_components)
+
+        assert graph.affected(9385) == [9387]
+        assert graph.affecting(9387) == [9385, 9386]
+        assert graph.affected(45) == [] # item IDs are not groups
+
+
+# ============================================================================
+# LEVEL FILE TESTS
+# ============================================================================
+
+class TestLevelFile:
+    @staticmethod
+    def write_level(path: Any, objects: list[str]) -> str:
+        import base64
+        import gzip
+        level = ";".join(["kS38,1_40_2_125_3_255,kA13,0", *objects]) + ";"
+        encoded = base64.urlsafe_b64encode(gzip.compress(level.encode())).decode()
+        path.write_text(f'<?xml version="1.0"?><plist version="1.0" gjver="2.0"><dict><k>kCEK</k>'
+            f'<i>4</i><k>k2</k><s>test</s><k>k4</k><s>{encoded}</s><k>k13</k><t /></dict></plist>')
+        return str(path)
+
+    def test_read(self, tmp_path: Any):
+        from touhou_scs import gmd
+        objects = [f"1,1816,2,{15 * i},3,-15,57,{9390 + i % 3}.9393,80,{i}" for i in range(300)]
+        objects.append("1,1268,2,2000,3,2000,57,9390,51,9394,442,10.9395")
+        path = self.write_level(tmp_path / "level.gmd", objects)
+        level = gmd.LevelObjects.read(path, chunk_size=64) # records split across chunks
+
+        assert len(level) == 301 and level.ids[0] == 1816 and level.x[299] == 4485
+        assert level.groups(4) == [9391, 9393] and len(level.in_group(9393)) == 300
+        assert level.value(300, P.TARGET) == "9394" and level.value(300, P.REMAP_STRING) == "10.9395"
+        assert level.value(7, P.ITEM_ID) == "7" and level.value(300, P.ITEM_ID) is None
+        assert 300 not in level.placed(lib.DEFAULT_TRIGGER_AREA) # an exported trigger
+        for chunk_size in (5, 1 << 16):
+            assert gmd.LevelObjects.read(path, chunk_size=chunk_size).ids == level.ids
+
+    def test_save_all_checks_level(self, tmp_path: Any, capsys: Any):
+        path = self.write_level(tmp_path / "level.gmd", ["1,1889,2,15,3,15,57,9396.9397", "1,1,2,45,3,15,57,9398"])
+        Component("Holder", 9396, 5).Stop(0, target=9399)
+        with pytest.warns(UserWarning, match="Group 9396 of generated triggers") as record:
+            lib.save_all(filename="testing", check_spawn_limit=False, level=path)
+        assert not any("9397" in str(w.message) for w in record)
+        assert "hand-placed in the level: 3" in capsys.readouterr().out
+
+    def test_shipped_level_has_no_conflicts(self):
+        for g in enums.LEVEL_CALLED_GROUPS: # called by the holder object and level triggers
+            Component(f"LevelCalled{g}", g, 5).Stop(0, target=9399)
+        with warnings.catch_warnings(record=True) as record:
+            warnings.simplefilter("always")
+            lib.save_all(filename="testing", check_spawn_limit=False, level="touhou scs.gmd")
+        assert not [w for w in record if "of generated triggers" in str(w.message)]
+
+
+# ============================================================================
+# WATCH MODE TESTS
+# ============================================================================
+
+class TestWatchBuild:
+    SPELL = (
+        "from touhou_scs import lib\n"
+        "from touhou_scs.component import Component\n"
+        "open({runs!r}, 'a').write('{name} ')\n"
+        "Component({name!r}, {group}, 5).Stop(0, target={target})\n"
+        "{save}\n"
+    )
+
+    @staticmethod
+    def write_spell(path: Any, runs: Any, name: str, group: int, target: int, save: bool = False):
+        path.write_text(TestWatchBuild.SPELL.format(runs=str(runs), name=name, group=group,
+            target=target, save="lib.save_all(filename='ignored.json')" if save else ""))
+        # mtime granularity can hide quick successive writes
+        stat = path.stat()
+        import os
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    @pytest.fixture
+    def spells(self, tmp_path: Any):
+        runs = tmp_path / "runs.txt"
+        a, b = tmp_path / "a.py", tmp_path / "b.py"
+        self.write_spell(a, runs, "WatchA", 9201, 9290)
+        self.write_spell(b, runs, "WatchB", 9202, 9290, save=True)
+        yield watch.WatchBuild([str(a), str(b)], output="testing"), a, b, runs
+
+    def test_rebuild_reruns_only_from_changed_source(self, spells: Any):
+        builder, _, b, runs = spells
+        builder.build()
+        counter = utils.unknown_g.counter
+        assert runs.read_text() == "WatchA WatchB "
+
+        self.write_spell(b, runs, "WatchB", 9202, 9291, save=True)
+        assert builder.changed_source() == 1
+        builder.build(1)
+        assert runs.read_text() == "WatchA WatchB WatchB "
+        assert [c.name for c in lib.all_components].count("WatchB") == 1
+        assert utils.unknown_g.counter == counter
+
+    def test_diff_lists_only_changed_components(self, spells: Any):
+        builder, a, _, runs = spells
+        first = builder.build()
+        assert {"9201:WatchA", "9202:WatchB"} <= set(first["changed"])
+
+        assert builder.build(0) == {"changed": {}, "removed": []}
+
+        self.write_spell(a, runs, "WatchA", 9201, 9292)
+        diff = builder.build(builder.changed_source() or 0)
+        assert list(diff["changed"]) == ["9201:WatchA"]
+
+        self.write_spell(a, runs, "WatchC", 9203, 9292)
+        diff = builder.build(builder.changed_source() or 0)
+        assert list(diff["changed"]) == ["9203:WatchC"]
+        assert diff["removed"] == ["9201:WatchA"]
+
+    def test_failed_source_leaves_previous_state(self, spells: Any):
+        builder, _, b, _ = spells
+        builder.build()
+        components = list(lib.all_components)
+        b.write_text("from touhou_scs.component import Component\n"
+            "Component('Broken', 9204, 5)\nraise RuntimeError('typo')\n")
+
+        with pytest.raises(RuntimeError):
+            builder.build(1)
+        assert lib.all_components == components
+
+    def test_deferred_save_all_records_options(self):
+        from touhou_scs.lib import save_all # imported names are deferred too
+        assert lib.SaveOptions().__dict__ == save_all.__kwdefaults__
+        with lib.deferred_save_all() as saves:
+            save_all(filename="deferred.json", dedupe=True)
+        assert saves[-1].changed() == {"filename": "deferred.json", "dedupe": True}
+
+
+# ============================================================================
+# PARALLEL BUILD TESTS
+# ============================================================================
+
+class TestParallelBuild:
+    STAGE = (
+        "from touhou_scs import lib\n"
+        "from touhou_scs.component import Component\n"
+        "from touhou_scs.utils import unknown_g\n"
+        "attack = Component({name!r}, {caller}, 5).assert_spawn_order(True).Stop(0, target=9499)\n"
+        "lib.Stage.stage1.Spawn({time}, attack.caller, True)\n"
+        "lib.save_all()\n"
+    )
+
+    @staticmethod
+    def stages(tmp_path: Any, *attacks: tuple[str, str]) -> list[str]:
+        """attacks: (name, caller expression) per stage"""
+        sources: list[str] = []
+        for i, (name, caller) in enumerate(attacks):
+            source = tmp_path / f"stage{i + 1}.py"
+            source.write_text(TestParallelBuild.STAGE.format(name=name, caller=caller, time=i))
+            sources.append(str(source))
+        return sources
+
+    def test_split_pool_is_disjoint_and_complete(self):
+        slices = parallel.split_pool(lib.pointer, 3)
+        assert slices[0][0] == lib.pointer.min_group and slices[-1][1] == lib.pointer.max_group
+        assert all(a[1] + 1 == b[0] for a, b in zip(slices, slices[1:]))
+
+        with pytest.raises(ValueError):
+            parallel.split_pool(lib.BulletPool(9001, 9002, False, "pointers"), 3)
+
+    def test_output_is_independent_of_worker_count(self, tmp_path: Any):
+        import orjson
+        sources = self.stages(tmp_path, ("Attack1", "unknown_g()"), ("Attack2", "unknown_g()"))
+        outputs: list[bytes] = []
+        for workers in (1, 2):
+            output = tmp_path / f"out{workers}.json"
+            results = parallel.build_stages(sources, output=str(output), workers=workers, group_span=100)
+            outputs.append(output.read_bytes())
+
+        base = context.default_context.unknown_g.counter
+        assert [r.components[0][1] for r in results] == [base, base + 100]
+        assert outputs[0] == outputs[1]
+
+        triggers = orjson.loads(outputs[0])["triggers"]
+        stage_spawns = [t for t in triggers if lib.Stage.stage1.caller in t[str(P.GROUPS)]]
+        assert {t[str(P.TARGET)] for t in stage_spawns} == {base, base + 100}
+
+    def test_library_components_are_kept_once(self, tmp_path: Any):
+        import orjson
+        sources = self.stages(tmp_path, ("Grow1", "unknown_g()"), ("Grow2", "unknown_g()"))
+        for source in sources:
+            with open(source, "a") as file:
+                file.write("attack.set_context(target=9498)\n"
+                    "attack.Scale(0, factor=2, hold=1, t=1)\n")
+        output = tmp_path / "out.json"
+        parallel.build_stages(sources, output=str(output), workers=2, group_span=100)
+
+        table = orjson.loads(output.read_bytes())
+        keyframe_groups = [c for c in table["components"] if c[0].startswith("Keyframe Scale<grow>,Ratio<0.5>")]
+        assert len(keyframe_groups) == 1
+        anims = [t for t in table["triggers"] if t.get(str(P.TARGET)) == 9498]
+        assert len(anims) == 2 and {t[str(P.KEYMAP_ANIM_GID)] for t in anims} == {keyframe_groups[0][1]}
+
+    def test_same_component_in_two_stages_rejected(self, tmp_path: Any):
+        with pytest.raises(RuntimeError) as exc_info:
+            parallel.build_stages(self.stages(tmp_path, ("Attack", "9401"), ("Attack", "9401")),
+                output="testing", workers=1)
+        assert_error(exc_info, "built by both")
+
+# ============================================================================
+# LINKER TESTS
+# ============================================================================
+
+class TestLinker:
+    @staticmethod
+    def export(tmp_path: Any, name: str) -> dict[str, Any]:
+        """Stage built from the import-time context: a shared component plus its own attack."""
+        import orjson
+        with context.default_context.fork(name):
+            shared = Component("Shared", utils.unknown_g(), 5).assert_spawn_order(False).Stop(0, target=9499)
+            bullet = utils.unknown_g()
+            attack = Component(name, utils.unknown_g(), 5).assert_spawn_order(True)
+            attack.Spawn(0, shared.caller, True, remap=f"9499.{bullet}")
+            lib.save_all(filename=str(tmp_path / f"{name}.json"), seed=0)
+        return orjson.loads((tmp_path / f"{name}.json").read_bytes())
+
+    def test_shared_components_deduplicated(self, tmp_path: Any):
+        from touhou_scs import linker
+        first, second = self.export(tmp_path, "AttackA"), self.export(tmp_path, "AttackB")
+        linked, stats = linker.link([first, second])
+
+        # Everything but AttackB already exists in the first table
+        assert stats.deduplicated == len(second["components"]) - 1
+        assert len(linked["triggers"]) == len(first["triggers"]) + 1
+        kept = linked["components"][:len(first["components"])]
+        assert [span[0] for span in kept] == [span[0] for span in first["components"]]
+
+        spawn = linked["triggers"][-1]
+        shared = next(span[1] for span in kept if span[0] == "Shared")
+        assert spawn[str(P.TARGET)] == shared
+        assert linked["components"][-1][1] > max(span[1] for span in kept)
+
+    def test_remap_strings_relocated(self, tmp_path: Any):
+        from touhou_scs import linker
+        first, second = self.export(tmp_path, "AttackA"), self.export(tmp_path, "AttackB")
+        linked, stats = linker.link([first, second])
+
+        remaps = [t[str(P.REMAP_STRING)] for t in linked["triggers"] if str(P.REMAP_STRING) in t]
+        assert remaps[0] != remaps[-1]
+        assert {int(s.split(".")[1]) for s in remaps} <= set(range(10000, 10000 + stats.groups_relocated))
+
+    def test_tables_without_spans_only_relocated(self, tmp_path: Any):
+        from touhou_scs import linker
+        first, second = self.export(tmp_path, "AttackA"), self.export(tmp_path, "AttackB")
+        linked, stats = linker.link([{"triggers": first["triggers"]}, {"triggers": second["triggers"]}])
+
+        assert stats.deduplicated == 0
+        assert len(linked["triggers"]) == len(first["triggers"]) + len(second["triggers"])
+        groups = [{g for t in table["triggers"] for g in t[str(P.GROUPS)] if g >= 10000}
+            for table in (linked, first)]
+        assert len(groups[0]) == 2 * len(groups[1])
+
+        with pytest.raises(ValueError) as exc_info:
+            linker.link([{"triggers": first["triggers"], "components": [["A", 1, 1, False]]}])
+        assert_error(exc_info, "don't add up")
@@ -13,6 +13,9 @@ which follows this JSON format:
     "{property_number}": value,
     "{group_property_number}": [int1, int2, ...]
 }
+
+"components" lists [name, caller, trigger_count, spawn_ordered] for each
+component in trigger order, which the linker uses to tell components apart.
 """
 
 __version__ = "2.0.0"
@@ -31,6 +34,7 @@ from touhou_scs.lib import (
     save_all,
 )
 from touhou_scs.component import Component
+from touhou_scs.context import BuildContext
 from touhou_scs import enums, utils
 from touhou_scs.types import (
     Trigger,
@@ -48,6 +52,7 @@ __all__ = [
     "Spell",
     "GuiderCircle",
     "BulletPool",
+    "BuildContext",
 
     # Core functions
     "save_all",
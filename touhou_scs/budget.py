@@ -0,0 +1,81 @@
+"""
+Touhou SCS - Group Budget Module
+
+Tracks how many of GD's 9999 groups each subsystem uses. Every allocation
+is tagged with a category: unknown groups through unknown_g(category)
+(main.js maps each one to a free group, so they count too) and solid
+ranges when a BulletPool/EnemyPool is created.
+
+Caps are checked at allocation time, so a build fails at the line that
+overflows a category instead of in main.js:
+
+    context.active().budget.caps["bullets"] = 4000
+
+save_all prints usage per category and a projection that assumes every
+capped category grows to its cap (the hand-kept budget in remember.txt).
+"""
+
+from __future__ import annotations
+from typing import Any
+
+GROUP_LIMIT = 9999
+
+DEFAULT_CAPS: dict[str, int] = {
+    "bullets": 5000,
+    "pickups": 500,
+    "player_shots": 1800,
+    "enemies": 1000,
+}
+"""Upper ends of the planned ranges in remember.txt"""
+
+
+class GroupBudget:
+    def __init__(self, caps: dict[str, int] | None = None):
+        self.caps: dict[str, int] = dict(DEFAULT_CAPS if caps is None else caps)
+        self.counts: dict[str, int] = {}
+        self.total = 0
+
+    def copy(self) -> GroupBudget:
+        budget = GroupBudget(self.caps)
+        budget.counts = dict(self.counts)
+        budget.total = self.total
+        return budget
+
+    def charge(self, category: str, n: int = 1) -> None:
+        """Count n groups against category, raising if a cap or the group limit is exceeded."""
+        used = self.counts.get(category, 0) + n
+        cap = self.caps.get(category)
+        if cap is not None and used > cap:
+            raise RuntimeError(f"Group budget: '{category}' needs {used} groups, its cap is {cap}")
+        if self.total + n > GROUP_LIMIT:
+            raise RuntimeError(f"Group budget: allocating {n} '{category}' groups exceeds the "
+                f"{GROUP_LIMIT} group limit ({self.total} already used)")
+        self.counts[category] = used
+        self.total += n
+
+    def report(self, placed: int = 0) -> dict[str, Any]:
+        """placed: groups of hand-placed level objects outside any category (touhou_scs.gmd)"""
+        categories = sorted(self.counts.keys() | self.caps.keys())
+        projected = sum(max(self.counts.get(c, 0), self.caps.get(c, 0)) for c in categories) + placed
+        return {
+            "limit": GROUP_LIMIT,
+            "used": self.total + placed,
+            "remaining": GROUP_LIMIT - self.total - placed,
+            "placed": placed,
+            "projected": projected,
+            "projected_remaining": GROUP_LIMIT - projected,
+            "categories": {c: {"used": self.counts.get(c, 0), "cap": self.caps.get(c)} for c in categories},
+        }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    """Print formatted group budget to console."""
+    print("\n\033[4m=== GROUP BUDGET ===\033[0m")
+    print(f"Groups used: {report['used']}/{report['limit']} ({report['remaining']} remaining)")
+    if report.get("placed"): print(f"  of which hand-placed in the level: {report['placed']}")
+    print(f"Projected at caps: {report['projected']} ({report['projected_remaining']} remaining)")
+
+    width = max(len(c) for c in report["categories"]) if report["categories"] else 0
+    for category, entry in report["categories"].items():
+        cap = f"/{entry['cap']}" if entry["cap"] is not None else ""
+        print(f"  {category.ljust(width)}  {entry['used']}{cap}")
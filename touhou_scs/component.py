@@ -9,27 +9,64 @@ URGENT: SpellBuilder is not yet implemented! stuff is commented out until then.
 from __future__ import annotations
 from collections import OrderedDict
 from contextlib import contextmanager
+from dataclasses import dataclass
+import copy
 import functools
-from typing import Any, Callable, NamedTuple
-
-from touhou_scs import enums as enum, lib, utils as util
+import itertools
+import sys
+from types import CodeType
+from typing import Any, Callable, NamedTuple, Sequence
+
+from touhou_scs import context, enums as enum, lib, profiler, utils as util
+from touhou_scs.budget import GROUP_LIMIT
+from touhou_scs.index import TriggerIndex
+from touhou_scs.groups import UNKNOWN_START, find_restricted, is_restricted
 from touhou_scs.utils import unknown_g, warn
 from touhou_scs.types import Trigger
 
 
-_RESTRICTED_LOOKUP = { group_id: True for group_id in enum.RESTRICTED_GROUPS }
 
 ppt = enum.Properties # shorthand
 
-class ScaleSettings(NamedTuple):
-    factor: float
-    hold: float
-    duration: float
+class ScaleShape(NamedTuple):
+    """
+    Scale animation normalized to unit time and unit scale.
+
+    Calls that only differ in duration or factor share one keyframe group
+    and are expressed through the Keyframe Anim time/scale mods.
+    """
     type: int
     rate: float
     reverse: bool
-
-scale_keyframes: dict[ScaleSettings, Component] = {}
+    grow: bool
+    scale_ratio: float
+    """Fraction of the unit time spent scaling (the rest is hold)"""
+
+UNIT_SCALE_GROW = 2.0
+UNIT_SCALE_SHRINK = 0.5
+"""Keyframe scales stored in the library; mods scale the change from 1.0"""
+
+@dataclass(frozen=True)
+class PatternCost:
+    """
+    Objects a pattern call would add, computed without building anything.
+
+    Includes shared Multitarget bases the call would have to create first.
+    """
+    triggers: int = 0
+    spawn_triggers: int = 0
+    unknown_groups: int = 0
+    pointers: int = 0
+    bullet_slots: int = 0
+
+    def __add__(self, other: PatternCost) -> PatternCost:
+        return PatternCost(
+            self.triggers + other.triggers,
+            self.spawn_triggers + other.spawn_triggers,
+            self.unknown_groups + other.unknown_groups,
+            self.pointers + other.pointers,
+            self.bullet_slots + other.bullet_slots,
+        )
 
 @functools.lru_cache(maxsize=4096)
 def _validate_params_cached(*,
@@ -59,7 +96,7 @@ def _validate_params_cached(*,
                 raise RuntimeError(f"Trigger requires an active target context. Got: {targets}")
             if targets <= 0:
                 raise ValueError(f"Target Group '{targets}' must be positive (>0).")
-            if targets in _RESTRICTED_LOOKUP:
+            if is_restricted(targets):
                 raise ValueError(f"Target Group '{targets}' is restricted.")
         else:
             for g in targets:
@@ -67,7 +104,7 @@ def _validate_params_cached(*,
                     raise RuntimeError(f"Trigger requires an active target context. Got: {g}")
                 if g <= 0:
                     raise ValueError(f"Target Group '{g}' must be positive (>0).")
-                if g in _RESTRICTED_LOOKUP:
+                if is_restricted(g):
                     raise ValueError(f"Target Group '{g}' is restricted.")
     
     if type is not None and (not (0 <= type <= 18) or not type.is_integer()):
@@ -81,6 +118,8 @@ def _validate_params_cached(*,
     if item_id is not None and not (1 <= item_id <= 9999):
         raise ValueError(f"Item ID must be a positive int in range 1-9999. Got: {item_id}")
 
+profiler.track_cache("validate_params", _validate_params_cached)
+
 def validate_params(*,
     positive: float | int | list[float | int] | None = None,
     non_negative: float | int | list[float | int] | None = None,
@@ -88,10 +127,21 @@ def validate_params(*,
     type: int | None = None,
     rate: float | None = None,
     factor: float | None = None,
-    item_id: int | None = None
+    item_id: int | None = None,
+    owner: Component | None = None
 ) -> None:
-    """Validates common trigger parameters. Converts lists to tuples for caching."""
-    
+    """
+    Validates common trigger parameters. Converts lists to tuples for caching.
+    In deferred mode (set_validation_mode) the arguments are only recorded,
+    owner is the component whose next trigger they belong to.
+    """
+    batch = context.active().validation_batch
+    if batch is not None:
+        # sys._getframe: inspect.currentframe().f_back would nearly double the cost of recording
+        batch.calls.append((owner, len(owner.triggers) if owner is not None else -1,
+            sys._getframe(1).f_code, positive, non_negative, targets, type, rate, factor, item_id)) # type: ignore
+        return
+
     # Convert to tuples for hashability
     positive_tuple: tuple[float | int, ...] | None = None
     if isinstance(positive, list):
@@ -132,10 +182,116 @@ def validate_params(*,
                 if g > c:
                     raise ValueError(f"Target Group '{g}' is out of valid range (1-{c}).")
 
+_ValidationCall = tuple["Component | None", int, CodeType, Any, Any, Any, Any, Any, Any, Any]
+"""(owner, trigger index, calling code, positive, non_negative, targets, type, rate, factor, item_id)"""
+
+_LIST_KINDS = frozenset(("positive", "non_negative", "targets"))
+_EASING_TYPES = frozenset(range(19))
+
+class ValidationBatch:
+    """
+    validate_params arguments recorded in deferred mode, checked in one batch.
+
+    Recording is a single tuple append per call (see validate_params).
+    check() transposes the calls into one column per parameter, so the
+    common all-valid case is a few C-level min()/max()/set passes per
+    parameter. The first failure raises the same error as eager mode,
+    prefixed with the trigger it belongs to.
+    """
+    KINDS = ("positive", "non_negative", "targets", "type", "rate", "factor", "item_id")
+
+    def __init__(self):
+        self.calls: list[_ValidationCall] = []
+
+    def __len__(self) -> int: return len(self.calls)
+
+    def copy(self) -> ValidationBatch:
+        batch = ValidationBatch()
+        batch.calls = list(self.calls)
+        return batch
+
+    def clear(self) -> None:
+        self.calls = []
+
+    @staticmethod
+    def _column(kind: str, column: tuple[Any, ...]) -> Sequence[Any]:
+        """Recorded values of one parameter, lists flattened"""
+        missing = column.count(None)
+        if missing == len(column): return ()
+        values = column if missing == 0 else [v for v in column if v is not None]
+        if kind in _LIST_KINDS and list in set(map(type, values)):
+            values = list(itertools.chain.from_iterable(v if v.__class__ is list else (v,) for v in values))
+        return values
+
+    @staticmethod
+    def _passes(kind: str, values: Sequence[Any], counter: int) -> bool:
+        """Whole column check, cheap enough to run on every export."""
+        if not values: return True
+        lo, hi = min(values), max(values)
+        if kind == "positive": return lo > 0
+        if kind == "non_negative": return lo >= 0
+        if kind == "targets": return lo > 0 and hi <= counter and find_restricted(values) is None
+        if kind == "type": return _EASING_TYPES.issuperset(values)
+        if kind == "rate": return lo > 0.10 and hi <= 20.0
+        if kind == "factor": return lo > 0 and 1 not in values
+        return lo >= 1 and hi <= 9999 # item_id
+
+    @staticmethod
+    def _error(kind: str, value: Any, counter: int) -> Exception | None:
+        """Eager mode's error for a single value, if it fails."""
+        try:
+            if kind == "targets":
+                _validate_params_cached(targets=value)
+                if value > counter:
+                    return ValueError(f"Target Group '{value}' is out of valid range (1-{counter}).")
+            elif kind in ("positive", "non_negative"):
+                _validate_params_cached(**{kind: (value,)})
+            else:
+                _validate_params_cached(**{kind: value})
+        except (ValueError, RuntimeError) as e:
+            return e
+        return None
+
+    def check(self, counter: int) -> None:
+        """
+        Raise the first invalid recorded value.
+        Targets are checked against the final unknown group counter.
+        """
+        if not self.calls: return
+        first: tuple[int, Exception] | None = None
+        for kind, column in zip(self.KINDS, list(zip(*self.calls))[3:]):
+            if self._passes(kind, self._column(kind, column), counter): continue
+
+            # Only a failing column is walked per call, in build order
+            for call, value in enumerate(column):
+                if value is None: continue
+                if first is not None and call >= first[0]: break
+                error = next(filter(None, (self._error(kind, v, counter)
+                    for v in (value if value.__class__ is list else (value,)))), None)
+                if error is not None:
+                    first = (call, error)
+                    break
+
+        if first is None: return
+        call, error = first
+        owner, index, code = self.calls[call][:3]
+        where = f"{owner.name} trigger #{index} ({code.co_name})" if owner is not None else code.co_name
+        raise type(error)(f"{where}: {error}") from error
+
+def set_validation_mode(deferred: bool) -> None:
+    """
+    Deferred mode records validate_params arguments and checks them in one
+    batch at save_all, for trusted release builds. Eager mode (the default)
+    validates every call. Applies to the active BuildContext and its forks.
+    """
+    ctx = context.active()
+    if not deferred: ctx.validation_batch = None
+    elif ctx.validation_batch is None: ctx.validation_batch = ValidationBatch()
+
 def enforce_solid_groups(*groups: int):
     for g in groups:
-        if g > 9999:
-            raise ValueError(f"Group '{g}' is not a solid group (>9999).")
+        if g >= UNKNOWN_START:
+            raise ValueError(f"Group '{g}' is not a solid group (>{GROUP_LIMIT}).")
 
 
 class Component:
@@ -150,12 +306,31 @@ class Component:
         self.triggers: list[Trigger] = []
         self.current_pc: lib.GuiderCircle | None = None
         self.used_pointers: dict[int, int] = OrderedDict()
+        self._trigger_index: TriggerIndex | None = None
 
         self._pointer: Pointer | None = None
         self._instant: InstantPatterns | None = None
         self._timed: TimedPatterns | None = None
 
-        lib.all_components.append(self)
+        context.active().components.append(self)
+
+    @staticmethod
+    def _copy_state(state: dict[str, Any]) -> dict[str, Any]:
+        """Copy of a component's __dict__ that shares nothing mutable with it."""
+        state = dict(state)
+        state["triggers"] = [{k: (v.copy() if v.__class__ is list else v) for k, v in t.items()}
+            for t in state["triggers"]]
+        state["groups"] = list(state["groups"])
+        state["used_pointers"] = OrderedDict(state["used_pointers"])
+        state["_trigger_index"] = None
+        if state["_pointer"] is not None: state["_pointer"] = copy.copy(state["_pointer"])
+        return state
+
+    def _snapshot(self) -> dict[str, Any]: return self._copy_state(self.__dict__)
+    def _state(self) -> dict[str, Any]: return self.__dict__
+
+    def _restore(self, state: dict[str, Any]) -> None:
+        self.__dict__ = state
 
     @property
     def pointer(self):
@@ -172,22 +347,27 @@ class Component:
         if self._timed is None: self._timed = TimedPatterns(self)
         return self._timed
 
+    @property
+    def trigger_index(self) -> TriggerIndex:
+        """Index of this component's triggers, caught up with the ones added since last used"""
+        index = self._trigger_index
+        if index is None or not index.follows(self.triggers):
+            index = self._trigger_index = TriggerIndex()
+        index.sync(self.triggers)
+        return index
+
+    def triggers_edited(self) -> None:
+        """Call after editing triggers in place, so get_triggers sees the new values"""
+        self._trigger_index = None
+
     def get_triggers(self, trigger: dict[str, Any]) -> list[Trigger]:
-        matches: list[Trigger] = []
-        for t in self.triggers:
-            num_matches = 0
-            for key, value in trigger.items():
-                if value is None:
-                    raise ValueError("get_triggers: trigger property value cannot be None")
-                if t.get(key) == value or value is Any:
-                    num_matches += 1
-            if num_matches == len(trigger): matches.append(t)
-        return matches
+        """Triggers with the properties of trigger (a value of Any: property is set)"""
+        return self.trigger_index.find(trigger)
 
     def has_trigger_properties(self, trigger: dict[str, Any]):
         if len(trigger) == 0:
             raise ValueError("has_trigger_properties: empty trigger dict given")
-        return bool(self.get_triggers(trigger))
+        return self.trigger_index.exists(trigger)
 
     def create_trigger(self, obj_id: int, x: float, target: int) -> Trigger:
         return Trigger({
@@ -234,7 +414,7 @@ class Component:
         if target is None and groups is None:
             raise ValueError("set_context: must provide target or groups")
         if target is not None:
-            validate_params(targets=target)
+            validate_params(targets=target, owner=self)
             self.target = target
         if groups is not None:
             self.groups = [self.caller] + self._flatten_groups(groups)
@@ -266,7 +446,7 @@ class Component:
         remap: str | None = None, delay: float = 0, reset_remap: bool = False):
         """Spawn another component or group's triggers"""
         target = target.caller if isinstance(target, Component) else target
-        validate_params(targets=target, non_negative=delay)
+        validate_params(targets=target, non_negative=delay, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.SPAWN, util.time_to_dist(time), target)
 
@@ -285,7 +465,7 @@ class Component:
 
         (collision triggers might be different)
         """
-        validate_params(targets=self.target)
+        validate_params(targets=self.target, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.TOGGLE, util.time_to_dist(time), self.target)
         trigger[ppt.ACTIVATE_GROUP] = activateGroup
@@ -297,7 +477,7 @@ class Component:
         t: float, dist: int,
         type: int = 0, rate: float = 1.0, dynamic: bool = False):
         """Move target a set distance towards another group (direction mode)"""
-        validate_params(targets=[self.target, targetDir], non_negative=t, type=type, rate=rate)
+        validate_params(targets=[self.target, targetDir], non_negative=t, type=type, rate=rate, owner=self)
         enforce_solid_groups(self.target)
 
         trigger = self.create_trigger(enum.ObjectID.MOVE, util.time_to_dist(time), self.target)
@@ -320,7 +500,7 @@ class Component:
     def Pulse(self, time: float,
         hsb: lib.HSB, *, exclusive: bool = False,
         fadeIn: float = 0, t: float = 0, fadeOut: float = 0):
-        validate_params(non_negative=[fadeIn, t, fadeOut], targets=self.target)
+        validate_params(non_negative=[fadeIn, t, fadeOut], targets=self.target, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.PULSE, util.time_to_dist(time), self.target)
 
@@ -339,7 +519,7 @@ class Component:
     def MoveBy(self, time: float, *,
         dx: float, dy: float,
         t: float = 0, type: int = 0, rate: float = 1.0):
-        validate_params(targets=self.target, non_negative=t, type=type, rate=rate)
+        validate_params(targets=self.target, non_negative=t, type=type, rate=rate, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.MOVE, util.time_to_dist(time), self.target)
 
@@ -357,7 +537,7 @@ class Component:
 
     def GotoGroup(self, time: float, location: int, *,
         t: float = 0, type: int = 0, rate: float = 1.0):
-        validate_params(targets=[self.target, location], non_negative=t, type=type, rate=rate)
+        validate_params(targets=[self.target, location], non_negative=t, type=type, rate=rate, owner=self)
         enforce_solid_groups(self.target)
 
         trigger = self.create_trigger(enum.ObjectID.MOVE, util.time_to_dist(time), self.target)
@@ -379,12 +559,12 @@ class Component:
         2 Triggers instantly set target's position relative to origin.
             (bottom left of game window)
         """
-        validate_params(targets=self.target)
+        validate_params(targets=self.target, owner=self)
         if self.requireSpawnOrder is not True:
             raise RuntimeError("SetPosition: Component must require spawn order.")
         
         self.GotoGroup(time, location=enum.GAME_BOTTOM_LEFT, t=0)
-        self.MoveBy(time * enum.TICK*2, dx=x, dy=y)
+        self.MoveBy(time + enum.TICK*2, dx=x, dy=y)
         return self
 
     def Rotate(self, time: float, *,
@@ -393,7 +573,7 @@ class Component:
         t: float = 0, type: int = 0, rate: float = 1.0):
         """Rotate target by angle (degrees, clockwise is positive)"""
         if center is None: center = self.target
-        validate_params(targets=[self.target, center], non_negative=t, type=type, rate=rate)
+        validate_params(targets=[self.target, center], non_negative=t, type=type, rate=rate, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.ROTATE, util.time_to_dist(time), self.target)
 
@@ -410,7 +590,7 @@ class Component:
         targetDir: int, *,
         t: float = 0, type: int = 0, rate: float = 1.0, dynamic: bool = False):
         """Point target towards another group"""
-        validate_params(targets=self.target, non_negative=t, type=type, rate=rate)
+        validate_params(targets=self.target, non_negative=t, type=type, rate=rate, owner=self)
         enforce_solid_groups(targetDir)
 
         trigger = self.create_trigger(enum.ObjectID.ROTATE, util.time_to_dist(time), self.target)
@@ -442,7 +622,7 @@ class Component:
         Reverse mode: Start at full size and scale down (doesnt use hold)
         Optional: t, hold, type, rate, reverse
         """
-        validate_params(targets=self.target, factor=factor, non_negative=[t, hold], type=type, rate=rate)
+        validate_params(targets=self.target, factor=factor, non_negative=[t, hold], type=type, rate=rate, owner=self)
 
         if hold and reverse:
             warn("Scale: 'hold' time is ignored in reverse mode: "
@@ -451,13 +631,19 @@ class Component:
             warn("Scale: 'hold' time is 0 but not in reverse."
                 f" Target will instantly revert to full size after {t}s.")
 
-        scale_settings = ScaleSettings(factor, hold, t, type, rate, reverse)
+        total = t if reverse else t + hold
+        grow = factor > 1
+        unit_scale = UNIT_SCALE_GROW if grow else UNIT_SCALE_SHRINK
+        scale_ratio = round(t / total, 6) if total > 0 else 0.0
+        shape = ScaleShape(type, rate, reverse, grow, scale_ratio)
 
-        if scale_settings in scale_keyframes:
-            keyframe_group = scale_keyframes[scale_settings].caller
+        scale_keyframes = context.active().scale_keyframes
+        if shape in scale_keyframes:
+            keyframe_group = scale_keyframes[shape].caller
         else:
-            name = f"Keyframe Scale<{factor}>,T<{t}>,Reverse<{reverse}>"
-            new_keyframe_group = Component(name, unknown_g(), 6) \
+            name = (f"Keyframe Scale<{'grow' if grow else 'shrink'}>,"
+                f"Ratio<{scale_ratio}>,Reverse<{reverse}>,Ease<{type}:{rate}>")
+            new_keyframe_group = Component(name, unknown_g("keyframes"), 6) \
                 .assert_spawn_order(True)
 
             def keyframe_obj(*, scale: float, duration: float, order: int,
@@ -479,25 +665,29 @@ class Component:
 
             if reverse:
                 keyframe_obj(scale=1, duration=0, order=1)
-                keyframe_obj(scale=factor, duration=t, order=2,
+                keyframe_obj(scale=unit_scale, duration=scale_ratio, order=2,
                     ease_type=type, ease_rate=rate, close_loop=True)
             else:
-                keyframe_obj(scale=1, duration=t, order=1, ease_type=type, ease_rate=rate)
-                keyframe_obj(scale=factor, duration=hold, order=2)
-                keyframe_obj(scale=factor, duration=0, order=3, close_loop=True)
+                hold_ratio = round(1 - scale_ratio, 6) if total > 0 else 0.0
+                keyframe_obj(scale=1, duration=scale_ratio, order=1, ease_type=type, ease_rate=rate)
+                keyframe_obj(scale=unit_scale, duration=hold_ratio, order=2)
+                keyframe_obj(scale=unit_scale, duration=0, order=3, close_loop=True)
 
             keyframe_group = new_keyframe_group.caller
-            scale_keyframes[scale_settings] = new_keyframe_group
+            scale_keyframes[shape] = new_keyframe_group
+
+        # Time mod stretches the unit animation, scale mods stretch the unit scale change
+        scale_mod = (factor - 1) / (unit_scale - 1)
 
         trigger = self.create_trigger(enum.ObjectID.KEYFRAME_ANIM, util.time_to_dist(time), self.target)
 
         trigger[ppt.KEYMAP_ANIM_GID] = keyframe_group
-        trigger[ppt.KEYMAP_ANIM_TIME_MOD] = 1.0
+        trigger[ppt.KEYMAP_ANIM_TIME_MOD] = total if total > 0 else 1.0
         trigger[ppt.KEYMAP_ANIM_POS_X_MOD] = 1.0
         trigger[ppt.KEYMAP_ANIM_POS_Y_MOD] = 1.0
         trigger[ppt.KEYMAP_ANIM_ROT_MOD] = 1.0
-        trigger[ppt.KEYMAP_ANIM_SCALE_X_MOD] = 1.0
-        trigger[ppt.KEYMAP_ANIM_SCALE_Y_MOD] = 1.0
+        trigger[ppt.KEYMAP_ANIM_SCALE_X_MOD] = scale_mod
+        trigger[ppt.KEYMAP_ANIM_SCALE_Y_MOD] = scale_mod
 
         self.triggers.append(trigger)
         return self
@@ -505,7 +695,7 @@ class Component:
     def Follow(self, time: float, targetDir: int, *,
         t: float = 0, x_mod: float = 1.0, y_mod: float = 1.0):
         """Make target follow another group's movement"""
-        validate_params(targets=self.target, non_negative=t)
+        validate_params(targets=self.target, non_negative=t, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.FOLLOW, util.time_to_dist(time), self.target)
 
@@ -519,7 +709,7 @@ class Component:
 
     def Alpha(self, time: float, *, opacity: float, t: float = 0):
         """Change target's opacity from a range of 0-100 over time."""
-        validate_params(targets=self.target, non_negative=t)
+        validate_params(targets=self.target, non_negative=t, owner=self)
         if not (0 <= opacity <= 100):
             raise ValueError("Opacity must be between 0 and 100")
 
@@ -534,7 +724,7 @@ class Component:
     def _stop_trigger_common(self,
         time: float, target: int | Component, option: int, useControlID: bool):
         target = target.caller if isinstance(target, Component) else target
-        validate_params(targets=target)
+        validate_params(targets=target, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.STOP, util.time_to_dist(time), target)
 
@@ -560,7 +750,7 @@ class Component:
 
     def Collision(self, time: float, *,
         blockA: int, blockB: int, activateGroup: bool, onExit: bool = False):
-        validate_params(targets=self.target)
+        validate_params(targets=self.target, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.COLLISION, util.time_to_dist(time), self.target)
 
@@ -573,7 +763,7 @@ class Component:
         return self
 
     def Count(self, time: float, *, item_id: int, count: int, activateGroup: bool):
-        validate_params(targets=self.target, item_id=item_id)
+        validate_params(targets=self.target, item_id=item_id, owner=self)
 
         trigger = self.create_trigger(enum.ObjectID.COUNT, util.time_to_dist(time), self.target)
 
@@ -587,7 +777,7 @@ class Component:
 
     def Pickup(self, time: float, *, item_id: int, count: int, override: bool):
         """Change an Item ID value by 'count' amount, or set to amount w/ 'override'"""
-        validate_params(item_id=item_id)
+        validate_params(item_id=item_id, owner=self)
 
         if count == 0: raise ValueError("Pickup: Count is 0 (no change)")
 
@@ -605,7 +795,7 @@ class Component:
     def PickupModify(self, time: float, *, item_id: int, factor: float,
         multiply: bool = False, divide: bool = False):
         """Multiply/divide an Item ID value by 'factor' amount"""
-        validate_params(item_id=item_id, factor=factor)
+        validate_params(item_id=item_id, factor=factor, owner=self)
 
         if multiply and divide:
             raise ValueError("PickupModify: cannot both multiply and divide")
@@ -635,56 +825,105 @@ class Multitarget:
     """Make triggers effect multiple targets using a remap to components full of spawns."""
 
     _powers: list[int] = [1, 2, 4, 8, 16, 32, 64]
-    _initialized: bool = False
-    _binary_bases: dict[int, Component] = {}
 
     @classmethod
-    def _get_binary_components(cls, num_targets: int, comp: Component) -> list[Component]:
-        """Get the binary components needed to represent num_of_targets."""
-
-        if any(t[ppt.OBJ_ID] == enum.ObjectID.SPAWN for t in comp.triggers):
-            warn(f"Spawn limit: [{comp.name}] Multitarget components cannot have Spawn triggers")
-
-        if not cls._initialized: cls._initialize_binary_bases()
-
+    def _decompose(cls, num_targets: int) -> list[int]:
+        """Binary decomposition of num_targets into base sizes, largest first."""
         max_targets: int = 2 ** len(cls._powers) - 1
         if not (1 <= num_targets <= max_targets):
             raise ValueError(f"num_targets must be between 1 and {max_targets}. Got: {num_targets}")
 
-        comps: list[Component] = []
+        powers: list[int] = []
         remaining = num_targets
         for power in cls._powers[::-1]:
             if remaining >= power:
-                comps.append(cls._binary_bases[power])
+                powers.append(power)
                 remaining -= power
+        return powers
+
+    @classmethod
+    def batch_sizes(cls, num_targets: int) -> list[int]:
+        """Split targets into batches Multitarget can spawn (64 at a time above 127)."""
+        batches: list[int] = []
+        remaining = num_targets
+        while remaining > 0:
+            batch_size = 64 if remaining > 127 else remaining
+            batches.append(batch_size)
+            remaining -= batch_size
+        return batches
 
+    @classmethod
+    def spawn_cost(cls, batches: list[int], spacing: float = 0) -> PatternCost:
+        """Caller spawns for each batch, plus any bases that don't exist yet."""
+        powers = [power for batch in batches for power in cls._decompose(batch)]
+        ctx = context.active()
+        # Static bases are created on first use, even by staggered spawns
+        missing = [] if ctx.binary_bases else list(cls._powers)
+        if spacing != 0:
+            missing += sorted({p for p in powers if (p, spacing) not in ctx.staggered_bases})
+
+        library = sum(missing)
+        return PatternCost(
+            triggers=len(powers) + library,
+            spawn_triggers=len(powers) + library,
+            unknown_groups=len(missing),
+        )
+
+    @classmethod
+    def _get_binary_components(cls,
+        num_targets: int, comp: Component, spacing: float = 0) -> list[Component]:
+        """Get the binary components needed to represent num_of_targets."""
+
+        if any(t[ppt.OBJ_ID] == enum.ObjectID.SPAWN for t in comp.triggers):
+            warn(f"Spawn limit: [{comp.name}] Multitarget components cannot have Spawn triggers")
+
+        ctx = context.active()
+        if not ctx.binary_bases: cls._initialize_binary_bases()
+
+        powers = cls._decompose(num_targets)
+        if spacing == 0:
+            return [ctx.binary_bases[power] for power in powers]
+
+        comps: list[Component] = []
+        for power in powers:
+            key = (power, spacing)
+            if key not in ctx.staggered_bases:
+                ctx.staggered_bases[key] = cls._create_base(power, spacing)
+            comps.append(ctx.staggered_bases[key])
         return comps
 
+    @classmethod
+    def _create_base(cls, power: int, spacing: float = 0) -> Component:
+        """Base of 'power' spawns; with spacing, the i-th spawn is delayed by i * spacing."""
+        name = f"BinaryBase_{power}" if spacing == 0 else f"BinaryBase_{power}_Stagger<{spacing}>"
+        component = Component(name, unknown_g("multitarget"), 4)
+        component.assert_spawn_order(False)
+        # To add support for more parameters, add a new empty group and follow the pattern
+        num_emptys = 4
+        for n, i in enumerate(range(0, power * num_emptys, num_emptys)):
+            rb = (util.Remap()
+                .pair(enum.EMPTY_BULLET, i + 6001)
+                .pair(enum.EMPTY_TARGET_GROUP, i + 6002)
+                .pair(enum.EMPTY1, i + 6003)
+                .pair(enum.EMPTY_EMITTER, i + 6004))
+            component.Spawn(0, enum.EMPTY_MULTITARGET, True, remap=rb.build(), delay=n * spacing)
+        return component
+
     @classmethod
     def _initialize_binary_bases(cls):
-        if cls._initialized: raise RuntimeError("Multitarget binary bases already initialized")
+        binary_bases = context.active().binary_bases
+        if binary_bases: raise RuntimeError("Multitarget binary bases already initialized")
 
         for power in cls._powers:
-            component = Component(f"BinaryBase_{power}", unknown_g(), 4)
-            component.assert_spawn_order(False)
-            # To add support for more parameters, add a new empty group and follow the pattern
-            num_emptys = 4
-            for i in range(0, power * num_emptys, num_emptys):
-                rb = (util.Remap()
-                    .pair(enum.EMPTY_BULLET, i + 6001)
-                    .pair(enum.EMPTY_TARGET_GROUP, i + 6002)
-                    .pair(enum.EMPTY1, i + 6003)
-                    .pair(enum.EMPTY_EMITTER, i + 6004))
-                component.Spawn(0, enum.EMPTY_MULTITARGET, True, remap=rb.build())
-            cls._binary_bases[power] = component
+            binary_bases[power] = cls._create_base(power)
 
         max_targets: int = 2 ** len(cls._powers) - 1
         print(f"Multitarget: Initialized {len(cls._powers)} binary components, {max_targets} targets supported)")
-        cls._initialized = True
 
     @classmethod
     def spawn_with_remap(cls, caller: Component, time: float, num_targets: int, comp: Component,
-        remap_callback: Callable[[dict[int, int], util.Remap], None]
+        remap_callback: Callable[[dict[int, int], util.Remap], None], *,
+        spacing: float = 0, delay: float = 0
     ) -> None:
         """
         Spawn binary components with custom remap logic via callback.
@@ -693,8 +932,13 @@ class Multitarget:
         comp: Component that will be called multiple times
         remap_callback: Function that receives (remap_pairs, remap_builder)
          and should call remap_builder.pair() to map sources to actual resources.
+        spacing: Stagger each target's spawn by 'spacing' seconds (in callback order)
+        delay: Spawn delay of the first target
         """
-        for mt_comp in cls._get_binary_components(num_targets, comp):
+        offset = 0
+        profile = context.active().profile
+        profile.count("multitarget_calls")
+        for mt_comp in cls._get_binary_components(num_targets, comp, spacing):
             remap = util.Remap()
             for spawn_trigger in mt_comp.triggers:
                 remap_string = spawn_trigger.get(ppt.REMAP_STRING, None)
@@ -705,7 +949,9 @@ class Multitarget:
 
             remap.pair(enum.EMPTY_MULTITARGET, comp.caller)
             caller.Spawn(time, mt_comp.caller, False,
-                remap=remap.build(), reset_remap=False)
+                remap=remap.build(), reset_remap=False, delay=delay + offset * spacing)
+            profile.count("multitarget_spawns")
+            offset += len(mt_comp.triggers)
 
 
 # ===========================================================
@@ -715,40 +961,39 @@ class Multitarget:
 # ===========================================================
 
 class _PointerMgr:
-    """Used for Pointer internal management."""
-    setup_pointercircle: Component | None = None
-    align_north: Component | None = None
-    follow_comps: dict[int, Component] = {}
-    freed_pointers: list[int] = []
+    """Used for Pointer internal management. State lives on the active BuildContext."""
 
     @classmethod
     def next_pointer(cls) -> int:
-        if cls.freed_pointers: return cls.freed_pointers.pop()
+        freed_pointers = context.active().freed_pointers
+        if freed_pointers: return freed_pointers.pop()
         else: return lib.pointer.next()[0]
 
     @classmethod
     def get_setup_comp(cls) -> Component:
-        if cls.setup_pointercircle is None:
-            cls.setup_pointercircle = Component("Setup PointerCircle", unknown_g(), 7)
-            with cls.setup_pointercircle.temp_context(target=enum.EMPTY_BULLET):
-                (cls.setup_pointercircle
+        ctx = context.active()
+        if ctx.setup_pointercircle is None:
+            ctx.setup_pointercircle = Component("Setup PointerCircle", unknown_g("pointers"), 7)
+            with ctx.setup_pointercircle.temp_context(target=enum.EMPTY_BULLET):
+                (ctx.setup_pointercircle
                     .assert_spawn_order(False)
                     .GotoGroup(0, enum.EMPTY_TARGET_GROUP))
 
-        return cls.setup_pointercircle
+        return ctx.setup_pointercircle
 
     @classmethod
     def get_follow_comp(cls, duration: int):
-        if duration in cls.follow_comps:
-            return cls.follow_comps[duration]
+        follow_comps = context.active().follow_comps
+        if duration in follow_comps:
+            return follow_comps[duration]
 
-        follow_comp = Component(f"[{duration}s] Follow PointerCircle", unknown_g(), 5)
+        follow_comp = Component(f"[{duration}s] Follow PointerCircle", unknown_g("pointers"), 5)
         with follow_comp.temp_context(target=enum.EMPTY_BULLET):
             (follow_comp
                 .assert_spawn_order(False)
                 .Follow(0, enum.EMPTY_TARGET_GROUP, t=duration))
 
-        cls.follow_comps[duration] = follow_comp
+        follow_comps[duration] = follow_comp
         return follow_comp
 
 
@@ -771,7 +1016,7 @@ class Pointer:
 
         Duration: PointerCircle groups follow the center for 'duration' seconds.
         """
-        validate_params(non_negative=duration, targets=location)
+        validate_params(non_negative=duration, targets=location, owner=self._component)
 
         if self._component.requireSpawnOrder is False:
             raise RuntimeError("Patterns.SetPointerCircle: Must be trigged in spawn order")
@@ -794,7 +1039,7 @@ class Pointer:
         if self._component.current_pc is None:
             raise RuntimeError("Patterns.CleanPointerCircle: No active GuiderCircle to clean")
 
-        _PointerMgr.freed_pointers.extend([
+        context.active().freed_pointers.extend([
             p for p in self._component.current_pc.groups.values()
             if p not in self._component.used_pointers.values()
         ])
@@ -807,7 +1052,6 @@ class Pointer:
             if align_north:
                 self._component.PointToGroup(time - enum.TICK*2, enum.NORTH_GROUP)
 
-        remaining = len(self._component.used_pointers)
         angle_iter = iter(self._component.used_pointers)
 
         def remap_goto(remap_pairs: dict[int, int], remap: util.Remap):
@@ -821,12 +1065,9 @@ class Pointer:
                 else:
                     remap.pair(target, enum.EMPTY_MULTITARGET)
 
-        while remaining > 0:
-            batch_size = 64 if remaining > 127 else remaining
-
+        for batch_size in Multitarget.batch_sizes(len(self._component.used_pointers)):
             Multitarget.spawn_with_remap(self._component, time,
                 batch_size, _PointerMgr.get_setup_comp(), remap_goto)
-            remaining -= batch_size
 
         pointer_center = self._component.current_pc.center
         with self._component.temp_context(target=pointer_center):
@@ -840,7 +1081,6 @@ class Pointer:
 
         follow_comp = _PointerMgr.get_follow_comp(duration)
 
-        remaining = len(self._component.used_pointers)
         angle_iter = iter(self._component.used_pointers)
 
         def remap_follow(remap_pairs: dict[int, int], remap: util.Remap):
@@ -853,12 +1093,9 @@ class Pointer:
                 else:
                     remap.pair(target, enum.EMPTY_MULTITARGET)
 
-        while remaining > 0:
-            batch_size = 64 if remaining > 127 else remaining
-
+        for batch_size in Multitarget.batch_sizes(len(self._component.used_pointers)):
             Multitarget.spawn_with_remap(self._component, time,
                 batch_size, follow_comp, remap_follow)
-            remaining -= batch_size
 
         self._params = tuple()
         self._component.current_pc = None
@@ -866,7 +1103,31 @@ class Pointer:
         return self._component
 
 
+class _InstantCost:
+    """Cost model of InstantPatterns; takes the count parameters of each pattern."""
+
+    @staticmethod
+    def Arc(*, numBullets: int) -> PatternCost:
+        """Pointers stay reserved until the circle's CleanPointerCircle frees the rest."""
+        return Multitarget.spawn_cost([numBullets]) + PatternCost(
+            pointers=numBullets, bullet_slots=numBullets)
+
+    @staticmethod
+    def Radial(*, numBullets: int | None = None, spacing: int | None = None) -> PatternCost:
+        numBullets, _ = InstantPatterns.resolve_radial(numBullets, spacing)
+        return _InstantCost.Arc(numBullets=numBullets)
+
+    @staticmethod
+    def Line(*, numBullets: int) -> PatternCost:
+        """One MoveTowards per bullet on top of the spawns."""
+        return Multitarget.spawn_cost([numBullets]) + PatternCost(
+            triggers=numBullets, bullet_slots=numBullets)
+
+
 class InstantPatterns:
+    cost = _InstantCost
+    """Dry run: InstantPatterns.cost.Radial(numBullets=24) -> PatternCost"""
+
     def __init__(self, component: Component):
         self._component = component
 
@@ -956,12 +1217,21 @@ class InstantPatterns:
         Component must use EMPTY_BULLET and EMPTY_TARGET_GROUP.  \n
         Optional: spacing or numBullets, centerAt
         """
-        IR = "Instant Radial:"
-        util.enforce_component_targets(IR,comp,
+        util.enforce_component_targets("Instant Radial:",comp,
             requires={enum.EMPTY_BULLET, enum.EMPTY_TARGET_GROUP },
             excludes={enum.EMPTY_MULTITARGET}
         )
+        numBullets, spacing = self.resolve_radial(numBullets, spacing)
 
+        self.Arc(time, comp, bullet,
+            numBullets=numBullets, spacing=spacing, centerAt=centerAt, _radialBypass=True)
+
+        return self._component
+
+    @staticmethod
+    def resolve_radial(numBullets: int | None, spacing: int | None) -> tuple[int, int]:
+        """Returns (numBullets, spacing) of a full circle from either one."""
+        IR = "Instant Radial:"
         if spacing and numBullets:
             if numBullets != int(360 / spacing):
                 raise ValueError(f"{IR} spacing and numBullets don't match!\n\n"
@@ -977,10 +1247,7 @@ class InstantPatterns:
         elif 360 % numBullets != 0:
             raise ValueError(f"{IR} numBullets must be a factor of 360 for perfect circles. Received: {numBullets}")
 
-        self.Arc(time, comp, bullet,
-            numBullets=numBullets, spacing=spacing, centerAt=centerAt, _radialBypass=True)
-
-        return self._component
+        return numBullets, spacing
 
     def Line(self, time: float, comp: Component, emitter: int,
         targetDir: int, bullet: lib.BulletPool, *,
@@ -992,7 +1259,7 @@ class InstantPatterns:
         Comp requires EMPTY_BULLET and EMPTY_MULTITARGET.
         Optional: type, rate
         """
-        validate_params(positive=[fastestTime, slowestTime], type=type, rate=rate)
+        validate_params(positive=[fastestTime, slowestTime], type=type, rate=rate, owner=self._component)
         IL = "Instant.Line:"
 
         util.enforce_component_targets(IL, comp,
@@ -1038,7 +1305,29 @@ class InstantPatterns:
     # More pattern methods will be added here
 
 
+class _TimedCost:
+    """Cost model of TimedPatterns; takes the count parameters of each pattern."""
+
+    @staticmethod
+    def RadialWave(*, waves: int,
+        numBullets: int | None = None, spacing: int | None = None) -> PatternCost:
+        """Every wave aims with the same pointers, so they are counted once."""
+        if waves < 2:
+            raise ValueError(f"RadialWave: waves must be at least 2. Got: {waves}")
+        numBullets, _ = InstantPatterns.resolve_radial(numBullets, spacing)
+        return Multitarget.spawn_cost([numBullets] * waves) + PatternCost(
+            pointers=numBullets, bullet_slots=numBullets * waves)
+
+    @staticmethod
+    def Line(*, numBullets: int, spacing: float) -> PatternCost:
+        return Multitarget.spawn_cost(Multitarget.batch_sizes(numBullets), spacing) + PatternCost(
+            bullet_slots=numBullets)
+
+
 class TimedPatterns:
+    cost = _TimedCost
+    """Dry run: TimedPatterns.cost.RadialWave(waves=12, numBullets=24) -> PatternCost"""
+
     def __init__(self, component: Component):
         self._component = component
 
@@ -1066,18 +1355,20 @@ class TimedPatterns:
         return self._component
 
     def Line(self, time: float, comp: Component, targetDir: int, bullet: lib.BulletPool, *,
-        numBullets: int, spacing: float, t: float, dist: int, type: int = 0, rate: float = 1.0):
+        numBullets: int, spacing: float):
         """
         Line pattern - bullets in a line over time with equal gaps between them
 
-        Optional: type, rate
+        Comp requires EMPTY_BULLET and EMPTY_TARGET_GROUP (its MoveTowards aims at targetDir). \n
+        Spawns go through staggered Multitarget bases, so the caller only
+        needs one spawn per binary base instead of 2 triggers per bullet.
         """
         TL = "Timed.Line:"
+        validate_params(targets=targetDir, owner=self._component)
 
         util.enforce_component_targets(TL, comp,
-            requires={ enum.EMPTY_BULLET },
-            excludes={ enum.EMPTY_TARGET_GROUP, enum.EMPTY_MULTITARGET,
-                enum.EMPTY1, enum.EMPTY2, enum.EMPTY_EMITTER }
+            requires={ enum.EMPTY_BULLET, enum.EMPTY_TARGET_GROUP },
+            excludes={ enum.EMPTY_MULTITARGET, enum.EMPTY1, enum.EMPTY2, enum.EMPTY_EMITTER }
         )
 
         if bullet.has_orientation and not comp.has_trigger_properties({ppt.ROTATE_AIM_MODE:Any}):
@@ -1087,17 +1378,23 @@ class TimedPatterns:
             raise ValueError(f"{TL} numBullets must be at least 2. Got: {numBullets}")
         if spacing < 0:
             raise ValueError(f"{TL} spacing must be non-negative. Got: {spacing}")
-        if t < 0:
-            raise ValueError(f"{TL} t must be non-negative. Got: {t}")
-
-        for i in range(0, numBullets):
-            b, _ = bullet.next()
-            self._component.Spawn(
-                time + (i * spacing), comp.caller, True, remap=f"{enum.EMPTY_BULLET}:{b}")
-            with self._component.temp_context(target=b):
-                self._component.MoveTowards(
-                    time + (i * spacing), targetDir, t=t, dist=dist, type=type, rate=rate
-                )
+
+        def remap_line(remap_pairs: dict[int, int], remap: util.Remap):
+            for source, target in remap_pairs.items():
+                if source == enum.EMPTY_BULLET:
+                    bullet_group, _ = bullet.next()
+                    remap.pair(target, bullet_group)
+                elif source == enum.EMPTY_TARGET_GROUP:
+                    remap.pair(target, targetDir)
+                else:
+                    remap.pair(target, enum.EMPTY_MULTITARGET)
+
+        fired = 0
+        for batch_size in Multitarget.batch_sizes(numBullets):
+            Multitarget.spawn_with_remap(self._component, time, batch_size, comp, remap_line,
+                spacing=spacing, delay=fired * spacing)
+            fired += batch_size
+
         return self._component
 
     # More pattern methods will be added here
@@ -0,0 +1,164 @@
+"""
+Touhou SCS - Build Context Module
+
+Everything a build accumulates lives on a BuildContext: registered
+components and spells, the unknown group counter, shared library
+components (Multitarget bases, pointer circle helpers, keyframe groups,
+deferred import-time components), pool cursors, one-time setup flags, the group budget and the build profile.
+
+The library always works on the active context. lib.all_components,
+lib.all_spells and utils.unknown_g are views of it, and the default context
+holds whatever was built at import time. Library components declared at
+import time are only built when first used (see lib.DeferredComponent).
+fork() starts an isolated build from a copy of a context:
+
+    with context.default_context.fork() as ctx:
+        ...  # nothing built here leaks into the default context
+
+Components and spells created in one context can still be referenced from
+another (e.g. lib.Stage.stage1), so their state is swapped in and out as
+contexts are activated. Only fork() copies it: activating a context hands
+each object's live state to the context being left and adopts the state
+saved for the new one, copying just the objects the new one doesn't know.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Iterable, Self
+
+from touhou_scs.budget import GroupBudget
+from touhou_scs.groups import GroupRegistry
+from touhou_scs.profiler import BuildProfile
+
+if TYPE_CHECKING:
+    from touhou_scs.component import Component, ScaleShape, ValidationBatch
+    from touhou_scs.lib import DeferredComponent
+    from touhou_scs.paths import PathShape
+    from touhou_scs.types import ComponentProtocol, SpellProtocol
+
+
+class UnknownGroupGenerator:
+    def __init__(self, budget: GroupBudget | None = None) -> None:
+        self.counter = 10000
+        self.budget = budget
+        """Charged for every group, if set"""
+
+    def __call__(self, category: str = "components") -> int:
+        if self.budget is not None: self.budget.charge(category)
+        result = self.counter
+        self.counter += 1
+        return result
+
+    @property
+    def used_groups(self) -> list[int]:
+        return list(range(10000, self.counter))
+
+
+class BuildContext:
+    def __init__(self, name: str = "build"):
+        self.name = name
+        self.components: list[ComponentProtocol] = []
+        self.spells: list[SpellProtocol] = []
+        self.budget = GroupBudget()
+        """Groups used per category, see touhou_scs.budget"""
+        self.unknown_g = UnknownGroupGenerator(self.budget)
+        self.groups = GroupRegistry()
+        """Group classes and pool ranges, see touhou_scs.groups"""
+
+        self.binary_bases: dict[int, Component] = {}
+        self.staggered_bases: dict[tuple[int, float], Component] = {}
+        self.setup_pointercircle: Component | None = None
+        self.follow_comps: dict[int, Component] = {}
+        self.freed_pointers: list[int] = []
+        self.scale_keyframes: dict[ScaleShape, Component] = {}
+        self.path_keyframes: dict[PathShape, Component] = {}
+        self.deferred: dict[DeferredComponent, Component] = {}
+        """Library components materialized in this context"""
+
+        self.pool_cursors: dict[Any, int] = {}
+        """Pool -> last allocated group (unset until the pool is first used)"""
+        self.called: set[Any] = set()
+        """CallTracked functions already called in this context"""
+        self.validation_batch: ValidationBatch | None = None
+        """Recorded validate_params arguments in deferred validation mode"""
+        self.profile = BuildProfile()
+        """Phase timings and counters, started when the context is created"""
+
+        self._saved: dict[Any, Any] = {}
+        """Component/spell -> its state in this context, while inactive (owned by this context)"""
+
+    def __repr__(self) -> str:
+        return f"BuildContext({self.name!r}, {len(self.components)} components)"
+
+    def _shared_objects(self) -> Iterable[Any]:
+        """Every component and spell this context keeps state for."""
+        objs: dict[int, Any] = {}
+        for obj in (*self.components, *self.spells, *self.binary_bases.values(),
+            *self.staggered_bases.values(), *self.follow_comps.values(),
+            *self.scale_keyframes.values(), *self.path_keyframes.values(),
+            *self.deferred.values(), *self._saved):
+            objs[id(obj)] = obj
+        if self.setup_pointercircle is not None:
+            objs[id(self.setup_pointercircle)] = self.setup_pointercircle
+        return objs.values()
+
+    def fork(self, name: str | None = None) -> BuildContext:
+        """New inactive context starting from a copy of this one."""
+        child = BuildContext(name or f"{self.name}/fork")
+        child.components = list(self.components)
+        child.spells = list(self.spells)
+        child.budget = self.budget.copy()
+        child.unknown_g = UnknownGroupGenerator(child.budget)
+        child.unknown_g.counter = self.unknown_g.counter
+        child.groups = self.groups.copy()
+
+        child.binary_bases = dict(self.binary_bases)
+        child.staggered_bases = dict(self.staggered_bases)
+        child.setup_pointercircle = self.setup_pointercircle
+        child.follow_comps = dict(self.follow_comps)
+        child.freed_pointers = list(self.freed_pointers)
+        child.scale_keyframes = dict(self.scale_keyframes)
+        child.path_keyframes = dict(self.path_keyframes)
+        child.deferred = dict(self.deferred)
+
+        child.pool_cursors = dict(self.pool_cursors)
+        if self.validation_batch is not None:
+            child.validation_batch = self.validation_batch.copy()
+        child.called = set(self.called)
+
+        live = self is _active
+        for obj in self._shared_objects():
+            if live or obj not in self._saved:
+                child._saved[obj] = obj._snapshot()
+            else:
+                child._saved[obj] = obj._copy_state(self._saved[obj])
+        return child
+
+    def activate(self) -> Self:
+        """Make this the active context (see also 'with context:')."""
+        global _active
+        if self is _active: return self
+
+        old = _active
+        states = self._saved
+        old._saved = {obj: obj._state() if obj in states else obj._snapshot() for obj in old._shared_objects()}
+        for obj, state in states.items():
+            obj._restore(state)
+        self._saved = {}
+        _active = self
+        return self
+
+    def __enter__(self) -> Self:
+        _stack.append(_active)
+        return self.activate()
+
+    def __exit__(self, *exc: object) -> None:
+        _stack.pop().activate()
+
+
+default_context = BuildContext("default")
+_active = default_context
+_stack: list[BuildContext] = []
+
+def active() -> BuildContext:
+    """Context the library is currently building into."""
+    return _active
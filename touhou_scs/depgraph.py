@@ -0,0 +1,179 @@
+"""
+Touhou SCS - Dependency Graph Module
+
+Transitive "who can affect group G" / "what can G affect" over a build or
+an export, for tracing a misbehaving bullet back through every chain of
+triggers that can reach it.
+
+An edge g -> h means a trigger in group g can activate or change h:
+- h is in one of its target fields (Spawn, Toggle, Count, Collision,
+  Move, Follow, Keyframe Anim, ...)
+- h is a remap value of its Spawn: the spawned triggers act on h instead
+  of the group they name (inherited down the spawn chain, which the g -> h
+  edge itself covers)
+- items: a Pickup in g changes item i, and a Count trigger on item i
+  activates its target; the item is a node of its own (-i)
+
+The graph is condensed to its strongly connected components, numbered in
+topological order (edges only go to higher numbers), and each component
+stores what it reaches as an int bitset over component numbers. Reachable
+components all have a higher number, so that bitset is stored shifted down
+by the component's own number; reaching components all have a lower one.
+affects(a, b) is one shift and mask, listing a closure is linear in its size.
+
+    graph = depgraph.DependencyGraph.from_components(lib.all_components)
+    graph.affecting(5123)   # groups whose triggers can end up affecting 5123
+    graph.affected(5123)    # groups 5123 can end up affecting
+"""
+
+from __future__ import annotations
+from typing import Iterable
+
+from touhou_scs import enums as enum
+from touhou_scs.types import ComponentProtocol, Trigger
+
+ppt = enum.Properties # shorthand
+
+_COUNTS = (enum.ObjectID.COUNT, enum.ObjectID.INSTANT_COUNT)
+
+def _edges(triggers: Iterable[Trigger]) -> dict[int, set[int]]:
+    edges: dict[int, set[int]] = {}
+    counters: list[tuple[int, int]] = []
+    """(item, target) of Count triggers"""
+    for trigger in triggers:
+        affected: set[int] = set()
+        for key in enum.TARGET_FIELDS:
+            g = trigger.get(key)
+            if g.__class__ is int: affected.add(g) # type: ignore
+        remap = trigger.get(ppt.REMAP_STRING)
+        if remap: affected.update(int(g) for g in remap.split(".")[1::2])
+
+        obj_id = trigger[ppt.OBJ_ID]
+        if obj_id == enum.ObjectID.PICKUP: affected.add(-trigger[ppt.ITEM_ID]) # type: ignore
+        elif obj_id in _COUNTS and ppt.TARGET in trigger:
+            counters.append((-trigger[ppt.ITEM_ID], trigger[ppt.TARGET])) # type: ignore
+
+        for g in trigger[ppt.GROUPS]: edges.setdefault(g, set()).update(affected)
+    for item, target in counters: edges.setdefault(item, set()).add(target)
+    return edges
+
+
+def _strongly_connected(successors: list[list[int]]) -> list[list[int]]:
+    """Tarjan's algorithm without recursion. Components come out sinks first."""
+    n = len(successors)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: list[int] = []
+    components: list[list[int]] = []
+    counter = 0
+    for root in range(n):
+        if index[root] != -1: continue
+        work = [(root, 0)]
+        while work:
+            v, i = work.pop()
+            if i == 0:
+                index[v] = low[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            if i < len(successors[v]):
+                work.append((v, i + 1))
+                w = successors[v][i]
+                if index[w] == -1: work.append((w, 0))
+                elif on_stack[w]: low[v] = min(low[v], index[w])
+                continue
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                component: list[int] = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v: break
+                components.append(component)
+    return components
+
+def _bits(bitset: int, shift: int = 0) -> list[int]:
+    """Set bit numbers of bitset, plus shift"""
+    if bitset.bit_count() > 64:
+        digits = bin(bitset)[:1:-1]
+        return [i + shift for i, digit in enumerate(digits) if digit == "1"]
+    bits: list[int] = []
+    while bitset:
+        low = bitset & -bitset
+        bits.append(low.bit_length() - 1 + shift)
+        bitset ^= low
+    return bits
+
+
+class DependencyGraph:
+    def __init__(self, edges: dict[int, set[int]]):
+        """edges: node -> nodes it can affect (groups, and -item for items)"""
+        nodes = sorted(edges.keys() | {h for targets in edges.values() for h in targets})
+        ids = {node: i for i, node in enumerate(nodes)}
+        successors = [[ids[h] for h in edges.get(node, ())] for node in nodes]
+
+        found = _strongly_connected(successors)
+        count = len(found)
+        self.components: list[list[int]] = [sorted(nodes[v] for v in c) for c in reversed(found)]
+        """Nodes of each strongly connected component, in topological order"""
+        self._component: dict[int, int] = {}
+        for c, members in enumerate(self.components):
+            for node in members: self._component[node] = c
+
+        children: list[set[int]] = [set() for _ in range(count)]
+        cyclic = [len(members) > 1 for members in self.components]
+        for node, targets in edges.items():
+            c = self._component[node]
+            for h in targets:
+                d = self._component[h]
+                if d == c: cyclic[c] = True
+                else: children[c].add(d)
+
+        self._down: list[int] = [0] * count
+        """Components reachable from c (c itself only if cyclic), shifted right by c"""
+        for c in range(count - 1, -1, -1):
+            reach = int(cyclic[c])
+            for d in children[c]: reach |= (1 | self._down[d]) << (d - c)
+            self._down[c] = reach
+        self._up: list[int] = [0] * count
+        """Components reaching c (c itself only if cyclic)"""
+        for c in range(count):
+            if cyclic[c]: self._up[c] |= 1 << c
+            for d in children[c]: self._up[d] |= self._up[c] | 1 << c
+
+    @classmethod
+    def from_triggers(cls, triggers: Iterable[Trigger]) -> DependencyGraph:
+        return cls(_edges(triggers))
+
+    @classmethod
+    def from_components(cls, components: Iterable[ComponentProtocol]) -> DependencyGraph:
+        return cls(_edges(t for comp in components for t in comp.triggers))
+
+    def _groups(self, components: list[int]) -> list[int]:
+        return sorted(g for c in components for g in self.components[c] if g > 0)
+
+    def affects(self, a: int, b: int) -> bool:
+        """Triggers of group a can end up affecting group b"""
+        ca, cb = self._component.get(a), self._component.get(b)
+        if ca is None or cb is None or cb < ca: return False
+        return bool(self._down[ca] >> (cb - ca) & 1)
+
+    def affected(self, group: int) -> list[int]:
+        """Groups the triggers of group can end up affecting"""
+        c = self._component.get(group)
+        return [] if c is None else self._groups(_bits(self._down[c], c))
+
+    def affecting(self, group: int) -> list[int]:
+        """Groups whose triggers can end up affecting group"""
+        c = self._component.get(group)
+        return [] if c is None else self._groups(_bits(self._up[c]))
+
+    def cycle(self, group: int) -> list[int]:
+        """Groups that affect group and are affected by it (its strongly connected component)"""
+        c = self._component.get(group)
+        if c is None or not self._down[c] & 1: return []
+        return self._groups([c])
@@ -191,6 +191,48 @@ class Properties(str):
 TARGET_FIELDS: Final[tuple[str, ...]] = ("51", "71", "401", "395", "76")
 """WARNING: Update the list in main.js !! (if editing)"""
 
+# ========== Level String Defaults ==========
+# Used by the exporter to leave out fields GD would assume anyway.
+# These are what GD reads for a MISSING field, which is not always the
+# editor default: a fresh Keyframe Anim shows every mod as 1.0, but a
+# missing mod is read as 0 (the KeyframeAnim mistake). Only list a field
+# here after checking the level string of a trigger without it.
+_EASED: Final[dict[str, object]] = {Properties.EASING: 0, Properties.DYNAMIC: False}
+
+GD_DEFAULTS: Final[dict[int, dict[str, object]]] = {
+    ObjectID.TOGGLE: {Properties.ACTIVATE_GROUP: False},
+    ObjectID.MOVE: {**_EASED, Properties.MOVE_X: 0, Properties.MOVE_Y: 0},
+    ObjectID.ROTATE: {**_EASED, Properties.ROTATE_ANGLE: 0},
+    ObjectID.PULSE: {
+        Properties.PULSE_FADE_IN: 0,
+        Properties.PULSE_HOLD: 0,
+        Properties.PULSE_FADE_OUT: 0,
+        Properties.PULSE_EXCLUSIVE: False,
+    },
+    ObjectID.STOP: {Properties.STOP_OPTION: 0, Properties.STOP_USE_CONTROL_ID: False},
+    ObjectID.COLLISION: {Properties.ACTIVATE_GROUP: False, Properties.TRIGGER_ON_EXIT: False},
+    ObjectID.COUNT: {Properties.ACTIVATE_GROUP: False},
+    ObjectID.PICKUP: {Properties.PICKUP_OVERRIDE: False, Properties.PICKUP_MULTIPLY_DIVIDE: 0},
+    ObjectID.KEYFRAME_OBJ: {
+        Properties.EASING: 0,
+        Properties.KEYFRAME_OBJ_MODE: 0,
+        Properties.CLOSE_LOOP: False,
+    },
+}
+"""ObjectID -> {field: value GD assumes when the field is missing}"""
+
+REQUIRED_FIELDS: Final[dict[int, frozenset[str]]] = {
+    ObjectID.KEYFRAME_ANIM: frozenset((
+        Properties.KEYMAP_ANIM_TIME_MOD,
+        Properties.KEYMAP_ANIM_POS_X_MOD,
+        Properties.KEYMAP_ANIM_POS_Y_MOD,
+        Properties.KEYMAP_ANIM_ROT_MOD,
+        Properties.KEYMAP_ANIM_SCALE_X_MOD,
+        Properties.KEYMAP_ANIM_SCALE_Y_MOD,
+    )),
+}
+"""ObjectID -> fields that are always exported, whatever their value (wins over GD_DEFAULTS)"""
+
 # ============================================================================
 # GAME CONSTANTS
 # ============================================================================
@@ -213,6 +255,9 @@ GAME_BOTTOM_LEFT: Final[int] = 130
 NORTH_GROUP: Final[int] = 26
 """North of the map. Used for resetting rotation"""
 
+LEVEL_CALLED_GROUPS: Final[tuple[int, ...]] = (17, 18, 27, 32, 34, 35, 36)
+"""Called by hand-placed level objects: collision wrappers (17), level functions, main (36)"""
+
 # Empty Groups for Remapping   (e.g. 21 => group)
 # Holder object for empty groups is directly placed on the physical player, layer 0
 EMPTY1: Final[int] = 21
@@ -0,0 +1,182 @@
+"""
+Touhou SCS - Level File Module
+
+Reader for the level itself (touhou scs.gmd), which holds what the exports
+can't see: hand-placed bullets, guider circles, emitters, hitboxes and the
+empty-group holder object, next to the triggers of earlier exports.
+
+The file is read chunk by chunk, and its level string (k4, base64 of
+gzip) decompressed and split into objects as it comes in. Only the
+object ID, position, groups and KEY_PROPERTIES of each object are kept,
+in columns:
+
+    level = gmd.LevelObjects.read("touhou scs.gmd")
+    level.in_group(5101)                # positions of the objects in group 5101
+    level.ids[i], level.x[i], level.y[i], level.groups(i), level.value(i, ppt.TARGET)
+    level.placed(lib.DEFAULT_TRIGGER_AREA)  # objects outside the trigger area
+
+save_all(level="touhou scs.gmd") warns about plain groups (not a pool or
+fixed group, which are meant to be placed objects or called by the level,
+like enums.LEVEL_CALLED_GROUPS on the holder object) that generated triggers
+are in and hand-placed objects are in too, and counts the plain groups of
+hand-placed objects against the group budget.
+"""
+
+from __future__ import annotations
+import base64
+import zlib
+from array import array
+from typing import BinaryIO, Iterator
+
+from touhou_scs import enums as enum
+from touhou_scs.groups import FIXED, POOLS, GroupRegistry, is_solid
+from touhou_scs.types import Trigger, TriggerArea
+
+ppt = enum.Properties # shorthand
+
+KEY_PROPERTIES: tuple[str, ...] = (*enum.TARGET_FIELDS, ppt.ITEM_ID, ppt.BLOCK_B, ppt.REMAP_STRING)
+"""Properties kept besides object ID, position and groups (ITEM_ID is also Collision's block A)"""
+CHUNK_SIZE = 1 << 16
+
+_LEVEL_STRING = b"<k>k4</k><s>"
+_COMPRESSED = (b"H4sI", b"eJ") # gzip, zlib
+_KEYS = {key.encode(): key for key in KEY_PROPERTIES}
+
+def _encoded(file: BinaryIO, path: str, chunk_size: int) -> Iterator[bytes]:
+    """Level string (k4) of the open .gmd file as saved, in pieces"""
+    data = b""
+    while (start := data.find(_LEVEL_STRING)) < 0:
+        chunk = file.read(chunk_size)
+        if not chunk: raise ValueError(f"{path}: no level string (k4) found")
+        data = data[-len(_LEVEL_STRING):] + chunk
+    data = data[start + len(_LEVEL_STRING):]
+    while (end := data.find(b"<")) < 0:
+        if data: yield data
+        data = file.read(chunk_size)
+        if not data: return
+    yield data[:end]
+
+def _level_chunks(path: str, chunk_size: int) -> Iterator[bytes]:
+    """Decompressed level string of the .gmd file at path, in pieces"""
+    with open(path, "rb") as file:
+        pieces = _encoded(file, path, chunk_size)
+        inflate = None
+        rest = b""
+        for piece in pieces:
+            rest += piece
+            if inflate is None:
+                if len(rest) < 4: continue
+                if not rest.startswith(_COMPRESSED): # saved uncompressed
+                    yield rest
+                    yield from pieces
+                    return
+                inflate = zlib.decompressobj(wbits=47) # gzip or zlib header
+            whole = len(rest) - len(rest) % 4 # whole base64 quanta
+            yield inflate.decompress(base64.urlsafe_b64decode(rest[:whole]))
+            rest = rest[whole:]
+        if inflate is None:
+            yield rest
+            return
+        yield inflate.decompress(base64.urlsafe_b64decode(rest + b"=" * (-len(rest) % 4)))
+        yield inflate.flush()
+
+def _records(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """';' separated records across chunk boundaries"""
+    rest = b""
+    for chunk in chunks:
+        records = (rest + chunk).split(b";")
+        rest = records.pop()
+        yield from records
+    if rest: yield rest
+
+
+class LevelObjects:
+    """Objects of a level as columns, position i being the i-th object of the level string."""
+
+    def __init__(self) -> None:
+        self.ids = array("I")
+        self.x = array("d")
+        self.y = array("d")
+        self._group_starts = array("I", [0])
+        self._group_values = array("H")
+        self.properties: dict[str, dict[int, str]] = {key: {} for key in KEY_PROPERTIES}
+        """Property -> object position -> value as written in the level"""
+        self._by_group: dict[int, list[int]] | None = None
+
+    @classmethod
+    def read(cls, path: str, chunk_size: int = CHUNK_SIZE) -> LevelObjects:
+        """Objects of the .gmd level file at path"""
+        objects = cls()
+        records = _records(_level_chunks(path, chunk_size))
+        next(records, None) # level settings
+        for record in records:
+            if record: objects._add(record)
+        return objects
+
+    def _add(self, record: bytes) -> None:
+        fields = record.split(b",")
+        obj = dict(zip(fields[::2], fields[1::2]))
+        i = len(self.ids)
+        self.ids.append(int(obj[b"1"]))
+        self.x.append(float(obj.get(b"2", 0)))
+        self.y.append(float(obj.get(b"3", 0)))
+        groups = obj.get(b"57")
+        if groups: self._group_values.extend(int(g) for g in groups.split(b".") if g)
+        self._group_starts.append(len(self._group_values))
+        for key in _KEYS.keys() & obj.keys():
+            self.properties[_KEYS[key]][i] = obj[key].decode()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def groups(self, i: int) -> list[int]:
+        return self._group_values[self._group_starts[i]:self._group_starts[i + 1]].tolist()
+
+    def value(self, i: int, key: str) -> str | None:
+        """Object i's property key (one of KEY_PROPERTIES), if set"""
+        return self.properties[key].get(i)
+
+    def in_group(self, group: int) -> list[int]:
+        """Positions of the objects in group"""
+        if self._by_group is None:
+            self._by_group = {}
+            starts, values = self._group_starts, self._group_values
+            for i in range(len(self.ids)):
+                for g in values[starts[i]:starts[i + 1]]: self._by_group.setdefault(g, []).append(i)
+        return self._by_group.get(group, [])
+
+    def used_groups(self, positions: list[int] | None = None) -> set[int]:
+        """Groups of the objects at positions (every object by default)"""
+        if positions is None: return set(self._group_values)
+        return {g for i in positions for g in self.groups(i)}
+
+    def placed(self, trigger_area: TriggerArea) -> list[int]:
+        """Positions of the objects outside trigger_area, where save_all never puts triggers"""
+        return [i for i in range(len(self.ids)) if not _inside(self, i, trigger_area)]
+
+
+def _inside(level: LevelObjects, i: int, trigger_area: TriggerArea) -> bool:
+    return (trigger_area["min_x"] <= level.x[i] <= trigger_area["max_x"]
+        and trigger_area["min_y"] <= level.y[i] <= trigger_area["max_y"])
+
+def _plain(groups: set[int], registry: GroupRegistry) -> set[int]:
+    """Solid groups that are neither pool nor fixed groups"""
+    return {g for g in groups if is_solid(g) and not registry.classify(g) & (FIXED | POOLS)}
+
+def placed_groups(level: LevelObjects, trigger_area: TriggerArea, registry: GroupRegistry) -> set[int]:
+    """Plain groups of the hand-placed objects, which the group budget doesn't know about"""
+    return _plain(level.used_groups(level.placed(trigger_area)), registry)
+
+def conflicts(triggers: list[Trigger], level: LevelObjects, trigger_area: TriggerArea,
+    registry: GroupRegistry) -> dict[int, list[int]]:
+    """
+    Plain groups generated triggers are in that hand-placed objects are in too
+    (spawning or moving one also hits the other) -> object IDs of those objects.
+    Unknown groups are left out, main.js gives them free groups.
+    """
+    generated = _plain({g for trigger in triggers for g in trigger[ppt.GROUPS]}, registry)
+    found: dict[int, list[int]] = {}
+    for g in sorted(generated):
+        ids = [level.ids[i] for i in level.in_group(g) if not _inside(level, i, trigger_area)]
+        if ids: found[g] = ids
+    return found
@@ -0,0 +1,182 @@
+"""
+Touhou SCS - Group Registry Module
+
+Classifies group IDs in one place. Every group (solid 1-9999 and the
+unknown_g placeholders after them) has a byte of GroupClass flags, so
+classifying a group is one index and checking a whole column of targets
+is a C-level map + translate over the flag table.
+
+Restricted, remap placeholder and special groups are fixed (enums.py).
+Pools register their range when created; overlapping pools, or a pool
+over a fixed group, raise at startup instead of colliding in game:
+
+    context.active().groups.classify(group)          # GroupClass flags
+    context.active().groups.find(GroupClass.RESTRICTED, targets)
+
+Collision block IDs live in their own namespace: the fixed hitboxes
+(misc.py) and the groups of colliding pools, which are remapped onto
+EMPTY_BULLET collision blocks.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import IntFlag
+from typing import Sequence
+
+from touhou_scs import enums as enum
+from touhou_scs.budget import GROUP_LIMIT
+
+UNKNOWN_START = 10000
+"""First unknown_g placeholder (main.js maps these to free groups)"""
+
+class GroupClass(IntFlag):
+    RESTRICTED = 1
+    PLACEHOLDER = 2
+    """Empty groups that are remapped on spawn (enums.EMPTY_*)"""
+    SPECIAL = 4
+    """Fixed level objects (player, screen and game corners) and level-called groups"""
+    BULLET = 8
+    POINTER = 16
+    ENEMY = 32
+    PLAYER_SHOT = 64
+    UNKNOWN = 128
+
+FIXED = GroupClass.RESTRICTED | GroupClass.PLACEHOLDER | GroupClass.SPECIAL
+POOLS = GroupClass.BULLET | GroupClass.POINTER | GroupClass.ENEMY | GroupClass.PLAYER_SHOT
+
+POOL_CLASSES: dict[str, GroupClass] = {
+    "bullets": GroupClass.BULLET,
+    "pointers": GroupClass.POINTER,
+    "enemies": GroupClass.ENEMY,
+    "player_shots": GroupClass.PLAYER_SHOT,
+}
+"""Group budget category -> pool class (other categories are bullets)"""
+
+_SIZE = UNKNOWN_START + GROUP_LIMIT
+"""The group budget keeps the unknown counter below this"""
+
+_tables: dict[int, bytes] = {}
+
+def _table(mask: int) -> bytes:
+    """bytes.translate table keeping only the flags in mask"""
+    table = _tables.get(mask)
+    if table is None: table = _tables[mask] = bytes(i & mask for i in range(256))
+    return table
+
+def _fixed_flags() -> bytearray:
+    flags = bytearray(_SIZE)
+    for g in enum.RESTRICTED_GROUPS: flags[g] |= GroupClass.RESTRICTED
+    for g in (enum.EMPTY1, enum.EMPTY2, enum.EMPTY_EMITTER, enum.EMPTY_BULLET,
+        enum.EMPTY_TARGET_GROUP, enum.EMPTY_MULTITARGET):
+        flags[g] |= GroupClass.PLACEHOLDER
+    for g in (enum.PLR, enum.SCREEN_CENTER, enum.GAME_CENTER, enum.GAME_BOTTOM_LEFT, enum.NORTH_GROUP,
+        *enum.LEVEL_CALLED_GROUPS):
+        flags[g] |= GroupClass.SPECIAL
+    flags[UNKNOWN_START:] = bytes([GroupClass.UNKNOWN]) * (_SIZE - UNKNOWN_START)
+    return flags
+
+_FIXED_FLAGS = _fixed_flags()
+
+
+def _find(flags: bytearray, mask: int, groups: Sequence[int]) -> int | None:
+    if not groups: return None
+    if min(groups) <= 0 or max(groups) >= _SIZE:
+        return next((g for g in groups if not 0 < g < _SIZE or flags[g] & mask), None)
+    hits = bytes(map(flags.__getitem__, groups)).translate(_table(mask))
+    rest = hits.lstrip(b"\0")
+    return groups[len(hits) - len(rest)] if rest else None
+
+def is_solid(group: int) -> bool:
+    """Real group (1-9999), as opposed to an unknown_g placeholder"""
+    return 0 < group <= GROUP_LIMIT
+
+def is_restricted(group: int) -> bool:
+    return 0 <= group < _SIZE and bool(_FIXED_FLAGS[group] & GroupClass.RESTRICTED)
+
+def find_restricted(groups: Sequence[int]) -> int | None:
+    """First restricted group in groups (all positive), if any"""
+    return _find(_FIXED_FLAGS, GroupClass.RESTRICTED, groups)
+
+
+@dataclass(frozen=True)
+class PoolRange:
+    name: str
+    kind: GroupClass
+    first: int
+    last: int
+
+
+class GroupRegistry:
+    def __init__(self):
+        self.flags = bytearray(_FIXED_FLAGS)
+        self.pools: list[PoolRange] = []
+        self.collisions: list[PoolRange] = []
+        self._collision_ids = bytearray(GROUP_LIMIT + 1)
+
+    def copy(self) -> GroupRegistry:
+        registry = GroupRegistry.__new__(GroupRegistry)
+        registry.flags = bytearray(self.flags)
+        registry.pools = list(self.pools)
+        registry.collisions = list(self.collisions)
+        registry._collision_ids = bytearray(self._collision_ids)
+        return registry
+
+    def classify(self, group: int) -> GroupClass:
+        """Flags of a group, GroupClass(0) for plain solid groups and invalid IDs"""
+        if not 0 < group < _SIZE:
+            return GroupClass.UNKNOWN if group >= _SIZE else GroupClass(0)
+        return GroupClass(self.flags[group])
+
+    def find(self, mask: GroupClass, groups: Sequence[int]) -> int | None:
+        """
+        First group in groups with any of the classes in mask.
+        IDs that can't be a group (<= 0 or past the unknown range) count as matching.
+        """
+        return _find(self.flags, mask, groups)
+
+    def members(self, mask: GroupClass) -> list[int]:
+        """Every group with any of the classes in mask"""
+        hits = self.flags.translate(_table(mask))
+        return [g for g, flag in enumerate(hits) if flag]
+
+    @staticmethod
+    def _first_set(flags: bytearray, first: int, last: int, mask: int) -> int | None:
+        hits = flags[first:last + 1].translate(_table(mask))
+        rest = hits.lstrip(b"\0")
+        return last + 1 - len(rest) if rest else None
+
+    def _owner(self, ranges: list[PoolRange], group: int) -> str:
+        """Whatever reserved group (or collision ID) 'group' first"""
+        for r in ranges:
+            if r.first <= group <= r.last: return f"'{r.name}' ({r.first}-{r.last})"
+        return f"{GroupClass(self.flags[group]).name} groups".lower()
+
+    def register_collision_ids(self, name: str, first: int, last: int) -> None:
+        """Reserve collision block IDs first-last (inclusive), raising ValueError on overlap."""
+        if not 0 < first <= last <= GROUP_LIMIT:
+            raise ValueError(f"'{name}': collision IDs {first}-{last} must be within 1-{GROUP_LIMIT}")
+        clash = self._first_set(self._collision_ids, first, last, 0xFF)
+        if clash is not None:
+            raise ValueError(f"'{name}' collision IDs ({first}-{last}) overlap collision ID {clash} of "
+                f"{self._owner(self.collisions, clash)}")
+        self._collision_ids[first:last + 1] = b"\1" * (last - first + 1)
+        self.collisions.append(PoolRange(name, GroupClass(0), first, last))
+
+    def register_pool(self, name: str, kind: GroupClass, first: int, last: int, *,
+        collides: bool = False) -> None:
+        """
+        Reserve groups first-last (inclusive) for a pool, raising ValueError on
+        overlap with fixed groups or another pool. Colliding pools use their
+        groups as collision block IDs (remapped from EMPTY_BULLET), which are
+        reserved too.
+        """
+        if not 0 < first <= last <= GROUP_LIMIT:
+            raise ValueError(f"Pool '{name}': group range {first}-{last} must be within 1-{GROUP_LIMIT}")
+        clash = self._first_set(self.flags, first, last, FIXED | POOLS)
+        if clash is not None:
+            raise ValueError(f"Pool '{name}' ({first}-{last}) overlaps group {clash} of "
+                f"{self._owner(self.pools, clash)}")
+        if collides: self.register_collision_ids(f"Pool '{name}'", first, last)
+
+        self.flags[first:last + 1] = bytes([kind]) * (last - first + 1) # free, checked above
+        self.pools.append(PoolRange(name, kind, first, last))
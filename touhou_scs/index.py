@@ -0,0 +1,222 @@
+"""
+Touhou SCS - Trigger Index Module
+
+Inverted index of triggers (property -> value -> triggers), so a query
+is an intersection of the matching trigger sets instead of a scan over
+every trigger and query key.
+
+Each Component keeps one for get_triggers/has_trigger_properties. It
+indexes the triggers appended since the last query and starts over when
+the trigger list or any of its triggers was replaced. A whole build can
+be indexed for the group questions only the debug report could answer so far:
+
+    idx = index.TriggerIndex.build(lib.all_components)
+    idx.in_group(5123)      # triggers in group 5123
+    idx.targeting(5123)     # triggers with 5123 as a target/center/keyframe group
+    idx.referencing(5123)   # any of the above, or 5123 in a remap string
+    idx.owner(trigger)      # component the trigger belongs to
+
+Values are indexed as they are when added. Matches are checked against
+the triggers as they are now, so an edit never returns a trigger that no
+longer matches, but a trigger edited into matching is only found once the
+index is dropped: comp.triggers_edited() after editing a component's
+triggers in place. save_all edits triggers in place (spreading,
+optimization passes) and drops the component indexes afterwards.
+
+save_all(debug_index=True) writes the group/target/remap/object lookups of
+the exported triggers next to them (triggers.index.json), so
+debug/debug.js and its report look triggers up instead of scanning them.
+"""
+
+from __future__ import annotations
+import operator
+import os
+from typing import Any, Iterable
+
+import orjson
+
+from touhou_scs import enums as enum
+from touhou_scs.types import ComponentProtocol, Trigger
+
+ppt = enum.Properties # shorthand
+
+def _hashable(value: Any) -> Any:
+    return tuple(value) if value.__class__ is list else value
+
+def _add(postings: dict[Any, list[int]], key: Any, i: int) -> None:
+    entries = postings.get(key)
+    if entries is None: postings[key] = [i]
+    elif entries[-1] != i: entries.append(i)
+
+def _matches(trigger: Trigger, query: dict[str, Any]) -> bool:
+    for key, value in query.items():
+        if value is Any:
+            if key not in trigger: return False
+        elif trigger.get(key) != value: return False
+    return True
+
+
+class TriggerIndex:
+    def __init__(self) -> None:
+        self.triggers: list[Trigger] = []
+        """Indexed triggers, in the order they were added"""
+        self._source: list[Trigger] | None = None
+        self._owners: dict[int, ComponentProtocol] = {}
+        self._values: dict[str, dict[Any, list[int]]] = {}
+        self._present: dict[str, list[int]] = {}
+        self._members: dict[int, list[int]] = {}
+        self._targets: dict[int, list[int]] = {}
+        self._remaps: dict[int, list[int]] = {}
+
+    @classmethod
+    def build(cls, components: Iterable[ComponentProtocol]) -> TriggerIndex:
+        """Index of every trigger of components"""
+        index = cls()
+        for comp in components: index.extend(comp.triggers, owner=comp)
+        return index
+
+    def follows(self, triggers: list[Trigger]) -> bool:
+        """triggers is the list this index was built from, and only had triggers appended since"""
+        if self._source is not triggers or len(triggers) < len(self.triggers): return False
+        return all(map(operator.is_, triggers, self.triggers))
+
+    def sync(self, triggers: list[Trigger]) -> None:
+        """Index the triggers appended to triggers (a list this index follows)"""
+        self._source = triggers
+        if len(triggers) > len(self.triggers): self.extend(triggers[len(self.triggers):])
+
+    def extend(self, triggers: Iterable[Trigger], *, owner: ComponentProtocol | None = None) -> None:
+        for trigger in triggers: self.add(trigger, owner=owner)
+
+    def add(self, trigger: Trigger, *, owner: ComponentProtocol | None = None) -> None:
+        i = len(self.triggers)
+        self.triggers.append(trigger)
+        if owner is not None: self._owners[id(trigger)] = owner
+        for key, value in trigger.items():
+            self._present.setdefault(key, []).append(i)
+            _add(self._values.setdefault(key, {}), _hashable(value), i)
+
+        for g in trigger.get(ppt.GROUPS, ()): _add(self._members, g, i)
+        for key in enum.TARGET_FIELDS:
+            g = trigger.get(key)
+            if g.__class__ is int: _add(self._targets, g, i)
+        remap = trigger.get(ppt.REMAP_STRING)
+        if remap:
+            for part in remap.split("."): _add(self._remaps, int(part), i)
+
+    # ===========================================================
+    # QUERIES
+    # ===========================================================
+
+    def _triggers(self, positions: Iterable[int]) -> list[Trigger]:
+        return [self.triggers[i] for i in positions]
+
+    def find(self, query: dict[str, Any]) -> list[Trigger]:
+        """
+        Triggers with every property of query set to its value (in the
+        order they were added). A value of typing.Any only needs the property set.
+        """
+        postings: list[list[int]] = []
+        for key, value in query.items():
+            if value is None:
+                raise ValueError(f"Trigger query: value of property {key} cannot be None (Any matches every value)")
+            if value is Any: postings.append(self._present.get(key, []))
+            else: postings.append(self._values.get(key, {}).get(_hashable(value), []))
+        if not postings: return list(self.triggers)
+
+        postings.sort(key=len)
+        if len(postings) == 1: positions: Iterable[int] = postings[0]
+        else:
+            matches = set(postings[0])
+            for entries in postings[1:]:
+                matches.intersection_update(entries)
+                if not matches: return []
+            positions = sorted(matches)
+        return [t for t in self._triggers(positions) if _matches(t, query)] # edited since indexed
+
+    def exists(self, query: dict[str, Any]) -> bool:
+        return bool(self.find(query))
+
+    def in_group(self, group: int) -> list[Trigger]:
+        return self._triggers(self._members.get(group, []))
+
+    def targeting(self, group: int) -> list[Trigger]:
+        """Triggers with group in a target field (enums.TARGET_FIELDS)"""
+        return self._triggers(self._targets.get(group, []))
+
+    def remapping(self, group: int) -> list[Trigger]:
+        """Triggers with group on either side of a remap string pair"""
+        return self._triggers(self._remaps.get(group, []))
+
+    def referencing(self, group: int) -> list[Trigger]:
+        """Triggers in, targeting, or remapping from/to group"""
+        positions = {*self._members.get(group, []), *self._targets.get(group, []), *self._remaps.get(group, [])}
+        return self._triggers(sorted(positions))
+
+    def groups(self) -> list[int]:
+        """Every group a trigger is in, targets or remaps"""
+        return sorted(self._members.keys() | self._targets.keys() | self._remaps.keys())
+
+    def owner(self, trigger: Trigger) -> ComponentProtocol | None:
+        """Component trigger was indexed from (TriggerIndex.build)"""
+        return self._owners.get(id(trigger))
+
+    def lookups(self) -> dict[str, dict[Any, list[int]]]:
+        """
+        Sorted positions of the triggers per group they are in ("groups"),
+        target ("targets"), remap ("remaps") and object ID ("objects").
+        The index's own tables, don't modify them.
+        """
+        return {"groups": self._members, "targets": self._targets, "remaps": self._remaps,
+            "objects": self._values.get(ppt.OBJ_ID, {})}
+
+
+def invalidate(components: Iterable[ComponentProtocol]) -> None:
+    """Drop the component indexes, after editing their triggers in place"""
+    for comp in components:
+        if getattr(comp, "_trigger_index", None) is not None: comp._trigger_index = None # type: ignore
+
+
+# ===========================================================
+# DEBUG INDEX SIDECAR
+# ===========================================================
+
+SIDECAR_VERSION = 1
+
+def _runs(positions: list[int]) -> list[int]:
+    """Sorted positions as flat [start, length, ...] runs (a component's triggers are consecutive)"""
+    runs: list[int] = []
+    for i in positions:
+        if runs and runs[-2] + runs[-1] == i: runs[-1] += 1
+        else: runs += (i, 1)
+    return runs
+
+def _lookup(postings: dict[Any, list[int]]) -> dict[Any, list[int]]:
+    return {key: _runs(positions) for key, positions in sorted(postings.items())}
+
+def debug_index(triggers: list[Trigger], components: list[list[Any]]) -> dict[str, Any]:
+    """
+    Lookups over exported triggers (positions in the export), as run lists.
+    components: the export's [name, caller, trigger count, spawn order] rows.
+    """
+    index = TriggerIndex()
+    index.extend(triggers)
+    first = 0
+    ranges: list[list[Any]] = []
+    for name, caller, count, _ in components:
+        ranges.append([name, caller, first, count])
+        first += count
+    return {
+        "version": SIDECAR_VERSION,
+        "triggers": len(triggers),
+        "components": ranges,
+        **{name: _lookup(postings) for name, postings in index.lookups().items()},
+    }
+
+def sidecar_path(filename: str) -> str:
+    return f"{os.path.splitext(filename)[0]}.index.json"
+
+def write_sidecar(triggers: list[Trigger], components: list[list[Any]], filename: str) -> None:
+    """Write the debug index next to the export 'filename'."""
+    with open(sidecar_path(filename), "wb") as file:
+        file.write(orjson.dumps(debug_index(triggers, components), option=orjson.OPT_NON_STR_KEYS))
@@ -2,24 +2,31 @@
 Touhou SCS - Library Module
 
 Core infrastructure: Spell system, GuiderCircles, BulletPools, and export functionality.
-Module-level storage for components and spells for automatic registration.
+Components and spells register on the active BuildContext; all_components
+and all_spells are views of it.
 """
 
 import orjson
 import random
 import time
 import colorsys
-from typing import Any, Self
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, Self
 
 from touhou_scs import enums as enum
 from touhou_scs import utils as util
+from touhou_scs import context
 from touhou_scs.component import Component
+from touhou_scs.groups import FIXED, POOL_CLASSES, GroupClass, find_restricted
 from touhou_scs.utils import unknown_g, warn
-from touhou_scs.types import ComponentProtocol, SpellProtocol, Trigger, TriggerArea
-from dataclasses import dataclass
+from touhou_scs.types import ComponentProtocol, Trigger, TriggerArea
+from dataclasses import dataclass, field, fields
 
-all_spells: list[SpellProtocol] = []
-all_components: list[ComponentProtocol] = []
+def __getattr__(name: str) -> Any:
+    if name == "all_components": return context.active().components
+    if name == "all_spells": return context.active().spells
+    if name in _deferred_names: return _deferred_names[name].get()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 _start_time = time.time()
 
@@ -35,12 +42,20 @@ class Spell:
         self.spell_name: str = spell_name
         self.caller_group: int = caller_group
         self.components: list[ComponentProtocol] = []
-        all_spells.append(self)
+        context.active().spells.append(self)
 
     def add_component(self, component: ComponentProtocol) -> Self:
         self.components.append(component)
         return self
 
+    @staticmethod
+    def _copy_state(state: list[ComponentProtocol]) -> list[ComponentProtocol]:
+        return list(state)
+
+    def _snapshot(self) -> list[ComponentProtocol]: return list(self.components)
+    def _state(self) -> list[ComponentProtocol]: return self.components
+    def _restore(self, state: list[ComponentProtocol]) -> None: self.components = state
+
 
 # ============================================================================
 # USEFUL/NEEDED UTILS
@@ -120,12 +135,27 @@ class GuiderLine:
 class BulletPool:
     """Bullet pool with group range and cycler for sequential allocation."""
 
-    def __init__(self, min_group: int, max_group: int, has_orientation: bool):
-        """Inclusive of both min_group and max_group."""
+    def __init__(self, min_group: int, max_group: int, has_orientation: bool, category: str = "bullets"):
+        """
+        Inclusive of both min_group and max_group. The range is charged to 'category'
+        of the group budget and registered as a pool (see touhou_scs.groups).
+        """
         self.min_group = min_group
         self.max_group = max_group
         self.has_orientation = has_orientation
-        self.current = max_group
+        ctx = context.active()
+        ctx.budget.charge(category, max_group - min_group + 1)
+        kind = POOL_CLASSES.get(category, GroupClass.BULLET)
+        ctx.groups.register_pool(category, kind, min_group, max_group, collides=kind != GroupClass.POINTER)
+
+    @property
+    def current(self) -> int:
+        """Last allocated group in the active build context"""
+        return context.active().pool_cursors.get(self, self.max_group)
+
+    @current.setter
+    def current(self, value: int) -> None:
+        context.active().pool_cursors[self] = value
 
     def next(self) -> tuple[int, int]:
         """Returns: (bullet_group, collision_group)"""
@@ -143,41 +173,98 @@ bullet2 = BulletPool(1501, 2200, False)
 bullet3 = BulletPool(2901, 3600, False)
 bullet4 = BulletPool(4301, 4700, False)
 
-pointer = BulletPool(7000, 7400, False)
+pointer = BulletPool(7000, 7400, False, "pointers")
 
-reimuA_level1 = BulletPool(110, 128, True)
+reimuA_level1 = BulletPool(110, 128, True, "player_shots")
 
-def get_all_components() -> list[ComponentProtocol]: return all_components
+def get_all_components() -> list[ComponentProtocol]: return context.active().components
+
+class DeferredComponent:
+    """
+    Library component declared at import time but only built when first used.
+
+    The caller group, plus 'reserve' groups for whatever the build allocates
+    (e.g. keyframe groups), is reserved on declaration, so group numbering
+    doesn't depend on which library components a build uses. Each BuildContext
+    builds its own copy; save_all builds whatever is still missing, so the
+    export always has every declared component. As a class attribute it reads
+    as the component itself (Stage.stage1), modules expose theirs through
+    __getattr__.
+    """
+    def __init__(self, name: str, editorLayer: int, build: Callable[[Component], Any], *,
+        caller: int | None = None, reserve: int = 0):
+        self.name = name
+        self.caller = unknown_g("library") if caller is None else caller
+        self.editorLayer = editorLayer
+        self._build = build
+        first = unknown_g.counter
+        for _ in range(reserve): unknown_g("library")
+        self._reserved = range(first, first + reserve)
+        _deferred_components.append(self)
+
+    def __repr__(self) -> str:
+        return f"DeferredComponent({self.name!r}, {self.caller})"
+
+    def get(self) -> Component:
+        """The component in the active context, built on first use."""
+        ctx = context.active()
+        comp = ctx.deferred.get(self)
+        if comp is not None: return comp
+
+        comp = Component(self.name, self.caller, self.editorLayer)
+        ctx.deferred[self] = comp
+        generator = ctx.unknown_g
+        ctx.unknown_g = context.UnknownGroupGenerator()
+        ctx.unknown_g.counter = self._reserved.start
+        try:
+            self._build(comp)
+            used = ctx.unknown_g.counter - self._reserved.start
+        finally:
+            ctx.unknown_g = generator
+        if used > len(self._reserved):
+            raise RuntimeError(f"DeferredComponent {self.name}: build allocated {used} unknown groups "
+                f"but only {len(self._reserved)} are reserved")
+        return comp
+
+    def __get__(self, instance: object, owner: type) -> Component: return self.get()
+
+_deferred_components: list[DeferredComponent] = []
+
+def materialize_deferred() -> None:
+    """Build every declared library component missing from the active context."""
+    for deferred in _deferred_components: deferred.get()
 
 class Stage:
-    stage1 = Component("Stage1", unknown_g(), 9).assert_spawn_order(True)
-    # stage2 = Component("Stage2", unknown_g(), 9).assert_spawn_order(True)
-    # stage3 = Component("Stage3", unknown_g(), 9).assert_spawn_order(True)
-    # stage4 = Component("Stage4", unknown_g(), 9).assert_spawn_order(True)
-    # stage5 = Component("Stage5", unknown_g(), 9).assert_spawn_order(True)
-    # stage6 = Component("Stage6", unknown_g(), 9).assert_spawn_order(True)
+    stage1 = DeferredComponent("Stage1", 9, lambda c: c.assert_spawn_order(True))
+    # stage2 = DeferredComponent("Stage2", 9, lambda c: c.assert_spawn_order(True))
+    # stage3 = DeferredComponent("Stage3", 9, lambda c: c.assert_spawn_order(True))
+    # stage4 = DeferredComponent("Stage4", 9, lambda c: c.assert_spawn_order(True))
+    # stage5 = DeferredComponent("Stage5", 9, lambda c: c.assert_spawn_order(True))
+    # stage6 = DeferredComponent("Stage6", 9, lambda c: c.assert_spawn_order(True))
 
 
 class EnemyPool:
-    def __init__(self, min_group: int, max_group: int, despawn_setup: Component):
+    def __init__(self, min_group: int, max_group: int, despawn_setup: Component | DeferredComponent):
         self._min_group = min_group
         self._max_group = max_group
         self._despawn_setup = despawn_setup
-
-        self._current = min_group
-        self.__firstcall = True
-        self._off_switches = {g: unknown_g() for g in range(min_group, max_group + 1)}
+        self._off_switches = {g: unknown_g("enemies") for g in range(min_group, max_group + 1)}
+        ctx = context.active()
+        ctx.budget.charge("enemies", max_group - min_group + 1)
+        ctx.groups.register_pool("enemies", GroupClass.ENEMY, min_group, max_group, collides=True)
 
     def next(self) -> int:
         """Cycle to next enemy group in pool"""
-        if self.__firstcall:
-            self.__firstcall = False
-            return self._current
+        cursors = context.active().pool_cursors
+        if self not in cursors:
+            cursors[self] = self._min_group
+            return self._min_group
 
-        self._current += 1
-        if self._current > self._max_group:
-            self._current = self._min_group
-        return self._current
+        current = cursors[self] + 1
+        if current > self._max_group:
+            current = self._min_group
+        cursors[self] = current
+        return current
 
     def spawn_enemy(self, stage: Component, time: float, attack: Component, hp: int, enemy_group: int):
         """Spawn an enemy attack with HP/death handling."""
@@ -203,14 +290,14 @@ class EnemyPool:
 
 #
 # less annoying way instead of making 'despawner' have spawn order
-toggler = (Component("Toggler", unknown_g(), 7)
+_toggler = DeferredComponent("Toggler", 7, lambda c: (c
     .assert_spawn_order(False)
     .set_context(target=enum.EMPTY_TARGET_GROUP)
         .Toggle(0, False)
     .clear_context()
-)
+))
 
-despawner = (Component("Despawner", unknown_g(), 7)
+_despawner = DeferredComponent("Despawner", 7, reserve=1, build=lambda c: (c
     .assert_spawn_order(False)
     .set_context(target=enum.EMPTY_TARGET_GROUP)
         .Alpha(0, t=1, opacity=0)
@@ -218,17 +305,19 @@ despawner = (Component("Despawner", unknown_g(), 7)
         .Scale(0, factor=0.1, t=0.5, hold=3)
     .clear_context()
     .Stop(0, target=enum.EMPTY1)
-    .Spawn(0, toggler, False, delay=1)
-)
+    .Spawn(0, _toggler.caller, False, delay=1)
+))
 
-despawnSetup = (Component("Despawn Setup", unknown_g(), 7)
+_despawnSetup = DeferredComponent("Despawn Setup", 7, lambda c: (c
     .assert_spawn_order(False)
-    .set_context(target=despawner.caller)
+    .set_context(target=_despawner.caller)
         .Count(0, item_id=enum.EMPTY_TARGET_GROUP, count=0, activateGroup=True)
     .clear_context()
-)
+))
 
-enemy1 = EnemyPool(200, 211, despawnSetup)
+_deferred_names = {"toggler": _toggler, "despawner": _despawner, "despawnSetup": _despawnSetup}
+
+enemy1 = EnemyPool(200, 211, _despawnSetup)
 
 # ============================================================================
 # EXPORT FUNCTIONS
@@ -410,7 +499,10 @@ def _enforce_spawn_limit(components: list[ComponentProtocol]) -> None:
                     f"Group {c_group} contains spawn trigger(s), causing spawn limit bug."
                 )
 
-def _spread_triggers(triggers: list[Trigger], comp: ComponentProtocol, trigger_area: TriggerArea, len_triggers: int):
+def _spread_triggers(triggers: list[Trigger], comp: ComponentProtocol, trigger_area: TriggerArea, len_triggers: int,
+    rng: random.Random | None = None):
+    """rng: Seeded generator for reproducible positions (module random by default)"""
+    rand = rng if rng is not None else random
     if len_triggers < 1:
         raise ValueError(f"No triggers in component {comp.name}")
 
@@ -421,8 +513,8 @@ def _spread_triggers(triggers: list[Trigger], comp: ComponentProtocol, trigger_a
     ppt = enum.Properties
 
     if len_triggers == 1:
-        triggers[0][ppt.X] = random.randint(min_x, max_x)
-        triggers[0][ppt.Y] = random.randint(min_y, max_y)
+        triggers[0][ppt.X] = rand.randint(min_x, max_x)
+        triggers[0][ppt.Y] = rand.randint(min_y, max_y)
         return
 
     # Single pass to gather all info we need
@@ -440,18 +532,19 @@ def _spread_triggers(triggers: list[Trigger], comp: ComponentProtocol, trigger_a
             break
 
     if all_keyframe_objs:
-        rand_x = random.randint(min_x, max_x)
-        rand_y = random.randint(min_y, max_y)
+        # Keep relative offsets, keyframe paths are defined by them
+        shift_x = rand.randint(min_x, max_x) - triggers[0][ppt.X]
+        shift_y = rand.randint(min_y, max_y) - triggers[0].get(ppt.Y, 0)
         for keyframe_obj in triggers:
-            keyframe_obj[ppt.X] = rand_x
-            keyframe_obj[ppt.Y] = rand_y
+            keyframe_obj[ppt.X] += shift_x
+            keyframe_obj[ppt.Y] = keyframe_obj.get(ppt.Y, 0) + shift_y
         return
 
     if all_same_x and not comp.requireSpawnOrder:
         # No spawn order because all_same_x suggests spawn order isnt intended
         for trigger in triggers:
-            trigger[ppt.X] = random.randint(min_x // 2, max_x // 2) * 2
-            trigger[ppt.Y] = random.randint(min_y, max_y)
+            trigger[ppt.X] = rand.randint(min_x // 2, max_x // 2) * 2
+            trigger[ppt.Y] = rand.randint(min_y, max_y)
         triggers.sort(key=lambda t: t[ppt.X])
     elif comp.requireSpawnOrder:
         # Rigid chain - maintain exact spacing (ordered spawn)
@@ -463,10 +556,10 @@ def _spread_triggers(triggers: list[Trigger], comp: ComponentProtocol, trigger_a
         if chain_width > (max_x - min_x):
             raise ValueError(f"Rigid chain too wide ({chain_width}) to fit in trigger area for {comp.name}")
 
-        shift = int(random.randint(min_x, int(max_x - chain_width)) - chain_min_x)
+        shift = int(rand.randint(min_x, int(max_x - chain_width)) - chain_min_x)
         for trigger in triggers:
             trigger[ppt.X] = util.round_to_n_sig_figs(trigger[ppt.X], 6) + shift
-            trigger[ppt.Y] = random.randint(min_y, max_y)
+            trigger[ppt.Y] = rand.randint(min_y, max_y)
     else:
         # Elastic chain - can stretch but must be ordered
         triggers.sort(key=lambda t: t[ppt.X])
@@ -478,13 +571,15 @@ def _spread_triggers(triggers: list[Trigger], comp: ComponentProtocol, trigger_a
             raise ValueError(f"Elastic chain too wide to fit in trigger area for {comp.name}")
         
         for i, trigger in enumerate(triggers):
-            rand_offset = random.random() * rand_room
+            rand_offset = rand.random() * rand_room
             raw_x = min_x + width * i + rand_offset
             trigger[ppt.X] = util.round_to_n_sig_figs(raw_x, 6)
-            trigger[ppt.Y] = random.randint(min_y, max_y)
+            trigger[ppt.Y] = rand.randint(min_y, max_y)
 
 
-def _generate_statistics(object_budget: int = 200000) -> dict[str, Any]:
+def _generate_statistics(object_budget: int = 200000, placed_groups: int = 0) -> dict[str, Any]:
+    ctx = context.active()
+    all_components, all_spells = ctx.components, ctx.spells
     total_triggers = sum(len(c.triggers) for c in all_components)
 
     spell_stats = {}
@@ -513,6 +608,7 @@ def _generate_statistics(object_budget: int = 200000) -> dict[str, Any]:
     remaining_budget = object_budget - total_triggers
 
     return {
+        "groups": ctx.budget.report(placed_groups),
         "spell_stats": spell_stats,
         "component_stats": component_stats,
         "shared_trigger_count": shared_trigger_count,
@@ -558,59 +654,221 @@ def _print_budget_analysis(stats: dict[str, Any]) -> None:
         print(f"\nShared components: {shared_count} triggers")
 
 
+_ELIDABLE: dict[int, dict[str, object]] = {
+    obj_id: {k: v for k, v in defaults.items() if k not in enum.REQUIRED_FIELDS.get(obj_id, ())}
+    for obj_id, defaults in enum.GD_DEFAULTS.items()
+}
+_NOT_SET = object()
+
+def _elide_defaults(trigger: Trigger) -> Trigger:
+    """Exported copy of trigger without the fields GD would assume anyway."""
+    defaults = _ELIDABLE.get(trigger[enum.Properties.OBJ_ID])
+    exported: dict[str, Any] = ({k: v for k, v in trigger.items() if defaults.get(k, _NOT_SET) != v}
+        if defaults else dict(trigger))
+    return exported # type: ignore
+
+@dataclass
+class SaveOptions:
+    """Arguments of a save_all call, as recorded by deferred_save_all."""
+    filename: str = "triggers.json"
+    object_budget: int = 200000
+    check_spawn_limit: bool = True
+    compile_paths: bool = False
+    remove_dead: bool = False
+    peephole: bool = False
+    dedupe: bool = False
+    seed: int | None = None
+    trigger_area: TriggerArea = field(default_factory=lambda: DEFAULT_TRIGGER_AREA)
+    profile_report: str | None = None
+    elide_defaults: bool = False
+    debug_index: bool = False
+    level: str | None = None
+
+    def changed(self) -> dict[str, Any]:
+        """Options not left at save_all's default, for dataclasses.replace"""
+        defaults = SaveOptions()
+        return {f.name: getattr(self, f.name) for f in fields(self)
+            if getattr(self, f.name) != getattr(defaults, f.name)}
+
+    def save(self) -> None:
+        save_all(filename=self.filename, object_budget=self.object_budget,
+            check_spawn_limit=self.check_spawn_limit, compile_paths=self.compile_paths,
+            remove_dead=self.remove_dead, peephole=self.peephole, dedupe=self.dedupe,
+            seed=self.seed, trigger_area=self.trigger_area, profile_report=self.profile_report,
+            elide_defaults=self.elide_defaults, debug_index=self.debug_index, level=self.level)
+
+_deferred_saves: list[SaveOptions] | None = None
+"""save_all calls recorded instead of exported, while deferred_save_all is active"""
+
 def save_all(*,
     filename: str = "triggers.json",
     object_budget: int = 200000,
     check_spawn_limit: bool = True,
-    trigger_area: TriggerArea = DEFAULT_TRIGGER_AREA):
+    compile_paths: bool = False,
+    remove_dead: bool = False,
+    peephole: bool = False,
+    dedupe: bool = False,
+    seed: int | None = None,
+    trigger_area: TriggerArea = DEFAULT_TRIGGER_AREA,
+    profile_report: str | None = None,
+    elide_defaults: bool = False,
+    debug_index: bool = False,
+    level: str | None = None):
     """
-    Export all component triggers to JSON file for main.js processing.
-    Handles spreading, sorting, validation, and statistics.
+    Export all component triggers to JSON file for main.js processing
+    (binary columns for a .scsb filename, see touhou_scs.columnar).
+    Handles spreading, sorting, validation, and statistics. In deferred
+    validation mode (component.set_validation_mode) the recorded trigger
+    parameters are checked first.
+
+    compile_paths: Replace static MoveBy chains with shared keyframe paths
+    remove_dead: Drop components no trigger can reach instead of only listing
+        them, see touhou_scs.passes
+    peephole: Merge or drop redundant triggers with the enabled rules in
+        touhou_scs.peephole.RULES
+    dedupe: Spawn one shared component for components that only differ by
+        their groups, see touhou_scs.passes
+    seed: Spread each component with its own seeded generator, so unchanged
+        components keep their positions between exports
+    profile_report: Write the per-phase build profile (JSON) to this file and
+        print its summary, see touhou_scs.profiler (profiler.trace_memory()
+        before building adds peak memory per phase)
+    elide_defaults: Leave out fields set to what GD assumes when they're
+        missing (enums.GD_DEFAULTS), never the enums.REQUIRED_FIELDS.
+        Saves about 0.2% of main.py's export
+    debug_index: Also write the group/target/remap lookups of the export
+        for debug/debug.js (triggers.index.json), see touhou_scs.index
+    level: The level file ("touhou scs.gmd") to check the export against:
+        warns about generated triggers in plain groups hand-placed objects
+        use too, and counts those objects' groups in the group budget, see
+        touhou_scs.gmd
     """
-    if check_spawn_limit: _enforce_spawn_limit(all_components)
-
-    output: dict[str, list[Trigger]] = {"triggers": []}
+    if _deferred_saves is not None:
+        _deferred_saves.append(SaveOptions(filename, object_budget, check_spawn_limit, compile_paths,
+            remove_dead, peephole, dedupe, seed, trigger_area, profile_report, elide_defaults,
+            debug_index, level))
+        return
+    # Export-only modules, imported here to keep `import touhou_scs` fast
+    from touhou_scs import budget, columnar, gmd, index, passes, paths, profiler, provenance
+    from touhou_scs.peephole import optimize_components, print_peephole_report
+
+    ctx = context.active()
+    profile = ctx.profile
+    materialize_deferred()
+    profile.begin_export()
+    all_components = ctx.components
+    if ctx.validation_batch is not None:
+        with profile.phase("deferred_validation"):
+            ctx.validation_batch.check(ctx.unknown_g.counter)
+            ctx.validation_batch.clear()
+    with profile.phase("dead_components"):
+        roots = [*ctx.groups.members(FIXED), *(s.caller_group for s in ctx.spells)]
+        passes.print_dead_components(passes.eliminate_dead_components(all_components, roots, remove=remove_dead))
+    if peephole:
+        with profile.phase("peephole"):
+            print_peephole_report(optimize_components(all_components))
+    if dedupe:
+        with profile.phase("dedupe"):
+            passes.print_dedupe_report(passes.dedupe_components(all_components,
+                roots=[s.caller_group for s in ctx.spells]))
+    if compile_paths:
+        with profile.phase("paths"):
+            paths.print_path_savings(paths.compile_move_paths(all_components))
+    if check_spawn_limit:
+        with profile.phase("spawn_limit"):
+            _enforce_spawn_limit(all_components)
+
+    output: dict[str, list[Any]] = {"triggers": [], "components": []}
 
     ppt = enum.Properties # shorthand
 
-    for comp in all_components:
-        if comp.current_pc is not None:
-            raise RuntimeError(
-                f"CRITICAL ERROR: Component {comp.name} has an active pointer circle that has not been cleared yet!"
-            )
-        
-        len_triggers = len(comp.triggers)
-        if len_triggers == 0:
-            warn(f"Component {comp.name} has no triggers")
-            continue
-
-        _spread_triggers(comp.triggers, comp, trigger_area, len_triggers)
-
-        prev_x = -10000
-        for trigger in comp.triggers:
-            if 9999 in trigger[ppt.GROUPS]:
+    exported: list[ComponentProtocol] = []
+    with profile.phase("spread"):
+        for comp in all_components:
+            if comp.current_pc is not None:
                 raise RuntimeError(
-                    f"CRITICAL ERROR: Reserved group 9999 detected in {comp.name}"
+                    f"CRITICAL ERROR: Component {comp.name} has an active pointer circle that has not been cleared yet!"
                 )
-            
-            curr_x = trigger[ppt.X]
-            if 0 < curr_x - prev_x < 1.28:
+
+            len_triggers = len(comp.triggers)
+            if len_triggers == 0:
+                warn(f"Component {comp.name} has no triggers")
+                continue
+
+            rng = None if seed is None else random.Random(f"{seed}:{comp.caller}:{comp.name}")
+            _spread_triggers(comp.triggers, comp, trigger_area, len_triggers, rng)
+            exported.append(comp)
+
+    with profile.phase("validate"):
+        for comp in exported:
+            restricted = find_restricted([g for trigger in comp.triggers for g in trigger[ppt.GROUPS]])
+            if restricted is not None:
                 raise RuntimeError(
-                    f"CRITICAL ERROR: X position within 1.28 unit of previous trigger"
-                    f" in {comp.name} - spawn order not preserved"
+                    f"CRITICAL ERROR: Restricted group {restricted} detected in {comp.name}"
                 )
 
-            prev_x = curr_x
-            output["triggers"].append(trigger)
+            prev_x = -10000
+            for trigger in comp.triggers:
+                curr_x = trigger[ppt.X]
+                if trigger[ppt.OBJ_ID] == enum.ObjectID.KEYFRAME_OBJ:
+                    pass # Positioned by path shape, not spawn order
+                elif 0 < curr_x - prev_x < 1.28:
+                    raise RuntimeError(
+                        f"CRITICAL ERROR: X position within 1.28 unit of previous trigger"
+                        f" in {comp.name} - spawn order not preserved"
+                    )
 
-    stats = _generate_statistics(object_budget)
-    _print_budget_analysis(stats)
+                prev_x = curr_x
+                output["triggers"].append(_elide_defaults(trigger) if elide_defaults else trigger)
+            output["components"].append([comp.name, comp.caller, len(comp.triggers), bool(comp.requireSpawnOrder)])
+        sources = provenance.detach(output["triggers"]) # also if recording was disabled after building
+
+    placed_groups = 0
+    if level is not None:
+        with profile.phase("level"):
+            objects = gmd.LevelObjects.read(level)
+            for group, ids in gmd.conflicts(output["triggers"], objects, trigger_area, ctx.groups).items():
+                warn(f"Group {group} of generated triggers is also used by {len(ids)} hand-placed "
+                    f"object(s) in {level} (object IDs {sorted(set(ids))})")
+            placed_groups = len(gmd.placed_groups(objects, trigger_area, ctx.groups))
+
+    with profile.phase("statistics"):
+        stats = _generate_statistics(object_budget, placed_groups)
+        _print_budget_analysis(stats)
+        budget.print_report(stats["groups"])
+
+    if filename != "testing":
+        with profile.phase("serialize"):
+            with open(filename, "wb") as file:
+                if filename.endswith(columnar.EXTENSION): file.write(columnar.encode(output))
+                else: file.write(orjson.dumps(output))
+            if provenance.enabled(): provenance.write_sidecar(sources, filename)
+            if debug_index: index.write_sidecar(output["triggers"], output["components"], filename)
+    if sources: provenance.attach(output["triggers"], sources)
+    index.invalidate(all_components) # triggers were spread and optimized in place
+
+    if profile_report is not None:
+        report = profile.report(all_components)
+        profiler.save_report(report, profile_report)
+        profiler.print_summary(report)
 
     if filename == "testing": return
 
-    with open(filename, "wb") as file:
-        file.write(orjson.dumps(output))
-
     elapsed = time.time() - _start_time
     print(f"\nSaved to {filename} successfully!")
     print(f"Total execution time: {elapsed:.3f} seconds")
+
+@contextmanager
+def deferred_save_all() -> Generator[list[SaveOptions]]:
+    """
+    Record save_all calls instead of exporting, for drivers that run spell
+    scripts and export themselves. Yields the recorded calls, in order.
+    """
+    global _deferred_saves
+    outer = _deferred_saves
+    calls: list[SaveOptions] = []
+    _deferred_saves = calls
+    try:
+        yield calls
+    finally:
+        _deferred_saves = outer
@@ -0,0 +1,251 @@
+"""
+Touhou SCS - Linker Module
+
+Links separately exported trigger tables (triggers.json files) into one.
+
+    python -m touhou_scs.linker stage1.json stage2.json ... [--output triggers.json]
+
+Every table numbers its unknown groups from 10000, so the linker relocates
+them into one non-overlapping range. Like main.js, any number >= 10000 in a
+trigger (and any 5+ digit number in a string, e.g. remap strings) is treated
+as an unknown group.
+
+Components that are identical in content (Multitarget bases, despawners,
+keyframe groups, ...) are kept once; references to dropped copies are
+relocated to the kept one. This needs the "components" spans save_all
+writes, tables without them are only relocated.
+"""
+
+from __future__ import annotations
+import argparse
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Hashable, cast
+
+import orjson
+
+from touhou_scs import enums as enum
+
+ppt = enum.Properties # shorthand
+
+_UNKNOWN_IN_STRING = re.compile(r"\b\d{5,}\b")
+
+Table = dict[str, list[Any]]
+"""Exported trigger table: {"triggers": [...], "components": [[name, caller, count, spawn_ordered], ...]}"""
+
+@dataclass
+class LinkStats:
+    tables: int = 0
+    components: int = 0
+    deduplicated: int = 0
+    triggers_removed: int = 0
+    groups_relocated: int = 0
+
+@dataclass
+class _Kept:
+    caller: int
+    spawn_ordered: bool
+    triggers: list[dict[str, Any]]
+    signature: Hashable = None
+    """Computed the first time a candidate duplicate shows up"""
+
+
+def _unknown_groups(triggers: list[dict[str, Any]]) -> set[int]:
+    found: set[int] = set()
+    for trigger in triggers:
+        for value in trigger.values():
+            kind = value.__class__
+            if kind is int:
+                if value >= 10000: found.add(value)
+            elif kind is list:
+                found.update(g for g in value if g >= 10000)
+            elif kind is str:
+                found.update(g for g in map(int, _UNKNOWN_IN_STRING.findall(value)) if g >= 10000)
+    return found
+
+def relocate(triggers: list[dict[str, Any]], mapping: dict[int, int]) -> list[dict[str, Any]]:
+    """Copy of triggers with every unknown group passed through mapping."""
+    def replace(match: re.Match[str]) -> str:
+        return str(mapping.get(int(match.group()), match.group()))
+
+    relocated: list[dict[str, Any]] = []
+    for trigger in triggers:
+        new: dict[str, Any] = {}
+        for key, value in trigger.items():
+            kind = value.__class__
+            if kind is int:
+                if value >= 10000: value = mapping.get(value, value)
+            elif kind is list:
+                value = [mapping.get(g, g) for g in value]
+            elif kind is str:
+                value = _UNKNOWN_IN_STRING.sub(replace, value)
+            new[key] = value
+        relocated.append(new)
+    return relocated
+
+def _bucket(triggers: list[dict[str, Any]], caller: int, spawn_ordered: bool) -> Hashable:
+    """Cheap key that identical components always share."""
+    return (len(triggers), spawn_ordered, caller if caller < 10000 else None,
+        tuple(sorted(t[ppt.OBJ_ID] for t in triggers)))
+
+def _signature(triggers: list[dict[str, Any]], caller: int, spawn_ordered: bool,
+    refs: dict[int, Hashable]) -> Hashable:
+    """
+    Content of a component independent of where it was spread and which
+    unknown group it was given. Unknown groups go through refs.
+    """
+    keyframes = all(t[ppt.OBJ_ID] == enum.ObjectID.KEYFRAME_OBJ for t in triggers)
+    positioned = keyframes or spawn_ordered
+    x0 = triggers[0][ppt.X]
+    y0 = triggers[0].get(ppt.Y, 0)
+
+    def canonical(value: Any) -> Hashable:
+        if isinstance(value, bool): return value
+        if isinstance(value, int) and value >= 10000:
+            return "self" if value == caller else refs.get(value, ("group", value))
+        if isinstance(value, list): return tuple(canonical(v) for v in cast(list[Any], value))
+        if isinstance(value, str) and _UNKNOWN_IN_STRING.search(value):
+            return tuple(canonical(int(tok)) if tok.isdigit() and int(tok) >= 10000 else tok
+                for tok in re.split(r"(\d+)", value))
+        return value
+
+    entries: list[Hashable] = []
+    for t in triggers:
+        entry = tuple(sorted((k, canonical(v)) for k, v in t.items() if k != ppt.X and k != ppt.Y))
+        if positioned:
+            entry = (round(t[ppt.X] - x0, 2), round(t.get(ppt.Y, 0) - y0, 2) if keyframes else 0, entry)
+        entries.append(entry)
+    if not positioned: entries.sort(key=repr)
+    return (spawn_ordered, tuple(entries))
+
+
+class Linker:
+    """Accumulates tables; link order decides which copy of a shared component is kept."""
+
+    def __init__(self):
+        self.triggers: list[dict[str, Any]] = []
+        self.components: list[list[Any]] = []
+        self.stats = LinkStats()
+        self._next_group = 10000
+        self._kept: dict[Hashable, list[_Kept]] = {}
+        """Bucket -> linked components that later copies can be deduplicated against"""
+
+    def add(self, table: Table) -> LinkStats:
+        """Relocate and deduplicate one table into the linked output."""
+        triggers: list[dict[str, Any]] = table["triggers"]
+        has_spans = bool(table.get("components"))
+        spans: list[list[Any]] = table["components"] if has_spans else [["<table>", 0, len(triggers), False]]
+        if sum(span[2] for span in spans) != len(triggers):
+            raise ValueError("Linker: component spans don't add up to the trigger count")
+
+        comps: list[tuple[list[Any], list[dict[str, Any]]]] = []
+        start = 0
+        for span in spans:
+            comps.append((span, triggers[start:start + span[2]]))
+            start += span[2]
+
+        local = _unknown_groups(triggers)
+        mapping, dropped = self._deduplicate(comps) if has_spans else ({}, set[int]())
+        for g in sorted(local):
+            if g not in mapping:
+                mapping[g] = self._next_group
+                self._next_group += 1
+                self.stats.groups_relocated += 1
+
+        kept = [comp for i, comp in enumerate(comps) if i not in dropped]
+        relocated = relocate([t for _, comp_triggers in kept for t in comp_triggers], mapping)
+        start = 0
+        for span, _ in kept:
+            caller: int = span[1]
+            caller = mapping.get(caller, caller)
+            comp_triggers = relocated[start:start + span[2]]
+            start += span[2]
+            self.components.append([span[0], caller, span[2], span[3]])
+            if has_spans and comp_triggers:
+                self._kept.setdefault(_bucket(comp_triggers, caller, span[3]), []).append(
+                    _Kept(caller, span[3], comp_triggers))
+        self.triggers.extend(relocated)
+
+        self.stats.tables += 1
+        self.stats.components += len(comps)
+        return self.stats
+
+    def _match(self, comp_triggers: list[dict[str, Any]], caller: int, spawn_ordered: bool,
+        refs: dict[int, Hashable]) -> int | None:
+        """Caller group of an already linked identical component"""
+        candidates = self._kept.get(_bucket(comp_triggers, caller, spawn_ordered))
+        if not candidates: return None
+        key = _signature(comp_triggers, caller, spawn_ordered, refs)
+        for kept in candidates:
+            if kept.signature is None:
+                kept.signature = _signature(kept.triggers, kept.caller, kept.spawn_ordered, {})
+            if kept.signature == key: return kept.caller
+        return None
+
+    def _deduplicate(self, comps: list[tuple[list[Any], list[dict[str, Any]]]]) -> tuple[dict[int, int], set[int]]:
+        """Returns (caller mapping of dropped components, indices of dropped components)"""
+        mapping: dict[int, int] = {}
+        dropped: set[int] = set()
+        candidates = [i for i, (span, comp_triggers) in enumerate(comps)
+            if comp_triggers and _bucket(comp_triggers, span[1], span[3]) in self._kept]
+        groups = {i: _unknown_groups(comps[i][1]) - {comps[i][0][1]} for i in candidates}
+
+        # A component can only be compared once the candidates it references are resolved
+        unresolved = {comps[i][0][1] for i in candidates if comps[i][0][1] >= 10000}
+        pending: list[int] = candidates
+        while pending:
+            ready: list[int] = [i for i in pending if not groups[i] & unresolved]
+            if not ready: break # reference cycle, keep the rest
+
+            for i in ready:
+                span, comp_triggers = comps[i]
+                refs: dict[int, Hashable] = {g: ("group", mapping[g]) if g in mapping else ("local", g)
+                    for g in groups[i]}
+                match = None if span[1] in mapping else self._match(comp_triggers, span[1], span[3], refs)
+                if match is not None:
+                    if span[1] >= 10000: mapping[span[1]] = match
+                    dropped.add(i)
+                    self.stats.deduplicated += 1
+                    self.stats.triggers_removed += span[2]
+            unresolved -= {comps[i][0][1] for i in ready}
+            pending = [i for i in pending if i not in ready]
+
+        return mapping, dropped
+
+
+def link(tables: list[Table]) -> tuple[Table, LinkStats]:
+    """Link tables in order. Returns (linked table, stats)."""
+    linker = Linker()
+    for table in tables: linker.add(table)
+    return {"triggers": linker.triggers, "components": linker.components}, linker.stats
+
+def link_files(sources: list[str], output: str) -> LinkStats:
+    tables: list[Table] = []
+    for source in sources:
+        with open(source, "rb") as file:
+            tables.append(orjson.loads(file.read()))
+
+    linked, stats = link(tables)
+    with open(output, "wb") as file:
+        file.write(orjson.dumps(linked))
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m touhou_scs.linker",
+        description="Link exported trigger tables into one, deduplicating shared components.")
+    parser.add_argument("sources", nargs="+", help="Exported trigger tables, linked in this order")
+    parser.add_argument("--output", default="triggers.json")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    stats = link_files(args.sources, args.output)
+    print(f"Linked {stats.tables} tables ({stats.components} components) into {args.output} "
+          f"in {time.perf_counter() - began:.3f}s")
+    print(f"  {stats.deduplicated} shared components deduplicated ({stats.triggers_removed} triggers), "
+          f"{stats.groups_relocated} groups relocated")
+
+
+if __name__ == "__main__":
+    main()
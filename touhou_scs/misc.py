@@ -1,5 +1,7 @@
 
-from touhou_scs import enums as enum, lib, utils as util
+from typing import Any
+
+from touhou_scs import context, enums as enum, lib, utils as util
 from touhou_scs.component import Component, Multitarget
 from touhou_scs.utils import unknown_g, calltracker
 
@@ -12,6 +14,7 @@ GRAZE_FUNCTION = 34
 PLR_HURT_FUNCTION = 35
 DESPAWN_FUNCTION = 27 #PLR_HURT calls despawn in level, BOMB_HURT calls directly in code
 ENEMY_HITBOX = 5 # shared for every enemy
+context.active().groups.register_collision_ids("hitboxes", BOUNDARY_HITBOX, ENEMY_HITBOX)
 
 ppt = enum.Properties
 
@@ -23,7 +26,7 @@ def add_disable_all_bullets():
     comp = Component("Disable All Bullets", 32, editorLayer=4) \
         .assert_spawn_order(False)
 
-    single = (Component("Disable Single Bullet", unknown_g(), editorLayer=6)
+    single = (Component("Disable Single Bullet", unknown_g("library"), editorLayer=6)
         .assert_spawn_order(False)
         .set_context(target=enum.EMPTY_BULLET)
             .Toggle(0, False)
@@ -74,7 +77,7 @@ def add_plr_collisions():
         .clear_context()
     )
 
-    placeholder = unknown_g() # never called, just fulfills comp param requirement
+    placeholder = unknown_g("library") # never called, just fulfills comp param requirement
     ppt = enum.Properties
     def add_collision_trigger_remaps(bullet: lib.BulletPool, name: str):
         # Called on level startup
@@ -126,9 +129,9 @@ def add_enemy_collisions():
         list(range(lib.reimuA_level1.min_group, lib.reimuA_level1.max_group + 1))
     )
 
-    base_col = (Component("Enemy Collision for PlrBullets (un-mapped)", unknown_g(), editorLayer=6)
+    base_col = (Component("Enemy Collision for PlrBullets (un-mapped)", unknown_g("library"), editorLayer=6)
         .assert_spawn_order(False)
-        .set_context(target=plr_bullet_despawn.caller)
+        .set_context(target=_plr_bullet_despawn.caller)
             .Collision(0, blockA=enum.EMPTY_BULLET, blockB=enum.EMPTY_TARGET_GROUP, activateGroup=True)
         .clear_context()
     )
@@ -154,7 +157,7 @@ def add_enemy_collisions():
             Multitarget.spawn_with_remap(global_col, 0, batch_size, base_col, remap_collision)
             remaining -= batch_size
 
-despawn1 = (Component("PlrBullet Despawn 1", unknown_g(), editorLayer=6)
+_despawn1 = lib.DeferredComponent("PlrBullet Despawn 1", 6, reserve=1, build=lambda c: (c
     .assert_spawn_order(True)
     .set_context(target=enum.EMPTY_BULLET)
         .Scale(0, factor=0.25, hold=0, t=1, type=enum.Easing.ELASTIC_IN_OUT, rate=1.2)
@@ -163,10 +166,10 @@ despawn1 = (Component("PlrBullet Despawn 1", unknown_g(), editorLayer=6)
         .Alpha(1, t=0, opacity=100)
         .Toggle(1, False)
     .clear_context()
-)
+))
 
 
-despawn2 = (Component("EnemyBullet Despawn 2", unknown_g(), editorLayer=6)
+_despawn2 = lib.DeferredComponent("EnemyBullet Despawn 2", 6, reserve=1, build=lambda c: (c
     .assert_spawn_order(True)
     # Bullet despawn
     .set_context(target=enum.EMPTY_BULLET)
@@ -176,25 +179,30 @@ despawn2 = (Component("EnemyBullet Despawn 2", unknown_g(), editorLayer=6)
         .Alpha(0.2, t=0, opacity=100)
         .Toggle(0.2, False)
     .clear_context()
-)
+))
 
-plr_bullet_despawn = (Component("PlrBullet Despawn List", unknown_g(), editorLayer=6)
+_plr_bullet_despawn = lib.DeferredComponent("PlrBullet Despawn List", 6, lambda c: (c
     .assert_spawn_order(False)
     # To decrease enemy health & despawn the player bullet
     .Pickup(0, item_id=enum.EMPTY_TARGET_GROUP, count=-1, override=False)
     .set_context(target=enum.EMPTY_TARGET_GROUP)
         .Pulse(0, lib.HSB(50, 0.52, 0.56), fadeIn=0.1, fadeOut=0.1, exclusive=True)
     .clear_context()
-    .Spawn(0, despawn2.caller, True) # toggle this on/off same tick w/ unique group
-)
-
+    .Spawn(0, _despawn2.caller, True) # toggle this on/off same tick w/ unique group
+))
 
-enemy_bullet_despawn = Component("EnemyBullet Despawn List", DESPAWN_FUNCTION, editorLayer=6)
 
-(enemy_bullet_despawn
+_enemy_bullet_despawn = lib.DeferredComponent("EnemyBullet Despawn List", 6, lambda c: (c
     .assert_spawn_order(False)
     # Note: if a collisionX component seems to be be spawning delayed, its a GD bug. reload level.
-    .Spawn(0, despawn1.caller, True) # toggle this on/off same tick w/ unique group
+    .Spawn(0, _despawn1.caller, True) # toggle this on/off same tick w/ unique group
     # .group_last_trigger
     # .Spawn(0, collision2.caller, True)
-)
+), caller=DESPAWN_FUNCTION)
+
+_deferred_names = {"despawn1": _despawn1, "despawn2": _despawn2,
+    "plr_bullet_despawn": _plr_bullet_despawn, "enemy_bullet_despawn": _enemy_bullet_despawn}
+
+def __getattr__(name: str) -> Any:
+    if name in _deferred_names: return _deferred_names[name].get()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,259 @@
+"""
+Touhou SCS - Parallel Build Module
+
+Builds each stage script in its own process and merges the results.
+
+    python -m touhou_scs.parallel stage1.py stage2.py ... [--workers N]
+
+Every stage runs in a fresh fork of the default BuildContext with its own
+unknown group window (stage i starts at the import-time counter plus
+i * group_span) and its own slice of the pointer pool, so stages can't
+collide no matter which worker runs them. The driver then registers the
+components in stage order and calls save_all once (seeded), which makes
+the output identical for any number of workers.
+
+Library components created lazily (Multitarget bases, pointer circle
+helpers, keyframe groups) are built by every stage that needs them; the
+driver keeps the first stage's copy of each and relocates the others'
+references to it, like the linker does for identical components.
+Import-time components (lib.DeferredComponent) keep a single copy; triggers stages add to them
+(e.g. spawns on lib.Stage.stage1) are appended in stage order.
+
+Scripts that call build_stages() must guard it with
+'if __name__ == "__main__":' on platforms that spawn worker processes.
+"""
+
+from __future__ import annotations
+import argparse
+import dataclasses
+import importlib
+import os
+import runpy
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Hashable
+
+from touhou_scs import context, lib, linker
+from touhou_scs.component import Component
+from touhou_scs.types import Trigger
+
+importlib.import_module("touhou_scs.misc") # library components must exist in every worker
+
+DEFAULT_GROUP_SPAN = 10000
+"""Unknown groups each stage may allocate"""
+
+ComponentKey = str
+"""'caller:name', unique within a build"""
+
+LibraryKey = tuple[str, Hashable]
+"""(BuildContext cache, key in it), e.g. ("binary_bases", 8)"""
+
+_LIBRARY_CACHES: dict[str, str] = {
+    "binary_bases": "multitarget",
+    "staggered_bases": "multitarget",
+    "follow_comps": "pointers",
+    "scale_keyframes": "keyframes",
+    "path_keyframes": "keyframes",
+}
+"""BuildContext caches of lazily built library components -> their group budget category"""
+
+@dataclass
+class StageResult:
+    """What a worker sends back: plain data, no Component objects."""
+    source: str
+    components: list[tuple[str, int, int, bool | None, list[Trigger]]] = field(default_factory=list)
+    """New components: (name, caller, editor layer, requireSpawnOrder, triggers)"""
+    appended: dict[ComponentKey, list[Trigger]] = field(default_factory=dict)
+    """Triggers added to import-time components"""
+    spells: list[tuple[str, int, list[ComponentKey]]] = field(default_factory=list)
+    save_options: lib.SaveOptions | None = None
+    """The stage's last save_all call, if any"""
+    unknown_groups: int = 0
+    group_counts: dict[str, int] = field(default_factory=dict)
+    """Group budget charged by the stage, per category"""
+    library: dict[LibraryKey, ComponentKey] = field(default_factory=dict)
+    """Library components the stage built (they are in components too)"""
+    seconds: float = 0.0
+
+
+def _key(comp: Any) -> ComponentKey:
+    return f"{comp.caller}:{comp.name}"
+
+def _library(ctx: context.BuildContext) -> dict[LibraryKey, Component]:
+    """Lazily built library components of ctx"""
+    found: dict[LibraryKey, Component] = {(cache, key): comp
+        for cache in _LIBRARY_CACHES for key, comp in getattr(ctx, cache).items()}
+    if ctx.setup_pointercircle is not None: found[("setup_pointercircle", None)] = ctx.setup_pointercircle
+    return found
+
+def _store_library(ctx: context.BuildContext, key: LibraryKey, comp: Component) -> None:
+    cache, entry = key
+    if cache == "setup_pointercircle": ctx.setup_pointercircle = comp
+    else: getattr(ctx, cache)[entry] = comp
+
+def split_pool(pool: lib.BulletPool, parts: int) -> list[tuple[int, int]]:
+    """Disjoint (min, max) slices of a pool, as even as possible."""
+    size = pool.max_group - pool.min_group + 1
+    if not (1 <= parts <= size):
+        raise ValueError(f"split_pool: can't split {size} groups into {parts} parts")
+    bounds = [pool.min_group + size * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(parts)]
+
+def _build_stage(source: str, counter: int, pointers: tuple[int, int]) -> StageResult:
+    """Worker: run one stage script in an isolated context."""
+    began = time.perf_counter()
+    pool_range = (lib.pointer.min_group, lib.pointer.max_group)
+    lib.pointer.min_group, lib.pointer.max_group = pointers
+
+    try:
+        with context.default_context.fork(os.path.basename(source)) as ctx:
+            lib.materialize_deferred()
+            baseline = {id(c): len(c.triggers) for c in ctx.components}
+            library = _library(ctx).keys()
+            charged = dict(ctx.budget.counts)
+            ctx.unknown_g.counter = counter
+
+            with lib.deferred_save_all() as saves:
+                runpy.run_path(source, run_name="__main__")
+            if ctx.validation_batch is not None: # deferred mode, the driver only sees triggers
+                ctx.validation_batch.check(ctx.unknown_g.counter)
+
+            result = StageResult(source, save_options=saves[-1] if saves else None,
+                unknown_groups=ctx.unknown_g.counter - counter,
+                group_counts={c: n - charged.get(c, 0) for c, n in ctx.budget.counts.items()
+                    if n != charged.get(c, 0)})
+            for comp in ctx.components:
+                if id(comp) not in baseline:
+                    result.components.append((comp.name, comp.caller, comp.editorLayer,
+                        comp.requireSpawnOrder, comp.triggers))
+                elif len(comp.triggers) > baseline[id(comp)]:
+                    result.appended[_key(comp)] = comp.triggers[baseline[id(comp)]:]
+            result.library = {key: _key(comp) for key, comp in _library(ctx).items() if key not in library}
+            result.spells = [(s.spell_name, s.caller_group, [_key(c) for c in s.components])
+                for s in ctx.spells]
+    finally:
+        lib.pointer.min_group, lib.pointer.max_group = pool_range
+
+    result.seconds = time.perf_counter() - began
+    return result
+
+
+def build_stages(sources: list[str], *,
+    output: str = "triggers.json",
+    workers: int | None = None,
+    seed: int = 0,
+    group_span: int = DEFAULT_GROUP_SPAN,
+    pointer_ranges: list[tuple[int, int]] | None = None) -> list[StageResult]:
+    """
+    Build stage scripts in parallel and export them as one trigger table.
+
+    workers: Process count (defaults to one per stage, capped at the CPU count)
+    pointer_ranges: Pointer pool range per stage. Defaults to disjoint slices of
+        lib.pointer; stages never run at the same time in the level, so
+        overlapping ranges are fine when a stage needs more pointers
+    """
+    if not sources:
+        raise ValueError("build_stages: no stage sources given")
+    if pointer_ranges is None:
+        pointer_ranges = split_pool(lib.pointer, len(sources))
+    if len(pointer_ranges) != len(sources):
+        raise ValueError(f"build_stages: got {len(pointer_ranges)} pointer ranges for {len(sources)} stages")
+
+    sources = [os.path.abspath(s) for s in sources]
+    base = context.default_context.unknown_g.counter
+    counters = [base + i * group_span for i in range(len(sources))]
+    workers = workers or min(len(sources), os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_build_stage, sources, counters, pointer_ranges))
+
+    for result in results:
+        if result.unknown_groups > group_span:
+            raise RuntimeError(f"build_stages: {os.path.basename(result.source)} used "
+                f"{result.unknown_groups} unknown groups, group_span is {group_span}")
+
+    with context.default_context.fork("parallel") as ctx:
+        lib.materialize_deferred()
+        _merge(ctx, results)
+        ctx.unknown_g.counter = counters[-1] + results[-1].unknown_groups
+        options = lib.SaveOptions()
+        for result in results:
+            if result.save_options is not None:
+                options = dataclasses.replace(options, **result.save_options.changed())
+        dataclasses.replace(options, filename=output, seed=seed).save()
+    return results
+
+def _merge(ctx: context.BuildContext, results: list[StageResult]) -> None:
+    by_key: dict[ComponentKey, Any] = {_key(c): c for c in ctx.components}
+    built_by: dict[ComponentKey, str] = {}
+    library = _library(ctx)
+
+    for result in results:
+        stage = os.path.basename(result.source)
+        # Library components an earlier stage built already: drop this stage's copy
+        copies: dict[ComponentKey, LibraryKey] = {}
+        relocation: dict[int, int] = {}
+        group_counts = dict(result.group_counts)
+        for lib_key, key in result.library.items():
+            if lib_key not in library: continue
+            copies[key] = lib_key
+            relocation[int(key.split(":", 1)[0])] = library[lib_key].caller
+            category = _LIBRARY_CACHES.get(lib_key[0], "pointers") # setup_pointercircle
+            group_counts[category] -= 1
+        def relocate(triggers: list[Trigger]) -> list[Trigger]:
+            return linker.relocate(triggers, relocation) if relocation else triggers # type: ignore
+
+        for category, n in group_counts.items():
+            if n: ctx.budget.charge(category, n)
+        for key, triggers in result.appended.items():
+            if key not in by_key:
+                raise RuntimeError(f"build_stages: {stage} changed import-time component {key}, "
+                    "which the driver doesn't have (was it created by a module the driver didn't import?)")
+            by_key[key].triggers.extend(relocate(triggers))
+
+        for name, caller, layer, spawn_order, triggers in result.components:
+            key = f"{caller}:{name}"
+            if key in copies:
+                by_key[key] = library[copies[key]]
+                continue
+            if key in built_by:
+                raise RuntimeError(f"build_stages: component {key} was built by both "
+                    f"{built_by[key]} and {stage}, build it in one stage only")
+            built_by[key] = stage
+
+            comp = Component(name, caller, layer)
+            comp.requireSpawnOrder = spawn_order
+            comp.triggers = relocate(triggers)
+            by_key[key] = comp
+        for lib_key, key in result.library.items():
+            if lib_key not in library:
+                library[lib_key] = by_key[key]
+                _store_library(ctx, lib_key, by_key[key])
+
+        for spell_name, caller_group, keys in result.spells:
+            spell = lib.Spell(spell_name, caller_group)
+            for key in keys: spell.add_component(by_key[key])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m touhou_scs.parallel",
+        description="Build stage scripts in parallel into one trigger table.")
+    parser.add_argument("sources", nargs="+", help="Stage scripts, exported in this order")
+    parser.add_argument("--output", default="triggers.json")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--group-span", type=int, default=DEFAULT_GROUP_SPAN)
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    results = build_stages(args.sources, output=args.output, workers=args.workers,
+        seed=args.seed, group_span=args.group_span)
+    for result in results:
+        print(f"  {os.path.basename(result.source)}: {len(result.components)} components, "
+              f"{result.unknown_groups} unknown groups, {result.seconds:.3f}s")
+    print(f"Parallel build finished in {time.perf_counter() - began:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
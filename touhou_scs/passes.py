@@ -0,0 +1,268 @@
+"""
+Touhou SCS - Optimization Passes Module
+
+Whole-build passes over the registered components, run by save_all
+before export.
+
+Dead component elimination: reachability from root groups, the ones the
+level itself activates (save_all passes the registry's fixed groups, which
+include the stage caller and enums.LEVEL_CALLED_GROUPS, and the spell
+callers). A trigger is live once one of its groups is: a root, or a group
+a live trigger references in a target field (enums.TARGET_FIELDS) or its
+remap string. Triggers in no group are always live. Components with no
+live trigger can never run and only cost objects and load time.
+
+Deduplication: components that only differ by their groups are spawned
+as one shared component. Triggers are hashed with the caller and target
+groups replaced by placeholders (in order of first use), so finding every
+duplicate is one dict lookup per component. Callers of a duplicate then
+spawn the shared component instead, remapping its groups to the
+duplicate's, which is only sound when:
+- both callers are unknown groups owned by one component each, and every
+  reference to the duplicate is a Spawn target or remap value
+- the remapped groups are used by no other component's triggers, since
+  spawn remaps are inherited by whatever the shared component spawns
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from touhou_scs import enums as enum, utils as util
+from touhou_scs.groups import UNKNOWN_START
+from touhou_scs.provenance import SOURCE_KEY
+from touhou_scs.types import ComponentProtocol, Trigger
+
+ppt = enum.Properties # shorthand
+
+_TARGET_KEYS = frozenset(enum.TARGET_FIELDS)
+
+@dataclass
+class DeadComponents:
+    components: list[ComponentProtocol]
+    kept: bool = False
+    """Found but left in the export"""
+
+    @property
+    def triggers(self) -> int:
+        return sum(len(c.triggers) for c in self.components)
+
+
+def find_dead_components(components: list[ComponentProtocol],
+    roots: Iterable[int]) -> list[ComponentProtocol]:
+    """Components none of whose triggers can ever be activated. roots: groups the level activates"""
+    waiting: dict[int, list[tuple[int, Trigger]]] = {}
+    """Group -> (component index, trigger) that only run once it is live"""
+    pending: list[tuple[int, Trigger]] = []
+
+    for i, comp in enumerate(components):
+        for trigger in comp.triggers:
+            groups: list[int] = trigger[ppt.GROUPS]
+            if not groups: pending.append((i, trigger))
+            for g in groups: waiting.setdefault(g, []).append((i, trigger))
+
+    live: set[int] = set()
+    seen: set[int] = set()
+    def activate(group: int) -> None:
+        for entry in waiting.pop(group, ()):
+            if id(entry[1]) not in seen:
+                seen.add(id(entry[1]))
+                pending.append(entry)
+
+    for g in roots: activate(g)
+    while pending:
+        i, trigger = pending.pop()
+        live.add(i)
+        if not waiting: continue
+        for key in _TARGET_KEYS & trigger.keys():
+            g = trigger.get(key)
+            if type(g) is int and g in waiting: activate(g)
+        remap = trigger.get(ppt.REMAP_STRING)
+        if remap:
+            for part in remap.split("."):
+                if int(part) in waiting: activate(int(part))
+
+    return [c for i, c in enumerate(components) if i not in live and c.triggers]
+
+def eliminate_dead_components(components: list[ComponentProtocol], roots: Iterable[int], *,
+    remove: bool = True) -> DeadComponents:
+    """Find dead components and, if remove, drop them from components (in place)."""
+    dead = find_dead_components(components, roots)
+    if remove and dead:
+        ids = {id(c) for c in dead}
+        components[:] = [c for c in components if id(c) not in ids]
+    return DeadComponents(dead, kept=not remove)
+
+def print_dead_components(report: DeadComponents) -> None:
+    """Print formatted dead component results to console."""
+    if not report.components: return
+    print("\n\033[4m=== DEAD COMPONENTS ===\033[0m")
+    for comp in report.components:
+        print(f"  {comp.name} (group {comp.caller}): {len(comp.triggers)} triggers")
+    if report.kept:
+        print(f"{len(report.components)} unreachable components ({report.triggers} objects) kept, "
+              "save_all(remove_dead=True) drops them")
+    else:
+        print(f"Removed {len(report.components)} unreachable components, {report.triggers} objects saved")
+
+
+@dataclass
+class DuplicateSet:
+    shared: ComponentProtocol
+    duplicates: list[ComponentProtocol] = field(default_factory=list)
+    rewritten: int = 0
+    """Spawn triggers now spawning the shared component"""
+
+    @property
+    def objects_saved(self) -> int:
+        return sum(len(c.triggers) for c in self.duplicates)
+
+@dataclass
+class DedupeReport:
+    merged: list[DuplicateSet] = field(default_factory=list)
+    skipped: dict[str, str] = field(default_factory=dict)
+    """Duplicate component name -> reason it was kept"""
+
+    @property
+    def objects_saved(self) -> int:
+        return sum(d.objects_saved for d in self.merged)
+
+
+_STRUCTURE_IGNORED = frozenset((ppt.GROUPS, ppt.Y, SOURCE_KEY))
+"""Checked separately (GROUPS), or only layout/debug info"""
+
+def _structure(comp: ComponentProtocol) -> tuple[tuple[Any, ...], list[int]] | None:
+    """
+    Triggers of comp with its groups as placeholders (-1 is the caller) and
+    whether spread must keep their order, and its groups in placeholder order.
+    None if a trigger is in other groups.
+    """
+    caller = comp.caller
+    order = [caller]
+    slots = {caller: -1}
+    rows: list[tuple[tuple[str, Any], ...]] = []
+    for trigger in comp.triggers:
+        groups = trigger[ppt.GROUPS]
+        if len(groups) != 1 or groups[0] != caller: return None
+        row: list[tuple[str, Any]] = []
+        for key, value in trigger.items():
+            if key in _STRUCTURE_IGNORED: continue
+            if key in _TARGET_KEYS and type(value) is int:
+                slot = slots.get(value)
+                if slot is None:
+                    order.append(value)
+                    slot = slots[value] = -len(order)
+                value = slot
+            row.append((key, value))
+        row.sort()
+        rows.append(tuple(row))
+    return (comp.requireSpawnOrder is True, tuple(rows)), order
+
+def _add_reference(owners: dict[int, int], group: int, i: int) -> None:
+    if owners.setdefault(group, i) != i: owners[group] = -1
+
+def _reference_sites(components: list[ComponentProtocol]) -> tuple[dict[int, int], dict[int, int],
+    dict[int, list[tuple[int, Trigger]]], set[int]]:
+    """
+    members: group -> index of the only component with triggers in it (-1: several)
+    mentions: same, counting any reference to the group
+    spawns: group -> (component index, Spawn trigger) spawning it, as target or remap value
+    other: groups referenced any other way (can't be redirected)
+    """
+    members: dict[int, int] = {}
+    mentions: dict[int, int] = {}
+    spawns: dict[int, list[tuple[int, Trigger]]] = {}
+    other: set[int] = set()
+    for i, comp in enumerate(components):
+        for trigger in comp.triggers:
+            is_spawn = trigger[ppt.OBJ_ID] == enum.ObjectID.SPAWN
+            for g in trigger[ppt.GROUPS]:
+                _add_reference(members, g, i)
+                _add_reference(mentions, g, i)
+            for key in _TARGET_KEYS & trigger.keys():
+                g = trigger.get(key)
+                if type(g) is not int: continue
+                _add_reference(mentions, g, i)
+                if is_spawn and key == ppt.TARGET: spawns.setdefault(g, []).append((i, trigger))
+                else: other.add(g)
+            remap = trigger.get(ppt.REMAP_STRING)
+            if remap:
+                parts = [int(p) for p in remap.split(".")]
+                for g in parts: _add_reference(mentions, g, i)
+                other.update(parts[::2])
+                for g in parts[1::2]: spawns.setdefault(g, []).append((i, trigger))
+    return members, mentions, spawns, other
+
+def _redirect(trigger: Trigger, old: int, new: int, pairs: dict[int, int]) -> None:
+    """Spawn new instead of old, remapping the groups of new to those of old"""
+    if trigger[ppt.TARGET] == old: trigger[ppt.TARGET] = new
+    remap = trigger.get(ppt.REMAP_STRING)
+    incoming: dict[int, int] = {}
+    if remap:
+        parts = remap.split(".")
+        parts[1::2] = [str(new) if int(p) == old else p for p in parts[1::2]]
+        incoming = dict(zip(map(int, parts[::2]), map(int, parts[1::2])))
+    # The spawned triggers are remapped once, so compose with what the
+    # duplicate's groups were remapped to by this trigger
+    remapped = util.Remap()
+    for source, target in incoming.items(): remapped.pair(source, target)
+    for source, target in pairs.items(): remapped.pair(source, incoming.get(target, target))
+    if incoming or pairs: trigger[ppt.REMAP_STRING] = remapped.build()
+
+def dedupe_components(components: list[ComponentProtocol], *,
+    roots: Iterable[int] = ()) -> DedupeReport:
+    """
+    Replace structurally identical components with spawns of one shared
+    component (in place). roots: caller groups spawned from outside the
+    triggers (spell callers), never merged away.
+    """
+    report = DedupeReport()
+    candidates: dict[tuple[Any, ...], list[tuple[int, list[int]]]] = {}
+    for i, comp in enumerate(components):
+        if comp.caller < UNKNOWN_START: continue
+        structure = _structure(comp)
+        if structure is not None: candidates.setdefault(structure[0], []).append((i, structure[1]))
+    if all(len(same) == 1 for same in candidates.values()): return report
+
+    members, mentions, spawns, other = _reference_sites(components)
+    other.update(roots)
+    removed: set[int] = set()
+    for same in candidates.values():
+        same = [(i, order) for i, order in same if members.get(order[0]) == i]
+        if len(same) < 2: continue
+        owner, shared_order = same[0]
+        duplicates = DuplicateSet(components[owner])
+        for i, order in same[1:]:
+            comp = components[i]
+            caller = comp.caller
+            pairs = {g: d for g, d in zip(shared_order[1:], order[1:]) if g != d}
+            if caller in other:
+                report.skipped[comp.name] = "caller is used by more than Spawn triggers"
+            elif any(mentions.get(g) != owner for g in pairs):
+                report.skipped[comp.name] = "groups to remap are used by other components"
+            else:
+                callers = {id(t): t for j, t in spawns.get(caller, ()) if j != i}
+                for trigger in callers.values():
+                    _redirect(trigger, caller, duplicates.shared.caller, pairs)
+                duplicates.rewritten += len(callers)
+                duplicates.duplicates.append(comp)
+                removed.add(i)
+        if duplicates.duplicates: report.merged.append(duplicates)
+
+    if removed:
+        components[:] = [c for i, c in enumerate(components) if i not in removed]
+    return report
+
+def print_dedupe_report(report: DedupeReport) -> None:
+    """Print formatted deduplication results to console."""
+    print("\n\033[4m=== COMPONENT DEDUPLICATION ===\033[0m")
+    if not report.merged:
+        print("No structural duplicates")
+    for d in report.merged:
+        print(f"  {d.shared.name}: shared by {len(d.duplicates) + 1} components, "
+              f"{d.rewritten} callers remapped, {d.objects_saved} objects saved")
+    for name, reason in report.skipped.items():
+        print(f"  Kept {name}: {reason}")
+    if report.merged:
+        print(f"Removed {sum(len(d.duplicates) for d in report.merged)} duplicate components, "
+              f"{report.objects_saved} objects saved")
@@ -0,0 +1,261 @@
+"""
+Touhou SCS - Path Compiler Module
+
+Precomputes static MoveBy chains into shared Keyframe paths.
+
+A target whose movement in a component is made only of MoveBy triggers
+doesn't depend on anything at runtime, so its trajectory can be evaluated
+ahead of time. The trajectory is stored once, normalized, as a KEYFRAME_OBJ
+group and each compiled target only needs a single Keyframe Anim trigger.
+"""
+
+from __future__ import annotations
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from touhou_scs import context, enums as enum, utils as util
+from touhou_scs.component import Component, validate_params
+from touhou_scs.types import ComponentProtocol, Trigger
+from touhou_scs.utils import unknown_g
+
+ppt = enum.Properties # shorthand
+
+UNIT_PATH_EXTENT = 30.0
+"""Largest keyframe offset stored in the library (1 block); pos mods scale it back"""
+SAMPLE_RATE = 60
+"""Keyframes per second where overlapping moves have to be sampled"""
+
+class MoveSegment(NamedTuple):
+    start: float
+    t: float
+    dx: float
+    dy: float
+    type: int
+    rate: float
+
+class PathKeyframe(NamedTuple):
+    x: float
+    y: float
+    duration: float
+    """Time to the next keyframe"""
+    type: int = 0
+    rate: float = 1.0
+
+PathShape = tuple[PathKeyframe, ...]
+
+@dataclass
+class PathSavings:
+    """Per component result of compile_move_paths."""
+    paths: int = 0
+    triggers_removed: int = 0
+    keyframe_objects: int = 0
+    """Keyframe objects created for this component (0 when reusing library paths)"""
+    skipped: dict[int, str] = field(default_factory=dict)
+    """Target group -> reason it was not compiled"""
+
+    @property
+    def triggers_per_spawn(self) -> int:
+        """Triggers saved every time the component is spawned"""
+        return self.triggers_removed - self.paths
+
+    @property
+    def net_objects(self) -> int:
+        return self.triggers_removed - self.paths - self.keyframe_objects
+
+
+def _position(segments: list[MoveSegment], time: float, *, include_instant: bool = True):
+    x = y = 0.0
+    for seg in segments:
+        if seg.t == 0:
+            if time > seg.start or (include_instant and time == seg.start):
+                x += seg.dx
+                y += seg.dy
+            continue
+        progress = util.ease(seg.type, seg.rate, (time - seg.start) / seg.t)
+        x += seg.dx * progress
+        y += seg.dy * progress
+    return x, y
+
+def build_path(segments: list[MoveSegment]) -> list[PathKeyframe]:
+    """
+    Evaluate overlapping MoveBy segments into absolute keyframes (time mode).
+
+    Intervals driven by a single move keep its easing (or are linear),
+    anything else is sampled at SAMPLE_RATE with linear keyframes.
+    """
+    t0 = min(seg.start for seg in segments)
+    breakpoints = sorted({round(s.start - t0, 6) for s in segments}
+        | {round(s.start + s.t - t0, 6) for s in segments})
+    shifted = [s._replace(start=round(s.start - t0, 6)) for s in segments]
+
+    path: list[PathKeyframe] = []
+    for i, b in enumerate(breakpoints):
+        before = _position(shifted, b, include_instant=False)
+        after = _position(shifted, b)
+        if before != after:
+            path.append(PathKeyframe(*before, 0))
+        if i == len(breakpoints) - 1:
+            path.append(PathKeyframe(*after, 0))
+            break
+
+        end = breakpoints[i + 1]
+        active = [s for s in shifted if s.t > 0 and s.start < end and s.start + s.t > b]
+        if len(active) == 1 and active[0].start == b and round(b + active[0].t, 6) == end:
+            path.append(PathKeyframe(*after, round(end - b, 6), active[0].type, active[0].rate))
+            continue
+        if len(active) == 1 and active[0].type == enum.Easing.NONE:
+            # Any slice of a linear move is still linear
+            path.append(PathKeyframe(*after, round(end - b, 6)))
+            continue
+        if not active:
+            path.append(PathKeyframe(*after, round(end - b, 6)))
+            continue
+
+        steps = max(1, math.ceil((end - b) * SAMPLE_RATE))
+        times = [round(b + (end - b) * n / steps, 6) for n in range(steps)] + [end]
+        for n in range(steps):
+            point = after if n == 0 else _position(shifted, times[n])
+            path.append(PathKeyframe(*point, round(times[n + 1] - times[n], 6)))
+    return path
+
+def _normalize(path: list[PathKeyframe]) -> tuple[PathShape, float, float]:
+    """Returns the shape plus the time and position mods that restore it."""
+    total = round(sum(k.duration for k in path), 6)
+    extent = max(max(abs(k.x), abs(k.y)) for k in path)
+    shape = tuple(PathKeyframe(
+        round(k.x / extent * UNIT_PATH_EXTENT, 4),
+        round(k.y / extent * UNIT_PATH_EXTENT, 4),
+        round(k.duration / total, 6), k.type, k.rate) for k in path)
+    return shape, total, util.round_to_n_sig_figs(extent / UNIT_PATH_EXTENT, 6)
+
+def _get_keyframe_group(shape: PathShape) -> tuple[int, int]:
+    """Returns (keyframe group, keyframe objects created)"""
+    path_keyframes = context.active().path_keyframes
+    if shape in path_keyframes:
+        return path_keyframes[shape].caller, 0
+
+    new_keyframe_group = Component(f"Keyframe Path<{len(path_keyframes) + 1}>", unknown_g("keyframes"), 6) \
+        .assert_spawn_order(True)
+    for order, k in enumerate(shape, start=1):
+        new_keyframe_group.triggers.append({ #type: ignore
+            ppt.OBJ_ID: enum.ObjectID.KEYFRAME_OBJ,
+            ppt.X: k.x, ppt.Y: k.y,
+            ppt.GROUPS: [new_keyframe_group.caller],
+            ppt.KEYFRAME_OBJ_MODE: 0,  # time mode
+            ppt.KEYFRAME_ID: new_keyframe_group.caller,
+            ppt.CLOSE_LOOP: False,
+            ppt.SCALE: 1.0,
+            ppt.DURATION: k.duration,
+            ppt.ORDER_INDEX: order,
+            ppt.EASING: k.type,
+            ppt.EASING_RATE: k.rate,
+            ppt.LINE_OPACITY: 1.0,
+        })
+    path_keyframes[shape] = new_keyframe_group
+    return new_keyframe_group.caller, len(shape)
+
+def _moves_target(trigger: Trigger) -> int | None:
+    """Target group whose position this trigger changes, if any."""
+    obj_id = trigger[ppt.OBJ_ID]
+    if obj_id in (enum.ObjectID.MOVE, enum.ObjectID.FOLLOW, enum.ObjectID.KEYFRAME_ANIM):
+        return trigger[ppt.TARGET]
+    if obj_id == enum.ObjectID.ROTATE and trigger.get(ppt.ROTATE_CENTER) != trigger[ppt.TARGET]:
+        return trigger[ppt.TARGET]
+    return None
+
+def _ineligible_reason(comp: ComponentProtocol, triggers: list[Trigger]) -> str | None:
+    for trigger in triggers:
+        if trigger[ppt.OBJ_ID] != enum.ObjectID.MOVE:
+            return "moved by a non-Move trigger"
+        if trigger.get(ppt.MOVE_TARGET_MODE) or trigger.get(ppt.MOVE_DIRECTION_MODE):
+            return "dynamic target (MoveTowards/GotoGroup)"
+        if trigger[ppt.GROUPS] != triggers[0][ppt.GROUPS]:
+            return "moves have different groups"
+    if not comp.requireSpawnOrder and len({t[ppt.X] for t in triggers}) > 1:
+        return "timing depends on spawn order"
+    if all(t.get(ppt.DURATION, 0) == 0 for t in triggers):
+        return "only instant moves"
+    return None
+
+def compile_move_paths(components: list[ComponentProtocol], *,
+    min_moves: int = 2) -> dict[str, PathSavings]:
+    """
+    Replace static MoveBy chains with one Keyframe Anim trigger per target.
+
+    A target is eligible when every trigger moving it in a component is a
+    MoveBy and it has at least min_moves of them. Returns savings per component name.
+    """
+    if min_moves < 2:
+        raise ValueError(f"compile_move_paths: min_moves must be at least 2. Got: {min_moves}")
+
+    report: dict[str, PathSavings] = {}
+    for comp in list(components):
+        if any(t[ppt.OBJ_ID] == enum.ObjectID.KEYFRAME_OBJ for t in comp.triggers): continue
+
+        by_target: dict[int, list[Trigger]] = {}
+        for trigger in comp.triggers:
+            target = _moves_target(trigger)
+            if target is not None: by_target.setdefault(target, []).append(trigger)
+
+        savings = PathSavings()
+        for target, triggers in by_target.items():
+            if len(triggers) < min_moves: continue
+            reason = _ineligible_reason(comp, triggers)
+            if reason is not None:
+                savings.skipped[target] = reason
+                continue
+
+            x0 = min(t[ppt.X] for t in triggers)
+            segments = [MoveSegment(
+                round((t[ppt.X] - x0) / enum.PLR_SPEED, 6), t.get(ppt.DURATION, 0),
+                t.get(ppt.MOVE_X, 0), t.get(ppt.MOVE_Y, 0),
+                t.get(ppt.EASING, 0), t.get(ppt.EASING_RATE, 1.0)
+            ) for t in triggers]
+            path = build_path(segments)
+            if all(k.x == 0 and k.y == 0 for k in path):
+                savings.skipped[target] = "no net movement"
+                continue
+
+            shape, time_mod, pos_mod = _normalize(path)
+            keyframe_group, created = _get_keyframe_group(shape)
+
+            validate_params(targets=target, positive=time_mod)
+            first = triggers[0]
+            anim = comp.create_trigger(enum.ObjectID.KEYFRAME_ANIM, x0, target)
+            anim[ppt.GROUPS] = first[ppt.GROUPS]
+            anim[ppt.EDITOR_LAYER] = first[ppt.EDITOR_LAYER]
+            anim[ppt.KEYMAP_ANIM_GID] = keyframe_group
+            anim[ppt.KEYMAP_ANIM_TIME_MOD] = time_mod
+            anim[ppt.KEYMAP_ANIM_POS_X_MOD] = pos_mod
+            anim[ppt.KEYMAP_ANIM_POS_Y_MOD] = pos_mod
+            anim[ppt.KEYMAP_ANIM_ROT_MOD] = 1.0
+            anim[ppt.KEYMAP_ANIM_SCALE_X_MOD] = 1.0
+            anim[ppt.KEYMAP_ANIM_SCALE_Y_MOD] = 1.0
+
+            removed = {id(t) for t in triggers}
+            index = next(i for i, t in enumerate(comp.triggers) if id(t) in removed)
+            comp.triggers[:] = [t for t in comp.triggers if id(t) not in removed]
+            comp.triggers.insert(index, anim)
+
+            savings.paths += 1
+            savings.triggers_removed += len(triggers)
+            savings.keyframe_objects += created
+
+        if savings.paths or savings.skipped: report[comp.name] = savings
+    return report
+
+def print_path_savings(report: dict[str, PathSavings]) -> None:
+    """Print formatted path compiler results to console."""
+    print("\n\033[4m=== PATH COMPILER ===\033[0m")
+    compiled = {name: s for name, s in report.items() if s.paths}
+    if not compiled:
+        print("No eligible move paths")
+    for name, s in compiled.items():
+        print(f"  {name}: {s.paths} path(s), {s.triggers_per_spawn} triggers saved per spawn, "
+              f"{s.net_objects} objects saved")
+
+    reasons = Counter(reason for s in report.values() for reason in s.skipped.values())
+    for reason, count in reasons.items():
+        print(f"  Skipped {count} target(s): {reason}")
@@ -0,0 +1,165 @@
+"""
+Touhou SCS - Peephole Optimizer Module
+
+Rule based clean-up of redundant trigger sequences the builders emit.
+Each component's triggers are walked in X order and every enabled rule
+looks at the current trigger and the last one kept before it, so a rule
+only ever sees triggers that fire back to back:
+
+    from touhou_scs import peephole
+    peephole.RULES["dead_alpha"].enabled = False   # turn a rule off
+    save_all(peephole=True)
+
+Rules only rewrite what can't change what the player sees: merging
+additive moves, dropping no-op moves, instant alphas overwritten in the
+same tick, and Pulse fields left at their Geometry Dash defaults.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Iterable
+
+from touhou_scs import enums as enum
+from touhou_scs.provenance import SOURCE_KEY
+from touhou_scs.types import ComponentProtocol, Trigger
+
+ppt = enum.Properties # shorthand
+
+class Rewrite(Enum):
+    SIMPLIFIED = "simplified"
+    """Trigger changed in place"""
+    REMOVED = "removed"
+    """Trigger dropped (or merged into the previous one)"""
+    REMOVED_PREVIOUS = "removed_previous"
+    """Previous trigger dropped"""
+
+RuleFn = Callable[[ComponentProtocol, Trigger | None, Trigger], Rewrite | None]
+
+@dataclass
+class Rule:
+    name: str
+    apply: RuleFn
+    """(component, previous kept trigger, trigger) -> what it rewrote, None if it didn't match"""
+    enabled: bool = True
+
+
+@dataclass
+class PeepholeReport:
+    counts: Counter[str] = field(default_factory=Counter)
+    """Rule name -> times it fired"""
+    removed: int = 0
+
+    def __add__(self, other: PeepholeReport) -> PeepholeReport:
+        return PeepholeReport(self.counts + other.counts, self.removed + other.removed)
+
+
+_LAYOUT_KEYS = frozenset((ppt.Y, SOURCE_KEY))
+
+def _same_except(a: Trigger, b: Trigger, keys: frozenset[str]) -> bool:
+    """a and b have the same fields and values, apart from keys (and layout/debug info)"""
+    ignored = keys | _LAYOUT_KEYS
+    if a.keys() - ignored != b.keys() - ignored: return False
+    return all(a[k] == b[k] for k in a.keys() - ignored) # type: ignore
+
+def _is_move_by(trigger: Trigger) -> bool:
+    return (trigger[ppt.OBJ_ID] == enum.ObjectID.MOVE and ppt.MOVE_X in trigger
+        and not trigger.get(ppt.MOVE_TARGET_MODE) and not trigger.get(ppt.MOVE_DIRECTION_MODE))
+
+
+_MOVE_OFFSET = frozenset((ppt.MOVE_X, ppt.MOVE_Y))
+
+def merge_moves(comp: ComponentProtocol, prev: Trigger | None, trigger: Trigger) -> Rewrite | None:
+    """MoveBys in the same tick with the same target, duration and easing add up"""
+    if prev is None or not _is_move_by(trigger) or not _is_move_by(prev): return None
+    if prev[ppt.X] != trigger[ppt.X] or not _same_except(prev, trigger, _MOVE_OFFSET): return None
+    prev[ppt.MOVE_X] += trigger[ppt.MOVE_X] # type: ignore
+    prev[ppt.MOVE_Y] += trigger[ppt.MOVE_Y] # type: ignore
+    return Rewrite.REMOVED
+
+def zero_move(comp: ComponentProtocol, prev: Trigger | None, trigger: Trigger) -> Rewrite | None:
+    """MoveBy of 0,0 (e.g. SetPosition to the origin)"""
+    if not _is_move_by(trigger) or trigger[ppt.MOVE_X] or trigger[ppt.MOVE_Y]: return None # type: ignore
+    return Rewrite.REMOVED
+
+def dead_alpha(comp: ComponentProtocol, prev: Trigger | None, trigger: Trigger) -> Rewrite | None:
+    """
+    Instant Alpha overwritten by another instant Alpha on the same target in
+    the same tick. Only in spawn ordered components, where X decides which runs last.
+    """
+    if prev is None or comp.requireSpawnOrder is not True: return None
+    if not (prev[ppt.OBJ_ID] == trigger[ppt.OBJ_ID] == enum.ObjectID.ALPHA): return None
+    if prev[ppt.X] != trigger[ppt.X] or prev[ppt.TARGET] != trigger[ppt.TARGET]: return None
+    if prev[ppt.DURATION] != 0 or trigger[ppt.DURATION] != 0: return None # type: ignore
+    return Rewrite.REMOVED_PREVIOUS
+
+def pulse_defaults(comp: ComponentProtocol, prev: Trigger | None, trigger: Trigger) -> Rewrite | None:
+    """Pulse fields set to what Geometry Dash uses when they're missing"""
+    if trigger[ppt.OBJ_ID] != enum.ObjectID.PULSE: return None
+    defaults = [k for k, v in enum.GD_DEFAULTS[enum.ObjectID.PULSE].items() if k in trigger and trigger[k] == v] # type: ignore
+    if not defaults: return None
+    for key in defaults: del trigger[key] # type: ignore
+    return Rewrite.SIMPLIFIED
+
+
+RULES: dict[str, Rule] = {rule.name: rule for rule in (
+    Rule("merge_moves", merge_moves),
+    Rule("zero_move", zero_move),
+    Rule("dead_alpha", dead_alpha),
+    Rule("pulse_defaults", pulse_defaults),
+)}
+"""Rules in the order they are tried on each trigger"""
+
+
+def optimize_component(comp: ComponentProtocol, rules: Iterable[Rule]) -> PeepholeReport:
+    report = PeepholeReport()
+    rules = list(rules)
+    kept: list[Trigger] = []
+    removed: set[int] = set()
+    for trigger in sorted(comp.triggers, key=lambda t: t[ppt.X]):
+        for rule in rules:
+            result = rule.apply(comp, kept[-1] if kept else None, trigger)
+            if result is None: continue
+            report.counts[rule.name] += 1
+            if result is Rewrite.REMOVED:
+                removed.add(id(trigger))
+                break
+            if result is Rewrite.REMOVED_PREVIOUS:
+                removed.add(id(kept.pop()))
+        else:
+            kept.append(trigger)
+
+    if removed:
+        comp.triggers[:] = [t for t in comp.triggers if id(t) not in removed]
+        report.removed = len(removed)
+    return report
+
+def optimize_components(components: list[ComponentProtocol], *,
+    rules: Iterable[str] | None = None) -> PeepholeReport:
+    """
+    Run the peephole rules over every component (in place).
+    rules: names of the rules to run, default every enabled rule in RULES.
+    """
+    if rules is None: selected = [r for r in RULES.values() if r.enabled]
+    else:
+        names = set(rules)
+        unknown = names - RULES.keys()
+        if unknown: raise ValueError(f"Unknown peephole rules: {sorted(unknown)}. Available: {list(RULES)}")
+        selected = [r for r in RULES.values() if r.name in names]
+
+    report = PeepholeReport()
+    if not selected: return report
+    for comp in components:
+        if comp.triggers: report += optimize_component(comp, selected)
+    return report
+
+def print_peephole_report(report: PeepholeReport) -> None:
+    """Print formatted peephole optimizer results to console."""
+    print("\n\033[4m=== PEEPHOLE OPTIMIZER ===\033[0m")
+    if not report.counts:
+        print("No redundant triggers")
+    for name, count in report.counts.most_common():
+        print(f"  {name}: {count}")
+    if report.removed:
+        print(f"Removed {report.removed} triggers")
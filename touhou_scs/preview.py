@@ -0,0 +1,547 @@
+"""
+Touhou SCS - Preview Module
+
+Offline renderer for checking pattern shapes without exporting to GD.
+
+Runs a component's triggers (spawns with remaps, Multitarget bases, pointer
+circles, moves, follows, toggles and keyframe paths) on a 240 ticks/s clock
+and writes the toggled-on objects as PNG frames or an animated GIF.
+Only the standard library is used: frames are palette bytearrays drawn with
+row slice assignment, PNG goes through zlib and GIF uses fixed width LZW.
+
+Rendering steps every object forward tick by tick: finished moves are
+folded into a settled position once, so a frame costs one term per move
+still running instead of replaying every object's whole move history.
+
+Run it before save_all, spreading moves trigger X positions.
+"""
+
+from __future__ import annotations
+import heapq
+import math
+import os
+import struct
+import zlib
+from bisect import bisect_right
+from typing import Any, NamedTuple
+
+from touhou_scs import context, enums as enum, lib, utils as util
+from touhou_scs.component import Component
+from touhou_scs.types import ComponentProtocol, Trigger
+
+ppt = enum.Properties # shorthand
+
+TICKS_PER_SECOND = 240
+DOWNSAMPLE_FPS = 60
+
+GUIDER_RADIUS = 300.0
+GUIDER_START_ANGLE = 270.0
+"""Pointer 1 of a GuiderCircle points down, the rest go counter-clockwise (level layout)"""
+
+DEFAULT_POSITIONS: dict[int, tuple[float, float]] = {
+    enum.GAME_BOTTOM_LEFT: (0, 0),
+    enum.GAME_CENTER: (180, 210),
+    enum.SCREEN_CENTER: (180, 210),
+    enum.PLR: (180, 60),
+    enum.NORTH_GROUP: (180, 100000),
+}
+"""Positions relative to the bottom left of the 360x420 game window"""
+
+DEFAULT_VIEWPORT = (0.0, 0.0, 360.0, 420.0)
+"""(min_x, min_y, max_x, max_y) of the game window"""
+
+PALETTE = (
+    (12, 12, 20),    # background
+    (255, 255, 255), # toggled on objects
+    (255, 80, 80),   # highlighted groups (player)
+)
+
+GIF_MIN_DELAY = 2
+"""Centiseconds, most viewers slow down anything faster"""
+
+class _Move(NamedTuple):
+    start: int
+    ticks: int
+    dx: float
+    dy: float
+    type: int
+    rate: float
+
+class _Follow(NamedTuple):
+    leader: list[int]
+    start: int
+    end: int
+    x_mod: float
+    y_mod: float
+
+
+def _mapped(remap: dict[int, int], group: int) -> int:
+    return remap.get(group, group)
+
+def _shared_components() -> list[Component]:
+    """Library components patterns spawn into, even if all_components was cleared."""
+    ctx = context.active()
+    shared = [*ctx.binary_bases.values(), *ctx.staggered_bases.values(),
+        *ctx.follow_comps.values(), *ctx.scale_keyframes.values(), *ctx.path_keyframes.values()]
+    if ctx.setup_pointercircle is not None: shared.append(ctx.setup_pointercircle)
+    return shared
+
+
+class Simulation:
+    """
+    Trigger simulation of every registered component.
+
+    Objects are created on first use: one per group at DEFAULT_POSITIONS (or
+    the origin), GuiderCircles get their 360 pointers plus center.
+    Stop/Pause, Alpha, Pulse, Scale and item triggers don't affect positions and are skipped.
+    """
+
+    def __init__(self, *,
+        positions: dict[int, tuple[float, float]] | None = None,
+        circles: tuple[lib.GuiderCircle, ...] = (lib.circle1,)):
+        self.initial: list[tuple[float, float]] = []
+        self.group_objects: dict[int, list[int]] = {}
+        self.moves: list[list[_Move]] = []
+        self.follows: list[list[_Follow]] = []
+        self.toggles: dict[int, list[tuple[int, bool]]] = {}
+        self.end_tick = 0
+
+        self._positions = {**DEFAULT_POSITIONS, **(positions or {})}
+        for gc in circles: self._add_circle(gc)
+
+        self._by_group: dict[int, list[Trigger]] = {}
+        self._keyframes: dict[int, list[Trigger]] = {}
+
+        self._queue: list[tuple[int, int, Trigger, dict[int, int]]] = []
+        self._seq = 0
+        self._pending: list[tuple[Trigger, dict[int, int]]] = []
+
+        self._tick = -1
+        """Tick the stepping state is at (step), -1 before the first step"""
+        self._settled: list[tuple[float, float]] = []
+        """Initial position plus every move finished by _tick"""
+        self._running: list[list[_Move]] = []
+        self._starts: list[tuple[int, int, _Move]] = []
+        """(start, object, move) of every move, latest first"""
+        self._ends: list[tuple[int, int, int, _Move]] = []
+        """Heap of (end, seq, object, move) of the running moves"""
+        self._toggle_events: list[tuple[int, int, int, bool]] = []
+        """(tick, order, object, on) of every Toggle, latest first"""
+        self._shown: dict[int, None] = {}
+        self._follow_leads: dict[tuple[int, int], tuple[float, float]] = {}
+        """(id(follow), its start or end tick) -> leader center then"""
+        self._current: dict[int, tuple[float, float]] = {}
+
+    def _add_object(self, x: float, y: float, groups: list[int]) -> int:
+        obj = len(self.initial)
+        self.initial.append((x, y))
+        self.moves.append([])
+        self.follows.append([])
+        for g in groups: self.group_objects.setdefault(g, []).append(obj)
+        return obj
+
+    def _add_circle(self, gc: lib.GuiderCircle):
+        cx, cy = self._positions.get(gc.center, (0.0, 0.0))
+        self._add_object(cx, cy, [gc.center] if gc.center == gc.all else [gc.center, gc.all])
+        for i, group in gc.groups.items():
+            angle = math.radians(GUIDER_START_ANGLE + i - 1)
+            self._add_object(cx + GUIDER_RADIUS * math.cos(angle),
+                cy + GUIDER_RADIUS * math.sin(angle), [group, gc.all])
+
+    def _index(self, comp: ComponentProtocol):
+        if not comp.triggers: return
+        if all(t[ppt.OBJ_ID] == enum.ObjectID.KEYFRAME_OBJ for t in comp.triggers):
+            self._keyframes[comp.caller] = sorted(comp.triggers, key=lambda t: t.get(ppt.ORDER_INDEX, 0))
+            return
+        for trigger in comp.triggers:
+            for g in trigger[ppt.GROUPS]:
+                self._by_group.setdefault(g, []).append(trigger)
+
+    def objects(self, group: int) -> list[int]:
+        if group not in self.group_objects:
+            self._add_object(*self._positions.get(group, (0.0, 0.0)), [group])
+        return self.group_objects[group]
+
+    # ===========================================================
+    # POSITIONS
+    # ===========================================================
+
+    def position(self, obj: int, tick: float) -> tuple[float, float]:
+        x, y = self.initial[obj]
+        for m in self.moves[obj]:
+            if tick < m.start: continue
+            if tick >= m.start + m.ticks:
+                x += m.dx
+                y += m.dy
+                continue
+            progress = util.ease(m.type, m.rate, (tick - m.start) / m.ticks)
+            x += m.dx * progress
+            y += m.dy * progress
+        for f in self.follows[obj]:
+            if tick <= f.start: continue
+            lx0, ly0 = self.center(f.leader, f.start)
+            lx1, ly1 = self.center(f.leader, min(tick, f.end))
+            x += (lx1 - lx0) * f.x_mod
+            y += (ly1 - ly0) * f.y_mod
+        return x, y
+
+    def center(self, objs: list[int], tick: float) -> tuple[float, float]:
+        if len(objs) == 1: return self.position(objs[0], tick)
+        points = [self.position(o, tick) for o in objs]
+        return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+    # ===========================================================
+    # STEPPING
+    # ===========================================================
+
+    def step(self, tick: int) -> None:
+        """
+        Advance the rendering state to tick (after run). current() and shown()
+        then answer for tick. Stepping backwards starts over from tick 0.
+        """
+        if tick < self._tick: self._tick = -1
+        if self._tick < 0:
+            self._settled = list(self.initial)
+            self._running = [[] for _ in self.moves]
+            self._starts = sorted(((m.start, obj, m) for obj, moves in enumerate(self.moves) for m in moves),
+                key=lambda s: s[0], reverse=True)
+            self._ends = []
+            self._toggle_events = sorted(((t, i, obj, on) for obj, history in self.toggles.items()
+                for i, (t, on) in enumerate(history)), key=lambda e: e[:3], reverse=True)
+            self._shown = {}
+        self._tick = tick
+        self._current.clear()
+
+        starts, ends = self._starts, self._ends
+        while starts and starts[-1][0] <= tick:
+            start, obj, m = starts.pop()
+            self._running[obj].append(m)
+            self._seq += 1
+            heapq.heappush(ends, (start + m.ticks, self._seq, obj, m))
+        while ends and ends[0][0] <= tick:
+            _, _, obj, m = heapq.heappop(ends)
+            self._running[obj].remove(m)
+            x, y = self._settled[obj]
+            self._settled[obj] = (x + m.dx, y + m.dy)
+
+        events = self._toggle_events
+        while events and events[-1][0] <= tick:
+            _, _, obj, on = events.pop()
+            if on: self._shown[obj] = None
+            else: self._shown.pop(obj, None)
+
+    def shown(self) -> list[int]:
+        """visible() at the tick of the last step."""
+        return list(self._shown)
+
+    def positions(self, objs: list[int]) -> list[tuple[float, float]]:
+        """current() of each of objs"""
+        settled, running, follows = self._settled, self._running, self.follows
+        return [settled[o] if not running[o] and not follows[o] else self.current(o) for o in objs]
+
+    def current(self, obj: int) -> tuple[float, float]:
+        """Position of obj at the tick of the last step."""
+        cached = self._current.get(obj)
+        if cached is not None: return cached
+        tick = self._tick
+        x, y = self._settled[obj]
+        for m in self._running[obj]:
+            progress = util.ease(m.type, m.rate, (tick - m.start) / m.ticks)
+            x += m.dx * progress
+            y += m.dy * progress
+        for f in self.follows[obj]:
+            if tick <= f.start: continue
+            start = self._follow_lead(f, f.start)
+            lx, ly = self._current_center(f.leader) if tick < f.end else self._follow_lead(f, f.end)
+            x += (lx - start[0]) * f.x_mod
+            y += (ly - start[1]) * f.y_mod
+        self._current[obj] = (x, y)
+        return x, y
+
+    def _follow_lead(self, f: _Follow, tick: int) -> tuple[float, float]:
+        key = (id(f), tick)
+        lead = self._follow_leads.get(key)
+        if lead is None: lead = self._follow_leads[key] = self.center(f.leader, tick)
+        return lead
+
+    def _current_center(self, objs: list[int]) -> tuple[float, float]:
+        if len(objs) == 1: return self.current(objs[0])
+        points = [self.current(o) for o in objs]
+        return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+    def visible(self, tick: int) -> list[int]:
+        """Objects whose last Toggle at or before tick turned them on."""
+        result: list[int] = []
+        for obj, history in self.toggles.items():
+            i = bisect_right(history, tick, key=lambda h: h[0])
+            if i and history[i - 1][1]: result.append(obj)
+        return result
+
+    # ===========================================================
+    # EXECUTION
+    # ===========================================================
+
+    def run(self, component: Component, duration: float) -> Simulation:
+        """Spawn component at tick 0 (with its spawn order) and simulate 'duration' seconds."""
+        self.end_tick = round(duration * TICKS_PER_SECOND)
+        for comp in {id(c): c for c in [*lib.all_components, *_shared_components()]}.values():
+            self._index(comp)
+        for triggers in self._by_group.values(): triggers.sort(key=lambda t: t[ppt.X])
+        self._spawn(0, component.caller, {}, bool(component.requireSpawnOrder))
+
+        while self._queue:
+            tick = self._queue[0][0]
+            if tick > self.end_tick: break
+            while self._queue and self._queue[0][0] == tick:
+                _, _, trigger, remap = heapq.heappop(self._queue)
+                self._execute(tick, trigger, remap)
+            self._resolve_pending(tick)
+        return self
+
+    def _spawn(self, tick: int, group: int, remap: dict[int, int], ordered: bool):
+        triggers = self._by_group.get(group, [])
+        if not triggers: return
+        x0 = triggers[0][ppt.X]
+        for trigger in triggers:
+            offset = round((trigger[ppt.X] - x0) / enum.PLR_SPEED * TICKS_PER_SECOND) if ordered else 0
+            self._seq += 1
+            heapq.heappush(self._queue, (tick + offset, self._seq, trigger, remap))
+
+    def _execute(self, tick: int, trigger: Trigger, remap: dict[int, int]):
+        obj_id = trigger[ppt.OBJ_ID]
+        target = _mapped(remap, trigger[ppt.TARGET])
+
+        if obj_id == enum.ObjectID.SPAWN:
+            child = {} if trigger.get(ppt.RESET_REMAP) else dict(remap)
+            if ppt.REMAP_STRING in trigger:
+                for source, dest in util.translate_remap_string(trigger[ppt.REMAP_STRING])[0].items():
+                    child[source] = remap.get(dest, dest)
+            delay = round(trigger.get(ppt.SPAWN_DELAY, 0) * TICKS_PER_SECOND)
+            self._spawn(tick + delay, target, child, bool(trigger.get(ppt.SPAWN_ORDERED)))
+        elif obj_id == enum.ObjectID.TOGGLE:
+            for obj in self.objects(target):
+                self.toggles.setdefault(obj, []).append((tick, bool(trigger.get(ppt.ACTIVATE_GROUP))))
+        elif obj_id == enum.ObjectID.MOVE:
+            if trigger.get(ppt.MOVE_TARGET_MODE) or trigger.get(ppt.MOVE_DIRECTION_MODE):
+                self._pending.append((trigger, remap))
+            else:
+                self._add_move(tick, target, trigger, trigger.get(ppt.MOVE_X, 0), trigger.get(ppt.MOVE_Y, 0))
+        elif obj_id == enum.ObjectID.FOLLOW:
+            leader = _mapped(remap, trigger.get(ppt.FOLLOW_GROUP, 0))
+            ticks = round(trigger.get(ppt.DURATION, 0) * TICKS_PER_SECOND)
+            follow = _Follow(self.objects(leader), tick, tick + ticks,
+                trigger.get(ppt.FOLLOW_X_MOD, 1.0), trigger.get(ppt.FOLLOW_Y_MOD, 1.0))
+            for obj in self.objects(target): self.follows[obj].append(follow)
+        elif obj_id == enum.ObjectID.ROTATE and not trigger.get(ppt.ROTATE_AIM_MODE):
+            self._rotate(tick, target, trigger, remap)
+        elif obj_id == enum.ObjectID.KEYFRAME_ANIM:
+            self._keyframe_path(tick, target, trigger)
+
+    def _add_move(self, tick: int, target: int, trigger: Trigger, dx: float, dy: float, *,
+        objs: list[int] | None = None):
+        move = _Move(tick, round(trigger.get(ppt.DURATION, 0) * TICKS_PER_SECOND), dx, dy,
+            trigger.get(ppt.EASING, 0), trigger.get(ppt.EASING_RATE, 1.0))
+        for obj in objs if objs is not None else self.objects(target):
+            self.moves[obj].append(move)
+
+    def _resolve_pending(self, tick: int):
+        """
+        Resolve position dependent moves of this tick.
+
+        A move reading a group waits for this tick's moves of that group
+        (e.g. bullets aim at pointers that are placed on the same tick).
+        """
+        pending = [(trigger,
+            _mapped(remap, trigger[ppt.TARGET]),
+            # Location (GotoGroup) and direction (MoveTowards) share a key
+            _mapped(remap, trigger.get(ppt.MOVE_TARGET_LOCATION, 0))
+        ) for trigger, remap in self._pending]
+        self._pending.clear()
+
+        while pending:
+            moving = [set(self.objects(target)) for _, target, _ in pending]
+            chosen = 0
+            for i, (_, _, other) in enumerate(pending):
+                read = self.objects(other)
+                if not any(obj in moving[j] for obj in read for j in range(len(pending)) if j != i):
+                    chosen = i
+                    break
+            trigger, target, other = pending.pop(chosen)
+
+            sx, sy = self.center(self.objects(target), tick)
+            ox, oy = self.center(self.objects(other), tick)
+            if trigger.get(ppt.MOVE_TARGET_MODE):
+                self._add_move(tick, target, trigger, ox - sx, oy - sy)
+                continue
+            dist = math.hypot(ox - sx, oy - sy)
+            if dist == 0: continue
+            scale = trigger.get(ppt.MOVE_DIRECTION_MODE_DISTANCE, 0) / dist
+            self._add_move(tick, target, trigger, (ox - sx) * scale, (oy - sy) * scale)
+
+    def _rotate(self, tick: int, target: int, trigger: Trigger, remap: dict[int, int]):
+        """Rotation moves objects along the chord, close enough for previews."""
+        center = _mapped(remap, trigger.get(ppt.ROTATE_CENTER, target))
+        cx, cy = self.center(self.objects(center), tick)
+        angle = -math.radians(trigger.get(ppt.ROTATE_ANGLE, 0)) # clockwise is positive
+        cos, sin = math.cos(angle), math.sin(angle)
+        for obj in self.objects(target):
+            x, y = self.position(obj, tick)
+            rx = cx + (x - cx) * cos - (y - cy) * sin
+            ry = cy + (x - cx) * sin + (y - cy) * cos
+            if (rx, ry) != (x, y): self._add_move(tick, target, trigger, rx - x, ry - y, objs=[obj])
+
+    def _keyframe_path(self, tick: int, target: int, trigger: Trigger):
+        keyframes = self._keyframes.get(trigger.get(ppt.KEYMAP_ANIM_GID, 0), [])
+        time_mod = trigger.get(ppt.KEYMAP_ANIM_TIME_MOD, 1.0)
+        start = float(tick)
+        for k, nxt in zip(keyframes, keyframes[1:]):
+            ticks = k.get(ppt.DURATION, 0) * time_mod * TICKS_PER_SECOND
+            move = _Move(round(start), round(ticks),
+                (nxt[ppt.X] - k[ppt.X]) * trigger.get(ppt.KEYMAP_ANIM_POS_X_MOD, 1.0),
+                (nxt.get(ppt.Y, 0) - k.get(ppt.Y, 0)) * trigger.get(ppt.KEYMAP_ANIM_POS_Y_MOD, 1.0),
+                k.get(ppt.EASING, 0), k.get(ppt.EASING_RATE, 1.0))
+            if move.dx or move.dy:
+                for obj in self.objects(target): self.moves[obj].append(move)
+            start += ticks
+
+
+# ===========================================================
+#
+# RASTERIZER
+#
+# ===========================================================
+
+def _disc_spans(radius: int) -> list[tuple[int, int]]:
+    """(row offset, half width) for each row of a filled disc."""
+    return [(dy, int(math.sqrt(radius * radius - dy * dy))) for dy in range(-radius, radius + 1)]
+
+def rasterize(points: list[tuple[float, float]], *,
+    viewport: tuple[float, float, float, float] = DEFAULT_VIEWPORT, scale: float = 1.0,
+    radius: int = 3, color: int = 1, canvas: bytearray | None = None) -> bytearray:
+    """Draw discs at game positions into a palette canvas (row-major, top row first)."""
+    min_x, min_y, max_x, max_y = viewport
+    width = round((max_x - min_x) * scale)
+    height = round((max_y - min_y) * scale)
+    if canvas is None: canvas = bytearray(width * height)
+
+    spans = _disc_spans(radius)
+    fill = bytes([color]) * (2 * radius + 1)
+    # Discs clear of the edges: (start, end, pixels) relative to the center pixel
+    inner = [(dy * width - half, dy * width + half + 1, fill[:2 * half + 1]) for dy, half in spans]
+    for x, y in points:
+        px = round((x - min_x) * scale)
+        py = height - 1 - round((y - min_y) * scale)
+        if radius <= px < width - radius and radius <= py < height - radius:
+            center = py * width + px
+            for start, end, pixels in inner: canvas[center + start:center + end] = pixels
+            continue
+        if px < -radius or px >= width + radius or py < -radius or py >= height + radius: continue
+        for dy, half in spans:
+            row = py + dy
+            if not 0 <= row < height: continue
+            x0 = max(px - half, 0)
+            x1 = min(px + half + 1, width)
+            if x0 < x1:
+                offset = row * width
+                canvas[offset + x0:offset + x1] = fill[:x1 - x0]
+    return canvas
+
+def render(sim: Simulation, *, downsample: bool = False,
+    viewport: tuple[float, float, float, float] = DEFAULT_VIEWPORT, scale: float = 1.0,
+    radius: int = 3, highlight: tuple[int, ...] = (enum.PLR,)) -> list[bytearray]:
+    """One frame per tick, or per 60 fps frame when downsampling."""
+    step = TICKS_PER_SECOND // DOWNSAMPLE_FPS if downsample else 1
+    marked = [obj for g in highlight for obj in sim.group_objects.get(g, [])]
+
+    frames: list[bytearray] = []
+    for tick in range(0, sim.end_tick + 1, step):
+        sim.step(tick)
+        canvas = rasterize(sim.positions(sim.shown()),
+            viewport=viewport, scale=scale, radius=radius)
+        if marked:
+            rasterize(sim.positions(marked), viewport=viewport,
+                scale=scale, radius=radius, color=2, canvas=canvas)
+        frames.append(canvas)
+    return frames
+
+
+# ===========================================================
+#
+# ENCODERS
+#
+# ===========================================================
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def write_png(filename: str, pixels: bytearray, width: int, height: int,
+    palette: tuple[tuple[int, int, int], ...] = PALETTE) -> None:
+    """8-bit palette PNG."""
+    raw = b"".join(b"\x00" + pixels[row * width:(row + 1) * width] for row in range(height))
+    with open(filename, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)))
+        file.write(_png_chunk(b"PLTE", b"".join(bytes(c) for c in palette)))
+        file.write(_png_chunk(b"IDAT", zlib.compress(raw, 6)))
+        file.write(_png_chunk(b"IEND", b""))
+
+_GIF_CODE_SIZE = 7
+_GIF_RUN = 125
+"""Pixels between clear codes, keeps every LZW code exactly 8 bits wide"""
+
+def _gif_lzw(pixels: bytearray) -> bytes:
+    clear = bytes([1 << _GIF_CODE_SIZE])
+    end = bytes([(1 << _GIF_CODE_SIZE) + 1])
+    codes = clear + clear.join(bytes(pixels[i:i + _GIF_RUN]) for i in range(0, len(pixels), _GIF_RUN)) + end
+    blocks = b"".join(bytes([len(codes[i:i + 255])]) + codes[i:i + 255] for i in range(0, len(codes), 255))
+    return bytes([_GIF_CODE_SIZE]) + blocks + b"\x00"
+
+def write_gif(filename: str, frames: list[bytearray], width: int, height: int, fps: int,
+    palette: tuple[tuple[int, int, int], ...] = PALETTE) -> int:
+    """Looping GIF; frames faster than GIF_MIN_DELAY are dropped. Returns frames written."""
+    table = b"".join(bytes(c) for c in palette)
+    table += b"\x00" * (3 * (1 << _GIF_CODE_SIZE) - len(table))
+
+    written = 0
+    shown_cs = 0
+    with open(filename, "wb") as file:
+        file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF0 | (_GIF_CODE_SIZE - 1), 0, 0))
+        file.write(table)
+        file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+        for i, frame in enumerate(frames):
+            next_cs = (i + 1) * 100 // fps
+            if next_cs - shown_cs < GIF_MIN_DELAY and i != len(frames) - 1: continue
+            file.write(b"\x21\xF9\x04\x00" + struct.pack("<H", next_cs - shown_cs) + b"\x00\x00")
+            file.write(b"\x2C" + struct.pack("<HHHHB", 0, 0, width, height, 0))
+            file.write(_gif_lzw(frame))
+            shown_cs = next_cs
+            written += 1
+        file.write(b"\x3B")
+    return written
+
+
+def preview(component: Component, filename: str, *, duration: float,
+    downsample: bool = False, positions: dict[int, tuple[float, float]] | None = None,
+    viewport: tuple[float, float, float, float] = DEFAULT_VIEWPORT, scale: float = 1.0,
+    radius: int = 3, **kwargs: Any) -> int:
+    """
+    Simulate component for 'duration' seconds and write it to disk.
+
+    filename: '.gif' for an animated GIF, anything else is a directory of PNG frames
+    downsample: 60 fps instead of one frame per tick
+    positions: Starting positions of groups (e.g. emitters), see DEFAULT_POSITIONS
+    Returns the number of frames written.
+    """
+    sim = Simulation(positions=positions, **kwargs).run(component, duration)
+    frames = render(sim, downsample=downsample, viewport=viewport, scale=scale, radius=radius)
+    width = round((viewport[2] - viewport[0]) * scale)
+    height = round((viewport[3] - viewport[1]) * scale)
+
+    if filename.endswith(".gif"):
+        fps = DOWNSAMPLE_FPS if downsample else TICKS_PER_SECOND
+        return write_gif(filename, frames, width, height, fps)
+
+    os.makedirs(filename, exist_ok=True)
+    for i, frame in enumerate(frames):
+        write_png(os.path.join(filename, f"frame_{i:04d}.png"), frame, width, height)
+    return len(frames)
@@ -0,0 +1,146 @@
+"""
+Touhou SCS - Provenance Module
+
+Records which line of the build script created each trigger, so a trigger
+found with debug.js can be traced back to the code that made it.
+
+    from touhou_scs import provenance
+    provenance.enable()   # before building components
+    ...
+    save_all()            # also writes triggers.provenance.json
+
+The sidecar maps trigger indices in the export to source locations:
+{"sites": ["main.py:154 in <module>", ...], "triggers": {"0": 0, ...}}
+
+enable() wraps Component.create_trigger and disable() puts the plain method
+back, so there is no cost while disabled. A trigger's location is the first
+stack frame outside touhou_scs (library internals like Multitarget bases
+resolve to the script line that asked for them). Locations are interned per
+call site and stored in the trigger as an index under SOURCE_KEY, which
+save_all strips from the export. enable(every=N) only records every Nth
+trigger for very large builds.
+"""
+
+from __future__ import annotations
+import inspect
+import os
+from types import CodeType, FrameType
+from typing import Callable, Final
+
+import orjson
+
+from touhou_scs.component import Component
+from touhou_scs.types import Trigger
+
+SOURCE_KEY: Final = "_src"
+"""Trigger key holding the source site index (never exported)"""
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+_sites: list[str] = []
+_site_ids: dict[str, int] = {}
+_call_sites: dict[tuple[int, int], int] = {}
+"""(id(code), f_lasti) -> site index"""
+_call_site_codes: list[CodeType] = []
+"""Keeps ids in _call_sites from being reused"""
+_internal_files: dict[str, bool] = {}
+
+_create_trigger: Callable[..., Trigger] | None = None
+"""Original Component.create_trigger while enabled"""
+_every = 1
+_countdown = 1
+
+
+def enabled() -> bool:
+    return _create_trigger is not None
+
+def enable(every: int = 1) -> None:
+    """Start recording trigger source locations (every Nth trigger)."""
+    global _create_trigger, _every, _countdown
+    if every < 1:
+        raise ValueError(f"provenance.enable: every must be >= 1. Got: {every}")
+    _every = _countdown = every
+    if _create_trigger is None:
+        _create_trigger = Component.create_trigger
+        Component.create_trigger = _recording_create_trigger
+
+def disable() -> None:
+    global _create_trigger
+    if _create_trigger is not None:
+        Component.create_trigger = _create_trigger
+        _create_trigger = None
+
+
+def _site(frame: FrameType | None) -> int | None:
+    """Interned location of the first frame outside touhou_scs."""
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        internal = _internal_files.get(filename)
+        if internal is None:
+            internal = _internal_files[filename] = os.path.abspath(filename).startswith(_PACKAGE_DIR)
+        if not internal: break
+        frame = frame.f_back
+    if frame is None: return None
+
+    # f_lineno scans the line table and hashing a code object hashes its
+    # contents, both cost more than the walk on big scripts
+    code = frame.f_code
+    filename = code.co_filename
+    key = (id(code), frame.f_lasti)
+    site = _call_sites.get(key)
+    if site is None:
+        try:
+            path = os.path.relpath(filename)
+        except ValueError: # other drive on Windows
+            path = filename
+        location = f"{path}:{frame.f_lineno} in {code.co_name}"
+        site = _site_ids.get(location)
+        if site is None:
+            site = _site_ids[location] = len(_sites)
+            _sites.append(location)
+        _call_sites[key] = site
+        _call_site_codes.append(code)
+    return site
+
+def _recording_create_trigger(self: Component, obj_id: int, x: float, target: int) -> Trigger:
+    global _countdown
+    assert _create_trigger is not None
+    trigger = _create_trigger(self, obj_id, x, target)
+    _countdown -= 1
+    if _countdown == 0:
+        _countdown = _every
+        frame = inspect.currentframe()
+        site = _site(frame and frame.f_back)
+        if site is not None: trigger[SOURCE_KEY] = site
+    return trigger
+
+
+def source(trigger: Trigger) -> str | None:
+    """Recorded location of a trigger, if any."""
+    site = trigger.get(SOURCE_KEY)
+    return None if site is None else _sites[site]
+
+def detach(triggers: list[Trigger]) -> dict[int, int]:
+    """
+    Remove SOURCE_KEY from triggers before serializing.
+    Returns trigger index -> site index, put it back with attach().
+    """
+    sources: dict[int, int] = {}
+    for index, trigger in enumerate(triggers):
+        site = trigger.pop(SOURCE_KEY, None)
+        if site is not None: sources[index] = site
+    return sources
+
+def attach(triggers: list[Trigger], sources: dict[int, int]) -> None:
+    for index, site in sources.items():
+        triggers[index][SOURCE_KEY] = site
+
+def sidecar_path(filename: str) -> str:
+    root, ext = os.path.splitext(filename)
+    if ext == ".scsb": ext = ".json" # the sidecar itself is always JSON
+    return f"{root}.provenance{ext or '.json'}"
+
+def write_sidecar(sources: dict[int, int], filename: str) -> None:
+    """Write the provenance file next to the export 'filename'."""
+    with open(sidecar_path(filename), "wb") as file:
+        file.write(orjson.dumps({"sites": _sites, "triggers": sources}, option=orjson.OPT_NON_STR_KEYS))
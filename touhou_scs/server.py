@@ -0,0 +1,273 @@
+"""
+Touhou SCS - Query Server Module
+
+Local HTTP server for the trigger debugger, for exports too large to embed
+in debug/report.html:
+
+    python -m touhou_scs.server [triggers.json] [--port 8765]
+
+Loads the export (.json or .scsb) and its provenance sidecar once, indexes
+it (touhou_scs.index) and serves the debugger page, whose searches become
+paginated queries instead of scans over an embedded copy of every trigger:
+
+    /api/summary                      counts and debug/enums.json
+    /api/groups?offset=&limit=        every referenced group
+    /api/group/<g>                    triggers in, targeting or remapping g
+    /api/property?key=&value=         triggers with property key (ID or name) = value
+    /api/dependencies/<g>             in g / targeting g / remapping g, separately
+    /api/chain/<g>?depth=             groups spawned from g, transitively (Spawn targets,
+                                      not groups remapped at runtime)
+    /api/reach/<g>                    groups that can transitively affect g / that g can
+                                      affect (touhou_scs.depgraph)
+    /api/trigger/<i>                  one trigger
+
+List responses are {"total", "offset", "items": [{"index", "trigger",
+"component", "source"}]} pages of at most MAX_LIMIT triggers.
+Only the standard library is used.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import re
+import time
+from bisect import bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+import orjson
+
+from touhou_scs import columnar, enums as enum, provenance
+from touhou_scs.depgraph import DependencyGraph
+from touhou_scs.index import TriggerIndex
+from touhou_scs.types import Trigger
+
+ppt = enum.Properties # shorthand
+
+DEBUG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "debug")
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_CHAIN_EDGES = 5000
+
+Query = dict[str, str]
+"""Query string parameters (the last value given for each)"""
+Response = dict[str, Any]
+"""JSON body of an API response"""
+Route = tuple[re.Pattern[str], Callable[[Query, re.Match[str]], Response]]
+
+
+def load_export(path: str) -> dict[str, list[Any]]:
+    """Exported table ({"triggers", "components"}) from a .json or .scsb export"""
+    with open(path, "rb") as file: data = file.read()
+    if path.endswith(columnar.EXTENSION): return columnar.decode(data)
+    table = orjson.loads(data)
+    return {"triggers": table, "components": []} if isinstance(table, list) else table
+
+def _property_key(key: str) -> str:
+    if key.isdigit(): return key
+    value = getattr(ppt, key.upper(), None)
+    if not isinstance(value, str): raise ValueError(f"Unknown property {key!r}")
+    return value
+
+def _parse_value(value: str) -> Any:
+    """Query string value as the JSON value it spells (true, 12, 0.5, [5101]), else the string itself"""
+    try: parsed = orjson.loads(value)
+    except orjson.JSONDecodeError: return value
+    items: list[Any] = parsed if parsed.__class__ is list else [parsed]
+    if any(isinstance(item, (list, dict)) for item in items):
+        raise ValueError(f"Unsupported property value {value!r}: only numbers, strings, booleans and group lists")
+    return parsed
+
+
+class TriggerQueries:
+    """Paginated queries over one export, independent of HTTP."""
+
+    def __init__(self, table: dict[str, list[Any]], sources: dict[int, str] | None = None):
+        self.triggers: list[Trigger] = table["triggers"]
+        self.components: list[list[Any]] = table["components"]
+        self.sources = sources or {}
+        self.index = TriggerIndex()
+        self.index.extend(self.triggers)
+        self._positions = {id(t): i for i, t in enumerate(self.triggers)}
+        self._graph: DependencyGraph | None = None
+        self._starts: list[int] = []
+        first = 0
+        for comp in self.components:
+            self._starts.append(first)
+            first += comp[2]
+
+    @classmethod
+    def load(cls, path: str) -> TriggerQueries:
+        """Export at path, with the sources from its provenance sidecar if there is one"""
+        sources: dict[int, str] = {}
+        sidecar = provenance.sidecar_path(path)
+        if os.path.exists(sidecar):
+            with open(sidecar, "rb") as file: recorded = orjson.loads(file.read())
+            sites = recorded["sites"]
+            sources = {int(i): sites[site] for i, site in recorded["triggers"].items()}
+        return cls(load_export(path), sources)
+
+    def component(self, i: int) -> str | None:
+        """Name of the component exporting trigger i"""
+        c = bisect_right(self._starts, i) - 1
+        return self.components[c][0] if c >= 0 and i < self._starts[c] + self.components[c][2] else None
+
+    def item(self, i: int) -> dict[str, Any]:
+        return {"index": i, "trigger": self.triggers[i], "component": self.component(i), "source": self.sources.get(i)}
+
+    def page(self, triggers: list[Trigger], offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict[str, Any]:
+        if offset < 0 or limit < 0: raise ValueError("offset and limit must not be negative")
+        limit = min(limit, MAX_LIMIT)
+        items = [self.item(self._positions[id(t)]) for t in triggers[offset:offset + limit]]
+        return {"total": len(triggers), "offset": offset, "items": items}
+
+    # ===========================================================
+    # QUERIES
+    # ===========================================================
+
+    def summary(self) -> dict[str, Any]:
+        return {"triggers": len(self.triggers), "components": len(self.components), "groups": len(self.groups())}
+
+    def groups(self) -> list[int]:
+        return self.index.groups()
+
+    def by_group(self, group: int, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict[str, Any]:
+        return self.page(self.index.referencing(group), offset, limit)
+
+    def by_property(self, key: str, value: str, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict[str, Any]:
+        key = _property_key(key)
+        # Remap strings like "10.6001" parse as numbers too
+        matches = self.index.find({key: _parse_value(value)}) or self.index.find({key: value})
+        return self.page(matches, offset, limit)
+
+    def dependencies(self, group: int, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict[str, Any]:
+        return {
+            "spawners": self.page(self.index.in_group(group), offset, limit),
+            "movers": self.page(self.index.targeting(group), offset, limit),
+            "remappers": self.page(self.index.remapping(group), offset, limit),
+        }
+
+    def chain(self, group: int, depth: int = 32) -> dict[str, Any]:
+        """
+        Spawn edges reachable from group: [from group, spawned group, trigger index],
+        breadth first up to depth Spawn triggers deep.
+        """
+        edges: list[list[int]] = []
+        seen = {group}
+        frontier = [group]
+        for _ in range(depth):
+            following: list[int] = []
+            for g in frontier:
+                for trigger in self.index.in_group(g):
+                    if trigger[ppt.OBJ_ID] != enum.ObjectID.SPAWN: continue
+                    target = trigger[ppt.TARGET]
+                    edges.append([g, target, self._positions[id(trigger)]])
+                    if len(edges) >= MAX_CHAIN_EDGES:
+                        return {"root": group, "edges": edges, "truncated": True}
+                    if target not in seen:
+                        seen.add(target)
+                        following.append(target)
+            frontier = following
+            if not frontier: break
+        return {"root": group, "edges": edges, "truncated": bool(frontier)}
+
+    def reach(self, group: int) -> dict[str, Any]:
+        """Groups that can end up affecting group, groups it can end up affecting, and its cycle"""
+        if self._graph is None: self._graph = DependencyGraph.from_triggers(self.triggers)
+        return {
+            "root": group,
+            "affecting": self._graph.affecting(group),
+            "affected": self._graph.affected(group),
+            "cycle": self._graph.cycle(group),
+        }
+
+    def trigger(self, i: int) -> dict[str, Any]:
+        if not 0 <= i < len(self.triggers): raise LookupError(f"No trigger {i}")
+        return self.item(i)
+
+
+# ===========================================================
+# HTTP
+# ===========================================================
+
+_STATIC = {"/report.js": "application/javascript", "/styles.css": "text/css"}
+
+def _paged(q: Query) -> tuple[int, int]:
+    return int(q.get("offset", 0)), int(q.get("limit", DEFAULT_LIMIT))
+
+def _routes(queries: TriggerQueries) -> list[Route]:
+    """Handlers get the query parameters and the path match (m[1] is the group or trigger index)"""
+    return [
+        (re.compile(r"/api/summary"), lambda q, m: {**queries.summary(), "enums": _enums()}),
+        (re.compile(r"/api/groups"), lambda q, m: _slice(queries.groups(), q)),
+        (re.compile(r"/api/group/(-?\d+)"), lambda q, m: queries.by_group(int(m[1]), *_paged(q))),
+        (re.compile(r"/api/property"), lambda q, m: queries.by_property(q["key"], q["value"], *_paged(q))),
+        (re.compile(r"/api/dependencies/(-?\d+)"), lambda q, m: queries.dependencies(int(m[1]), *_paged(q))),
+        (re.compile(r"/api/chain/(-?\d+)"), lambda q, m: queries.chain(int(m[1]), int(q.get("depth", 32)))),
+        (re.compile(r"/api/reach/(-?\d+)"), lambda q, m: queries.reach(int(m[1]))),
+        (re.compile(r"/api/trigger/(\d+)"), lambda q, m: queries.trigger(int(m[1]))),
+    ]
+
+def _slice(values: list[Any], q: Query) -> Response:
+    offset, limit = int(q.get("offset", 0)), min(int(q.get("limit", MAX_LIMIT)), MAX_LIMIT)
+    return {"total": len(values), "offset": offset, "items": values[offset:offset + limit]}
+
+def _enums() -> Any:
+    with open(os.path.join(DEBUG_DIR, "enums.json"), "rb") as file: return orjson.loads(file.read())
+
+def _page() -> bytes:
+    with open(os.path.join(DEBUG_DIR, "template.html"), encoding="utf-8") as file: html = file.read()
+    return html.replace("/* DATA_INJECTION_POINT */", "window.TRIGGER_SERVER = true;").encode()
+
+def make_server(queries: TriggerQueries, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    routes = _routes(queries)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path in ("/", "/index.html"): return self._send(200, _page(), "text/html")
+                if url.path in _STATIC:
+                    with open(os.path.join(DEBUG_DIR, url.path[1:]), "rb") as file:
+                        return self._send(200, file.read(), _STATIC[url.path])
+                for pattern, handle in routes:
+                    match = pattern.fullmatch(url.path)
+                    if match: return self._send(200, orjson.dumps(handle(query, match)))
+                self._send(404, orjson.dumps({"error": f"Unknown path {url.path}"}))
+            except (KeyError, ValueError, LookupError) as e:
+                self._send(400, orjson.dumps({"error": str(e) if not isinstance(e, KeyError) else f"Missing parameter {e}"}))
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None: pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m touhou_scs.server",
+        description="Serve the trigger debugger with queries over an export.")
+    parser.add_argument("export", nargs="?", default="triggers.json", help="triggers.json or triggers.scsb")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    queries = TriggerQueries.load(args.export)
+    print(f"Indexed {len(queries.triggers)} triggers in {time.perf_counter() - began:.3f}s")
+    server = make_server(queries, args.host, args.port)
+    print(f"Trigger debugger at http://{args.host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -85,6 +85,11 @@ Trigger = TypedDict("Trigger",{
     "394": bool,                # MOVE_DIRECTION_MODE
     "396": float,               # MOVE_DIRECTION_MODE_DISTANCE
     "544": bool,                # MOVE_SILENT
+    # Keyframe Object
+    "373": int,                 # KEYFRAME_ID
+    "374": int,                 # ORDER_INDEX
+    # Build-time only
+    "_src": int,                # provenance.SOURCE_KEY - source site index, never exported
 }, total=False)
 
 
@@ -113,6 +118,10 @@ class ComponentProtocol(Protocol):
         """Set spawn order requirement. Returns self for chaining."""
         ...
 
+    def create_trigger(self, obj_id: int, x: float, target: int) -> Trigger:
+        """Trigger of this component's groups and editor layer. Not yet appended."""
+        ...
+
 
 # ==========================================
 # SPELL PROTOCOL
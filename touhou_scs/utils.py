@@ -8,16 +8,24 @@ import math
 from typing import Any, Callable
 import warnings
 import functools
-from touhou_scs import enums as enum
+from touhou_scs import context as _context, enums as enum, profiler
 from touhou_scs.types import ComponentProtocol
 
 
 class CallTracked:
     def __init__(self, func: Callable[..., Any]):
         self.__func = func
-        self.has_been_called = False
         functools.update_wrapper(self, func)
 
+    @property
+    def has_been_called(self) -> bool:
+        return self in _context.active().called
+
+    @has_been_called.setter
+    def has_been_called(self, value: bool) -> None:
+        if value: _context.active().called.add(self)
+        else: _context.active().called.discard(self)
+
     def __call__(self, *args: Any, **kwargs: Any):
         try:
             return self.__func(*args, **kwargs)
@@ -25,7 +33,7 @@ class CallTracked:
             self.has_been_called = True
 
 def calltracker(func: Callable[..., Any]) -> CallTracked:
-    """Decorator that assigns func.has_been_called. Does not track call count."""
+    """Decorator that assigns func.has_been_called (per build context). Does not track call count."""
     return CallTracked(func)
 
 def warn(message: str, *, stacklevel: int = 3):
@@ -39,21 +47,104 @@ def round_to_n_sig_figs(x: float | int, n: int) -> float:
     """Round to n significant figures (GD uses 6)"""
     return 0 if x == 0 else round(x, -int(math.floor(math.log10(abs(x)))) + (n - 1))
 
-class UnknownGroupGenerator:
-    def __init__(self) -> None:
-        self.counter = 10000
+def ease(type: int, rate: float, x: float) -> float:
+    """
+    Evaluate a GD easing curve at progress x (0-1).
+
+    Follows the cocos2d actions GD uses: rate is the power for ease in/out
+    and the period for elastic easings (bounce, exponential, sine and back ignore it).
+    """
+    if x <= 0: return 0.0
+    if x >= 1: return 1.0
+    E = enum.Easing
+
+    if type == E.NONE: return x
+    if type == E.EASE_IN_OUT:
+        x *= 2
+        if x < 1: return 0.5 * x ** rate
+        return 1 - 0.5 * (2 - x) ** rate
+    if type == E.EASE_IN: return x ** rate
+    if type == E.EASE_OUT: return x ** (1 / rate)
+
+    if type == E.ELASTIC_IN:
+        s = rate / 4
+        x -= 1
+        return -(2 ** (10 * x)) * math.sin((x - s) * 2 * math.pi / rate)
+    if type == E.ELASTIC_OUT:
+        s = rate / 4
+        return 2 ** (-10 * x) * math.sin((x - s) * 2 * math.pi / rate) + 1
+    if type == E.ELASTIC_IN_OUT:
+        s = rate / 4
+        x = 2 * x - 1
+        if x < 0:
+            return -0.5 * 2 ** (10 * x) * math.sin((x - s) * 2 * math.pi / rate)
+        return 2 ** (-10 * x) * math.sin((x - s) * 2 * math.pi / rate) * 0.5 + 1
+
+    def bounce_out(x: float) -> float:
+        if x < 1 / 2.75: return 7.5625 * x * x
+        if x < 2 / 2.75:
+            x -= 1.5 / 2.75
+            return 7.5625 * x * x + 0.75
+        if x < 2.5 / 2.75:
+            x -= 2.25 / 2.75
+            return 7.5625 * x * x + 0.9375
+        x -= 2.625 / 2.75
+        return 7.5625 * x * x + 0.984375
+
+    if type == E.BOUNCE_IN: return 1 - bounce_out(1 - x)
+    if type == E.BOUNCE_OUT: return bounce_out(x)
+    if type == E.BOUNCE_IN_OUT:
+        if x < 0.5: return (1 - bounce_out(1 - x * 2)) * 0.5
+        return bounce_out(x * 2 - 1) * 0.5 + 0.5
+
+    if type == E.EXPONENTIAL_IN: return 2 ** (10 * (x - 1)) - 0.001
+    if type == E.EXPONENTIAL_OUT: return 1 - 2 ** (-10 * x)
+    if type == E.EXPONENTIAL_IN_OUT:
+        x *= 2
+        if x < 1: return 0.5 * 2 ** (10 * (x - 1))
+        return 0.5 * (2 - 2 ** (-10 * (x - 1)))
+
+    if type == E.SINE_IN: return 1 - math.cos(x * math.pi / 2)
+    if type == E.SINE_OUT: return math.sin(x * math.pi / 2)
+    if type == E.SINE_IN_OUT: return -0.5 * (math.cos(math.pi * x) - 1)
+
+    overshoot = 1.70158
+    if type == E.BACK_IN: return x * x * ((overshoot + 1) * x - overshoot)
+    if type == E.BACK_OUT:
+        x -= 1
+        return x * x * ((overshoot + 1) * x + overshoot) + 1
+    if type == E.BACK_IN_OUT:
+        overshoot *= 1.525
+        x *= 2
+        if x < 1: return (x * x * ((overshoot + 1) * x - overshoot)) / 2
+        x -= 2
+        return (x * x * ((overshoot + 1) * x + overshoot)) / 2 + 1
+
+    raise ValueError(f"Easing 'type' must be an int in range 0-18. Got: {type}")
+
+class _ActiveGroupGenerator:
+    """Forwards to the unknown group generator of the active build context."""
+
+    def __call__(self, category: str = "components") -> int:
+        return _context.active().unknown_g(category)
+
+    @property
+    def counter(self) -> int:
+        return _context.active().unknown_g.counter
+
+    @counter.setter
+    def counter(self, value: int) -> None:
+        _context.active().unknown_g.counter = value
 
-    def __call__(self) -> int:
-        result = self.counter
-        self.counter += 1
-        return result
-    
     @property
     def used_groups(self) -> list[int]:
-        return list(range(10000, self.counter))
+        return _context.active().unknown_g.used_groups
 
-unknown_g = UnknownGroupGenerator()
-"""Call with 'unknown_g()' and access list with 'unknown_g.used_groups'."""
+unknown_g = _ActiveGroupGenerator()
+"""
+Call with 'unknown_g()' and access list with 'unknown_g.used_groups'.
+unknown_g(category) charges the group to a group budget category.
+"""
 
 def group(group_id: int) -> int: """Semantic Wrapper"""; return group_id # noqa
 
@@ -94,6 +185,8 @@ def translate_remap_string(remap_string: str) -> tuple[dict[int, int], str]:
 
     return pairs, clean_string
 
+profiler.track_cache("translate_remap_string", translate_remap_string)
+
 
 class Remap:
     """Remap string builder class with chainable API."""
@@ -0,0 +1,148 @@
+"""
+Touhou SCS - Watch Module
+
+Long-lived rebuild daemon: keeps touhou_scs imported and re-runs spell
+sources when they change.
+
+    python -m touhou_scs.watch main.py [more_spells.py ...]
+
+Sources run in order like one long script. The BuildContext is forked
+before each source, so editing source k re-runs only sources k onward in a
+fresh fork of checkpoint k. Exports use a seeded spread, which keeps unchanged
+components in place, and the components that changed are also written to
+'<output>.diff.json'.
+"""
+
+from __future__ import annotations
+import argparse
+import dataclasses
+import importlib
+import os
+import runpy
+import sys
+import time
+import traceback
+from typing import Any
+
+import orjson
+
+from touhou_scs import context, lib
+from touhou_scs.context import BuildContext
+from touhou_scs.types import Trigger
+
+importlib.import_module("touhou_scs.misc") # library components must exist before the first checkpoint
+
+BUILD_ERRORS: tuple[type[Exception], ...] = (SyntaxError, NameError, AttributeError, TypeError,
+    ValueError, LookupError, ArithmeticError, AssertionError, RuntimeError, OSError)
+"""What a spell script being edited raises; main() reports these and keeps watching"""
+
+
+class WatchBuild:
+    """Builds sources in order and rebuilds from the first changed one."""
+
+    def __init__(self, sources: list[str], *, output: str = "triggers.json", seed: int = 0):
+        if not sources:
+            raise ValueError("WatchBuild: no spell sources given")
+        self.sources = [os.path.abspath(s) for s in sources]
+        self.output = output
+        self.seed = seed
+
+        self._checkpoints: list[BuildContext] = [context.active().fork("watch:0")]
+        """Context before each source that has been run"""
+        self._built: BuildContext | None = None
+        self._mtimes = {s: os.stat(s).st_mtime_ns for s in self.sources}
+        self._save_options = lib.SaveOptions()
+        self._last_export: dict[str, list[Trigger]] = {}
+
+    def changed_source(self) -> int | None:
+        """Index of the first source modified since it was last built."""
+        first: int | None = None
+        for i, source in enumerate(self.sources):
+            mtime = os.stat(source).st_mtime_ns
+            if mtime != self._mtimes[source]:
+                self._mtimes[source] = mtime
+                if first is None: first = i
+        return first
+
+    def build(self, start: int = 0) -> dict[str, Any]:
+        """
+        Re-run sources[start:] in a fork of checkpoint 'start' and export.
+
+        Returns {"changed": {component: triggers}, "removed": [component]}
+        """
+        # Sources after a failed one were never built
+        start = min(start, len(self._checkpoints) - 1)
+        del self._checkpoints[start + 1:]
+        build = self._checkpoints[start].fork(f"watch:{start}").activate()
+
+        try:
+            with lib.deferred_save_all() as saves:
+                for i in range(start, len(self.sources)):
+                    if i > start: self._checkpoints.append(build.fork(f"watch:{i}"))
+                    runpy.run_path(self.sources[i], run_name="__main__")
+        except BaseException:
+            # Keep the last good build active
+            (self._built or self._checkpoints[0].fork("watch:0")).activate()
+            raise
+
+        if saves: self._save_options = saves[-1]
+
+        self._built = build
+        return self._export()
+
+    def _export(self) -> dict[str, Any]:
+        assert self._built is not None
+        with self._built.fork("watch:export"):
+            dataclasses.replace(self._save_options, filename=self.output, seed=self.seed).save()
+            export = {f"{c.caller}:{c.name}": list(c.triggers) for c in lib.all_components if c.triggers}
+
+        diff = {
+            "changed": {k: v for k, v in export.items() if self._last_export.get(k) != v},
+            "removed": [k for k in self._last_export if k not in export],
+        }
+        self._last_export = export
+        if self.output != "testing":
+            with open(os.path.splitext(self.output)[0] + ".diff.json", "wb") as file:
+                file.write(orjson.dumps(diff))
+        return diff
+
+
+def _library_mtime() -> int:
+    root = os.path.dirname(os.path.abspath(__file__))
+    return max(os.stat(os.path.join(root, f)).st_mtime_ns
+        for f in os.listdir(root) if f.endswith(".py"))
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m touhou_scs.watch",
+        description="Rebuild spells on change with touhou_scs kept imported.")
+    parser.add_argument("sources", nargs="+", help="Spell scripts, run in this order")
+    parser.add_argument("--output", default="triggers.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--interval", type=float, default=0.2, help="Polling interval in seconds")
+    args = parser.parse_args(argv)
+
+    builder = WatchBuild(args.sources, output=args.output, seed=args.seed)
+    library_mtime = _library_mtime()
+    start: int | None = 0
+
+    while True:
+        if start is not None:
+            began = time.perf_counter()
+            try:
+                diff = builder.build(start)
+                print(f"\nRebuilt from {os.path.basename(builder.sources[start])} in "
+                      f"{time.perf_counter() - began:.3f}s: {len(diff['changed'])} components changed, "
+                      f"{len(diff['removed'])} removed")
+            except BUILD_ERRORS:
+                traceback.print_exc()
+            print("Watching for changes...")
+
+        time.sleep(args.interval)
+        if _library_mtime() != library_mtime:
+            print("touhou_scs changed, restarting...")
+            os.execv(sys.executable, [sys.executable, "-m", "touhou_scs.watch", *sys.argv[1:]])
+        start = builder.changed_source()
+
+
+if __name__ == "__main__":
+    main()